@@ -0,0 +1,51 @@
+'''
+Per-call cost of building a PlayerState, validated vs trusted construction.
+
+    python benchmarks/bench_player_state.py [--number N]
+'''
+import argparse
+import timeit
+from cribserver.engine import CribbageEngine, ServerConfig
+from cribserver.api_model import PlayerState
+
+
+def count_phase_game():
+    '''a game in the COUNT phase with a few cards played'''
+    engine = CribbageEngine(ServerConfig(stats_file=None))
+    game = engine.add_player("bench", "player1", "P1")
+    engine.add_player("bench", "player2", "P2")
+    for player_id in ("player1", "player2"):
+        engine.discard(game, player_id, game.deck.piles[player_id][:2])
+    for _ in range(2):
+        player_id = game.current_turn
+        engine.play(game, player_id, game.legal_cards[player_id][0])
+    return game
+
+
+def validated(game, player_id):
+    # what from_game_state did before: full pydantic validation
+    return PlayerState(**PlayerState.state_fields(game, player_id))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    game = count_phase_game()
+    player_id = game.current_turn
+    assert validated(game, player_id).model_dump_json() == PlayerState.from_game_state(game, player_id).model_dump_json()
+    cases = [
+        ("state_fields only", lambda: PlayerState.state_fields(game, player_id)),
+        ("validated", lambda: validated(game, player_id)),
+        ("from_game_state", lambda: PlayerState.from_game_state(game, player_id)),
+        ("validated + model_dump_json", lambda: validated(game, player_id).model_dump_json()),
+        ("from_game_state + model_dump_json", lambda: PlayerState.from_game_state(game, player_id).model_dump_json()),
+        ]
+    for name, func in cases:
+        best = min(timeit.repeat(func, number=args.number, repeat=5)) / args.number
+        print(f"{name:36s} {best * 1e6:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+'''
+Benchmarks for the scoring, deck, model and HTTP route hot paths.
+
+    python benchmarks/run_benchmarks.py                      # run all, write results/latest.json
+    python benchmarks/run_benchmarks.py -k score_            # only matching names
+    python benchmarks/run_benchmarks.py --save-baseline      # also keep as results/baseline.json
+    python benchmarks/run_benchmarks.py --compare            # compare with results/baseline.json
+
+With --compare the exit status is 1 if any benchmark is slower than the
+baseline by more than --threshold. Results are machine specific, so
+results/ is not checked in.
+'''
+from typing import Callable, Dict, List
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import uuid
+from fastapi.testclient import TestClient
+from cribserver import wire
+from cribserver.cards import Card, Deck
+from cribserver.cribbage import score_play_phase, score_show_phase
+from cribserver.server import ServerConfig, create_app
+from cribserver.api_model import Action, ActionBatchRequest, ActionType, MatchRequest, PlayRequest, PlayerState
+from bench_player_state import count_phase_game
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+STATIC_DIR = os.path.join(os.path.dirname(BENCHMARK_DIR), "static")
+
+# name -> (number of calls per repeat, setup). setup(number) returns the function to time;
+# work done in setup, like dealing games for the action routes, is not timed
+BENCHMARKS: Dict[str, tuple] = {}
+
+
+def benchmark(name: str, number: int = 1000):
+    def register(setup: Callable[[int], Callable[[], object]]):
+        BENCHMARKS[name] = (number, setup)
+        return setup
+    return register
+
+
+def cards(names: str) -> List[int]:
+    return [Card.from_string(name) for name in names.split()]
+
+
+# Scoring
+HANDS = {
+    # 5C 5H 5S JD with the 5D starter
+    "29": (cards("5C 5H 5S JD"), Card.from_string("5D")),
+    "zero": (cards("2C 4D 6H 8S"), Card.from_string("KC")),
+    "typical": (cards("7C 8D 8H 9S"), Card.from_string("2C")),
+    "flush": (cards("2H 6H 9H QH"), Card.from_string("3H")),
+    }
+
+for hand_name, (hand, starter) in HANDS.items():
+    @benchmark(f"score_show_phase[{hand_name}]", number=2000)
+    def bench_show(number, hand=hand, starter=starter):
+        return lambda: score_show_phase(hand, starter, score_log=[])
+
+PEGGING = {
+    # every prefix is scored, as the server does after each card
+    "run": cards("AC 2D 3H 4S 5C 6D 7H"),
+    "pairs": cards("7C 7D 7H 7S"),
+    "mixed": cards("5C 10D 5H JS 6C"),
+    }
+
+for sequence_name, sequence in PEGGING.items():
+    @benchmark(f"score_play_phase[{sequence_name}]", number=2000)
+    def bench_play(number, sequence=sequence):
+        prefixes = [sequence[:i] for i in range(1, len(sequence) + 1)]
+        def run():
+            for prefix in prefixes:
+                score_play_phase(prefix, score_log=[])
+        return run
+
+
+# Deck and cards
+@benchmark("Deck.shuffle", number=5000)
+def bench_shuffle(number):
+    deck = Deck()
+    return deck.shuffle
+
+
+@benchmark("Deck.deal_to_piles", number=5000)
+def bench_deal(number):
+    decks = []
+    for _ in range(number):
+        deck = Deck()
+        deck.create_pile("p1")
+        deck.create_pile("p2")
+        decks.append(deck)
+    decks = iter(decks)
+    return lambda: next(decks).deal_to_piles(["p1", "p2"], 6)
+
+
+@benchmark("Card.from_string[52]", number=1000)
+def bench_from_string(number):
+    names = [Card.to_string(card_idx) for card_idx in range(52)]
+    return lambda: [Card.from_string(name) for name in names]
+
+
+# Models
+@benchmark("PlayerState.from_game_state", number=5000)
+def bench_from_game_state(number):
+    game = count_phase_game()
+    return lambda: PlayerState.from_game_state(game, "player1")
+
+
+@benchmark("wire.encode_state", number=5000)
+def bench_wire_encode(number):
+    game = count_phase_game()
+    state = PlayerState.from_game_state(game, "player1")
+    return lambda: wire.encode_state(state)
+
+
+# Routes
+# clients entered by route_client, exited after each timed repeat. An entered TestClient
+# keeps one event loop for all its requests instead of starting one per request
+ROUTE_CLIENTS = contextlib.ExitStack()
+
+
+def route_client():
+    app = create_app(ServerConfig(stats_file=None, static_dir=STATIC_DIR, setup_logging=False,
+                                  poll_rate=None, address_poll_rate=None))
+    return app, ROUTE_CLIENTS.enter_context(TestClient(app))
+
+
+def dealt_games(client: TestClient, number: int) -> List[str]:
+    game_ids = []
+    for _ in range(number):
+        game_id = uuid.uuid4().hex
+        for player_id in ("player1", "player2"):
+            client.post(f"/games/{game_id}/join", json={"player_id": player_id, "name": player_id})
+        game_ids.append(game_id)
+    return game_ids
+
+
+def count_phase_games(app, client: TestClient, number: int, player_ids=("player1", "player2")) -> List[str]:
+    '''deal games and discard for player_ids, by default both players so the games are in COUNT'''
+    game_ids = dealt_games(client, number)
+    for game_id in game_ids:
+        game = app.state.engine.games[game_id]
+        for player_id in player_ids:
+            hand = game.deck.piles[player_id][:2]
+            client.post(f"/games/{game_id}/discard", json={"player_id": player_id, "card_indices": hand})
+    return game_ids
+
+
+@benchmark("GET /", number=500)
+def bench_root(number):
+    app, client = route_client()
+    return lambda: client.get("/", headers={"Accept-Encoding": "gzip"})
+
+
+@benchmark("GET /static/{name}", number=500)
+def bench_static(number):
+    app, client = route_client()
+    return lambda: client.get("/static/script.js", headers={"Accept-Encoding": "gzip"})
+
+
+@benchmark("GET /games/", number=300)
+def bench_list_games(number):
+    app, client = route_client()
+    dealt_games(client, 100)
+    return lambda: client.get("/games/", params={"limit": 50})
+
+
+@benchmark("GET /metrics", number=300)
+def bench_metrics(number):
+    app, client = route_client()
+    dealt_games(client, 10)
+    return lambda: client.get("/metrics")
+
+
+@benchmark("POST /games/{game_id}/join", number=300)
+def bench_join(number):
+    app, client = route_client()
+    game_ids = iter([uuid.uuid4().hex for _ in range(number)])
+    return lambda: client.post(f"/games/{next(game_ids)}/join", json={"player_id": "player1", "name": "P1"})
+
+
+@benchmark("GET /games/{game_id}/{player_id}/state[json]", number=500)
+def bench_state_json(number):
+    app, client = route_client()
+    game_id = count_phase_games(app, client, 1)[0]
+    return lambda: client.get(f"/games/{game_id}/player1/state")
+
+
+@benchmark("GET /games/{game_id}/{player_id}/state[binary]", number=500)
+def bench_state_binary(number):
+    app, client = route_client()
+    game_id = count_phase_games(app, client, 1)[0]
+    return lambda: client.get(f"/games/{game_id}/player1/state", headers={"Accept": wire.MEDIA_TYPE})
+
+
+@benchmark("GET /games/{game_id}/{player_id}/state[304]", number=500)
+def bench_state_not_modified(number):
+    app, client = route_client()
+    game_id = count_phase_games(app, client, 1)[0]
+    etag = client.get(f"/games/{game_id}/player1/state").headers["etag"]
+    return lambda: client.get(f"/games/{game_id}/player1/state", headers={"If-None-Match": etag})
+
+
+@benchmark("POST /games/{game_id}/discard", number=200)
+def bench_discard(number):
+    app, client = route_client()
+    game_ids = iter(dealt_games(client, number))
+    def run():
+        game_id = next(game_ids)
+        hand = app.state.engine.games[game_id].deck.piles["player2"][:2]
+        return client.post(f"/games/{game_id}/discard", json={"player_id": "player2", "card_indices": hand})
+    return run
+
+
+@benchmark("POST /games/{game_id}/play", number=200)
+def bench_play_route(number):
+    app, client = route_client()
+    game_ids = iter(count_phase_games(app, client, number))
+    def run():
+        game = app.state.engine.games[next(game_ids)]
+        player_id = game.current_turn
+        request = PlayRequest(player_id=player_id, card_idx=game.legal_cards[player_id][0])
+        return client.post(f"/games/{game.game_id}/play", json=request.model_dump())
+    return run
+
+
+@benchmark("POST /games/{game_id}/actions", number=200)
+def bench_actions(number):
+    app, client = route_client()
+    # player1 has discarded, so player2's discard starts the count and player2 leads
+    game_ids = iter(count_phase_games(app, client, number, player_ids=("player1",)))
+    def run():
+        game = app.state.engine.games[next(game_ids)]
+        hand = game.deck.piles["player2"]
+        request = ActionBatchRequest(player_id="player2", actions=[
+            Action(type=ActionType.DISCARD, card_indices=hand[:2]),
+            Action(type=ActionType.PLAY, card_idx=hand[2]),
+            ])
+        return client.post(f"/games/{game.game_id}/actions", json=request.model_dump(mode="json"))
+    return run
+
+
+@benchmark("GET /players/{player_id}/stats", number=500)
+def bench_player_stats(number):
+    app, client = route_client()
+    dealt_games(client, 1)
+    return lambda: client.get("/players/player1/stats")
+
+
+@benchmark("POST /matchmaking/enqueue", number=200)
+def bench_matchmaking(number):
+    app, client = route_client()
+    player_ids = iter([uuid.uuid4().hex for _ in range(number)])
+    def run():
+        player_id = next(player_ids)
+        return client.post("/matchmaking/enqueue", json=MatchRequest(player_id=player_id, name=player_id).model_dump())
+    return run
+
+
+def run_benchmark(number: int, setup: Callable, repeat: int) -> Dict:
+    timings = []
+    for _ in range(repeat):
+        func = setup(number)
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+        ROUTE_CLIENTS.close()
+    return {
+        "us_per_call": min(timings) * 1e6,
+        "median_us": statistics.median(timings) * 1e6,
+        "number": number,
+        "repeat": repeat,
+        }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    '''print current vs baseline, return the names that regressed'''
+    regressions = []
+    print(f"\n{'benchmark':52s} {'baseline':>10s} {'current':>10s} {'ratio':>7s}")
+    for name, result in results["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:52s} {'-':>10s} {result['us_per_call']:10.2f}")
+            continue
+        ratio = result["us_per_call"] / base["us_per_call"]
+        flag = " REGRESSION" if ratio > threshold else ""
+        print(f"{name:52s} {base['us_per_call']:10.2f} {result['us_per_call']:10.2f} {ratio:7.2f}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="pattern", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="a tenth of the calls, for smoke testing")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "latest.json"))
+    parser.add_argument("--baseline", default=os.path.join(RESULTS_DIR, "baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    args = parser.parse_args()
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {},
+        }
+    for name, (number, setup) in BENCHMARKS.items():
+        if args.pattern not in name:
+            continue
+        if args.quick:
+            number = max(1, number // 10)
+        result = run_benchmark(number, setup, args.repeat)
+        results["results"][name] = result
+        print(f"{name:52s} {result['us_per_call']:10.2f} us/call")
+
+    paths = [args.output] + ([args.baseline] if args.save_baseline else [])
+    for path in paths:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+'''
+asyncio client for the cribbage server, for bots, load generation and
+integration tests. One AsyncCribbageClient holds one httpx connection pool,
+so a single process can drive hundreds of games concurrently:
+
+    async with AsyncCribbageClient("http://localhost:5000") as client:
+        state = await client.join("game1", "bot1", "Bot 1")
+        state = await client.state("game1", "bot1", wait=25)
+
+needs httpx: pip install cribserver[async]
+'''
+from typing import Dict, List, Optional, Tuple
+try:
+    import httpx
+except ImportError:
+    raise ImportError("cribserver.aioclient needs httpx: pip install cribserver[async]")
+from . import wire
+from .api_model import (Action, ActionBatchRequest, ActionBatchResult, DiscardRequest, GameListPage, GoRequest,
+                        JoinRequest, PlayerState, PlayRequest)
+
+# seconds
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10.0
+MAX_CONNECTIONS = 100
+
+
+class CribbageError(Exception):
+    '''
+    the server rejected a request, e.g. 400 "Not your turn"
+    '''
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+class AsyncCribbageClient:
+    def __init__(self, server_url: str, binary: bool = True, max_connections: int = MAX_CONNECTIONS,
+                 connect_timeout: float = CONNECT_TIMEOUT, read_timeout: float = READ_TIMEOUT,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        '''
+        binary: use the compact wire format (see wire.py) instead of JSON.
+        transport: e.g. httpx.ASGITransport(app) to talk to an app in-process.
+        '''
+        self.binary = binary
+        self.read_timeout = read_timeout
+        self.http = httpx.AsyncClient(
+            base_url=server_url.rstrip('/'),
+            headers={"Accept": wire.MEDIA_TYPE} if binary else {},
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+            )
+        # (game_id, player_id) -> (ETag, state) of the last state response
+        self.last_state: Dict[Tuple[str, str], Tuple[str, PlayerState]] = {}
+
+    async def __aenter__(self) -> "AsyncCribbageClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        await self.http.aclose()
+
+    @staticmethod
+    def check(response: httpx.Response) -> None:
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get("detail", response.text)
+            except ValueError:
+                detail = response.text
+            raise CribbageError(response.status_code, str(detail))
+
+    def parse_state(self, response: httpx.Response) -> PlayerState:
+        self.check(response)
+        if response.headers.get("content-type", "").startswith(wire.MEDIA_TYPE):
+            return wire.decode_state(response.content)
+        return PlayerState.model_validate_json(response.content)
+
+    async def post_state(self, path: str, request) -> PlayerState:
+        response = await self.http.post(path, json=request.model_dump(mode="json"))
+        return self.parse_state(response)
+
+    async def list_games(self, phase: Optional[str] = None, open_only: bool = False, cursor: int = 0,
+                         limit: int = 50) -> GameListPage:
+        params = {"open": open_only, "cursor": cursor, "limit": limit}
+        if phase is not None:
+            params["phase"] = phase
+        response = await self.http.get("/games/", params=params)
+        self.check(response)
+        return GameListPage.model_validate_json(response.content)
+
+    async def join(self, game_id: str, player_id: str, name: str, match: bool = False) -> PlayerState:
+        return await self.post_state(f"/games/{game_id}/join",
+                                     JoinRequest(player_id=player_id, name=name, match=match))
+
+    async def state(self, game_id: str, player_id: str, wait: float = 0) -> PlayerState:
+        '''
+        Current state. Sends the last ETag, so an unchanged state costs a 304 and
+        the cached state is returned. With wait > 0 the server holds the request
+        up to `wait` seconds until the state changes.
+        '''
+        key = (game_id, player_id)
+        headers = {}
+        cached = self.last_state.get(key)
+        if cached is not None:
+            headers["If-None-Match"] = cached[0]
+        params = {"wait": wait} if wait else None
+        timeout = httpx.Timeout(self.read_timeout + wait, connect=self.http.timeout.connect)
+        response = await self.http.get(f"/games/{game_id}/{player_id}/state", params=params, headers=headers,
+                                       timeout=timeout)
+        if response.status_code == 304 and cached is not None:
+            return cached[1]
+        state = self.parse_state(response)
+        if "etag" in response.headers:
+            self.last_state[key] = (response.headers["etag"], state)
+        return state
+
+    async def discard(self, game_id: str, player_id: str, card_indices: List[int]) -> PlayerState:
+        return await self.post_state(f"/games/{game_id}/discard",
+                                     DiscardRequest(player_id=player_id, card_indices=card_indices))
+
+    async def play(self, game_id: str, player_id: str, card_idx: int) -> PlayerState:
+        return await self.post_state(f"/games/{game_id}/play", PlayRequest(player_id=player_id, card_idx=card_idx))
+
+    async def go(self, game_id: str, player_id: str) -> PlayerState:
+        return await self.post_state(f"/games/{game_id}/go", GoRequest(player_id=player_id))
+
+    async def actions(self, game_id: str, player_id: str, actions: List[Action]) -> ActionBatchResult:
+        request = ActionBatchRequest(player_id=player_id, actions=actions)
+        response = await self.http.post(f"/games/{game_id}/actions", json=request.model_dump(mode="json"))
+        self.check(response)
+        if response.headers.get("content-type", "").startswith(wire.MEDIA_TYPE):
+            return wire.decode_batch_result(response.content)
+        return ActionBatchResult.model_validate_json(response.content)
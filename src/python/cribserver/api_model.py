@@ -2,6 +2,7 @@ from enum import Enum
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional, Callable, Tuple
 from .cards import Card, Deck
+from .rating import DEFAULT_RATING
 
 
 class CribbagePhase(Enum):
@@ -40,6 +41,15 @@ class Player(BaseModel):
     name: str
     score: int = 0
 
+class HandSummary(BaseModel):
+    # what remains of a finished hand once a match moves on to the next one
+    hand: int
+    dealer: str
+    # points scored during the hand, by player_id
+    points: Dict[str, int]
+    # scores at the end of the hand, by player_id
+    scores: Dict[str, int]
+
 class GameState:
     # unique ID for the game
     game_id: str
@@ -56,34 +66,98 @@ class GameState:
     # current phase of the game
     phase: CribbagePhase
     # messages for each game phase change and each time points are score
+    # in match play this only holds the current hand, earlier hands are in hand_summaries
     game_log: List[Tuple[LogType, str]]
+    # None for a single hand, WINNING_SCORE for match play
+    target_score: Optional[int] = None
+    # 1 for the first hand of the game
+    hand_number: int = 1
+    # one entry per finished hand in match play
+    hand_summaries: List[HandSummary]
+    # public log of the last finished hand, so its show and crib counts stay visible after the next deal
+    previous_hand_log: List[str]
+    # scores when the current hand was dealt
+    hand_start_scores: Dict[str, int]
+    # bumped on every change a player can see
+    version: int = 0
+    # last version returned to each player by the state endpoint
+    polled_versions: Dict[str, int]
+    # called after every phase change, e.g. to keep the lobby index current
+    on_phase_change: Optional[Callable[["GameState"], None]] = None
+    # running total of the phase1 pile, updated as cards are played and drained
+    phase1_count: int = 0
+    # per player, the cards that fit under 31 on the current count
+    legal_cards: Dict[str, List[int]]
+    # engine clock when the next move became possible: the deal, or the last play
+    turn_started: float = 0.0
 
     def phase1_total(self):
-        return sum([Card.get_value(c) for c in self.deck.get_cards("phase1")])
+        return self.phase1_count
+
+    def update_legal_cards(self) -> None:
+        room = 31 - self.phase1_count
+        self.legal_cards = {
+            p.player_id: [c for c in self.deck.piles.get(p.player_id, []) if Card.get_value(c) <= room]
+            for p in self.players
+            }
 
     def log_action(self, action_type: LogType, player_id: str, subject: str):
         log_message = f"{action_type.name},{player_id},{subject}"
         self.game_log.append((LogType.PRIVATE, log_message))
 
-    def append_log(self, player: Player) -> Callable[[str], None]:
+    def append_log(self, player: Player) -> "LogAppender":
         '''
         returns a method to append messages to game log
         '''
-        game = self
-        class LogAppender:
-            def append(self, msg: str) -> None:
-                game.game_log.append((LogType.PUBLIC, f"{player.name} {msg}"))
-        return LogAppender()
+        return LogAppender(self, player)
+
+    def end_hand(self) -> None:
+        '''
+        compact the finished hand into a HandSummary and clear the per-hand state
+        '''
+        scores = {p.player_id: p.score for p in self.players}
+        self.hand_summaries.append(HandSummary(
+            hand=self.hand_number,
+            dealer=self.dealer,
+            points={pid: score - self.hand_start_scores.get(pid, 0) for pid, score in scores.items()},
+            scores=scores,
+            ))
+        self.previous_hand_log = [line for typ, line in self.game_log if typ == LogType.PUBLIC]
+        self.hand_start_scores = scores
+        self.hand_number += 1
+        self.game_log = []
+        self.played_cards = []
+        self.phase1_count = 0
 
     def change_phase(self, new_phase: CribbagePhase) -> None:
         self.phase = new_phase
         self.game_log.append((LogType.PUBLIC, f"game.phase -> {new_phase.name}"))
+        if self.on_phase_change is not None:
+            self.on_phase_change(self)
 
     def __init__(self, **kw):
         self.game_log = []
         self.played_cards = []
+        self.legal_cards = {}
+        self.hand_summaries = []
+        self.previous_hand_log = []
+        self.hand_start_scores = {}
+        self.polled_versions = {}
         self.__dict__.update(kw)
 
+class LogAppender:
+    '''
+    score_log for the scoring functions: appends "<player name> <msg>" to the public game log
+    '''
+    __slots__ = ("game", "player")
+
+    def __init__(self, game: GameState, player: Player):
+        self.game = game
+        self.player = player
+
+    def append(self, msg: str) -> None:
+        self.game.game_log.append((LogType.PUBLIC, f"{self.player.name} {msg}"))
+
 class GameListItem(BaseModel):
     game_id: str
     player_count: int
@@ -97,6 +171,11 @@ class GameListItem(BaseModel):
             phase=game.phase
             )
 
+class GameListPage(BaseModel):
+    games: List[GameListItem]
+    # pass as ?cursor= to get the next page. None on the last page
+    next_cursor: Optional[int] = None
+
 class PlayerState(BaseModel):
     game_id: str
     players: List[Player]
@@ -105,27 +184,54 @@ class PlayerState(BaseModel):
     my_turn: bool
     phase: CribbagePhase
     game_log: List[str] = Field(default_factory=list)
+    # cards this player may play right now. Empty unless it is their turn in COUNT
+    legal_cards: List[int] = Field(default_factory=list)
+    # match play only: points needed to win, current hand and earlier hands
+    target_score: Optional[int] = None
+    hand_number: int = 1
+    hand_summaries: List[HandSummary] = Field(default_factory=list)
+    # match play: public log of the previous hand. Older hands only keep their summary
+    previous_hand_log: List[str] = Field(default_factory=list)
 
-    @classmethod
-    def from_game_state(cls, game, player_id):
+    @staticmethod
+    def state_fields(game, player_id) -> Dict:
         deck = game.deck
         visible_piles = {}
         deck.copy_existing_piles(("starter", "phase1", player_id), visible_piles)
-        #print(f"from_game_state: len(players)={len(game.players)}  phase={game.phase.name}")
-        result = cls(
+        my_turn = (game.current_turn is not None and game.current_turn == player_id)
+        legal_cards = []
+        if game.phase == CribbagePhase.COUNT and my_turn:
+            legal_cards = game.legal_cards.get(player_id, []).copy()
+        return dict(
             game_id = game.game_id,
             players = game.players.copy(),
+            visible_piles = visible_piles,
             is_dealer = game.dealer == player_id,
-            my_turn = (game.current_turn is not None and game.current_turn == player_id),
+            my_turn = my_turn,
             phase = game.phase,
-            visible_piles = visible_piles,
-            game_log = [s for (t, s) in game.game_log if t == LogType.PUBLIC]
+            game_log = [s for (t, s) in game.game_log if t == LogType.PUBLIC],
+            legal_cards = legal_cards,
+            target_score = game.target_score,
+            hand_number = game.hand_number,
+            hand_summaries = game.hand_summaries.copy(),
+            # replaced, never appended to, by end_hand
+            previous_hand_log = game.previous_hand_log,
             )
-        return result
+
+    @classmethod
+    def from_game_state(cls, game, player_id):
+        # every field comes from server state of the right type, so skip validation
+        return cls.model_construct(**cls.state_fields(game, player_id))
+
+# longest player_id and name a player can join or queue with
+MAX_ID_LENGTH = 64
+MAX_NAME_LENGTH = 100
 
 class JoinRequest(BaseModel):
-    player_id: str
-    name: str
+    player_id: str = Field(max_length=MAX_ID_LENGTH)
+    name: str = Field(max_length=MAX_NAME_LENGTH)
+    # when creating the game: play hands until someone reaches 121 instead of a single hand
+    match: bool = False
 
 class PlayRequest(BaseModel):
     player_id: str
@@ -137,3 +243,71 @@ class DiscardRequest(BaseModel):
 
 class GoRequest(BaseModel):
     player_id: str
+
+class ActionType(str, Enum):
+    DISCARD = "discard"
+    PLAY = "play"
+    GO = "go"
+
+class Action(BaseModel):
+    type: ActionType
+    # for discard
+    card_indices: Optional[List[int]] = None
+    # for play
+    card_idx: Optional[int] = None
+
+# a hand is one discard and at most 4 plays, so this leaves plenty of room for go calls
+MAX_BATCH_ACTIONS = 32
+
+class ActionBatchRequest(BaseModel):
+    player_id: str
+    actions: List[Action] = Field(max_length=MAX_BATCH_ACTIONS)
+
+class ActionError(BaseModel):
+    # position of the failed action in the request
+    index: int
+    status_code: int
+    detail: str
+
+class ActionBatchResult(BaseModel):
+    # number of actions applied before the first error
+    applied: int
+    errors: List[ActionError] = Field(default_factory=list)
+    state: PlayerState
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    player_id: str
+    name: str
+    wins: int
+    games_played: int
+    win_rate: float
+    rating: float
+
+    @classmethod
+    def from_stats(cls, rank, player_id, stats):
+        return LeaderboardEntry(
+            rank=rank,
+            player_id=player_id,
+            name=stats["name"],
+            wins=stats["wins"],
+            games_played=stats["games_played"],
+            win_rate=stats["wins"] / stats["games_played"],
+            rating=stats.get("rating", DEFAULT_RATING),
+            )
+
+class LeaderboardPage(BaseModel):
+    players: List[LeaderboardEntry]
+    # number of ranked players
+    total: int
+
+class MatchRequest(BaseModel):
+    player_id: str = Field(max_length=MAX_ID_LENGTH)
+    name: str = Field(max_length=MAX_NAME_LENGTH)
+    # only pair with players of similar win rate
+    skill_bucketing: bool = False
+
+class MatchStatus(BaseModel):
+    player_id: str
+    # set once the player has been paired and the game dealt
+    game_id: Optional[str] = None
@@ -0,0 +1,125 @@
+from typing import Dict, Optional
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+
+try:
+    import brotli
+except ImportError:
+    # optional: pip install brotli. gzip is always available
+    brotli = None
+
+# hashed URLs never change content, so clients can keep them forever
+IMMUTABLE = "public, max-age=31536000, immutable"
+# unhashed URLs (/, /static/script.js) are revalidated with the ETag
+REVALIDATE = "no-cache"
+# generated by the server (the bare board, its hole table): fixed until it is upgraded
+DAILY = "public, max-age=86400"
+
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def hashed_name(name: str, digest: str) -> str:
+    '''
+    script.js -> script.<digest>.js
+    '''
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{digest}{ext}"
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> set:
+    encodings = set()
+    for part in (accept_encoding or "").split(","):
+        token, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        encodings.add(token.strip().lower())
+    return encodings
+
+
+class StaticAsset:
+    '''
+    One file held in memory with its compressed variants. Each variant gets
+    its own strong ETag since the bytes on the wire differ.
+    '''
+
+    def __init__(self, name: str, data: bytes):
+        self.name = name
+        self.content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if self.content_type.startswith("text/") or self.content_type == "application/javascript":
+            self.content_type += "; charset=utf-8"
+        self.digest = content_hash(data)
+        self.url = "/static/" + hashed_name(name, self.digest)
+        # encoding -> bytes. "identity" is the original
+        self.variants: Dict[str, bytes] = {"identity": data}
+        if self.content_type.startswith(COMPRESSIBLE):
+            self.compress("gzip", gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                self.compress("br", brotli.compress(data, quality=11))
+
+    def compress(self, encoding: str, data: bytes) -> None:
+        # tiny files can grow when compressed
+        if len(data) < len(self.variants["identity"]):
+            self.variants[encoding] = data
+
+    def etag(self, encoding: str) -> str:
+        if encoding == "identity":
+            return f'"{self.digest}"'
+        return f'"{self.digest}-{encoding}"'
+
+    def select(self, accept_encoding: Optional[str]) -> str:
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and encoding in accepted:
+                return encoding
+        return "identity"
+
+
+class AssetCache:
+    '''
+    Static files loaded once and served from memory. Files are addressable as
+    /static/<name> and /static/<stem>.<hash><ext>; index.html is rewritten to
+    reference the hashed URLs so browsers can cache them indefinitely.
+    '''
+
+    def __init__(self, static_dir: str):
+        self.static_dir = static_dir
+        self.assets: Dict[str, StaticAsset] = {}
+        self.loaded = False
+
+    def load(self) -> None:
+        assets = {}
+        if os.path.isdir(self.static_dir):
+            for name in sorted(os.listdir(self.static_dir)):
+                path = os.path.join(self.static_dir, name)
+                if name == "index.html" or not os.path.isfile(path):
+                    continue
+                with open(path, "rb") as f:
+                    asset = StaticAsset(name, f.read())
+                assets[name] = asset
+                assets[hashed_name(name, asset.digest)] = asset
+        index_path = os.path.join(self.static_dir, "index.html")
+        if os.path.isfile(index_path):
+            with open(index_path, "r") as f:
+                html = self.rewrite_urls(f.read(), assets)
+            assets["index.html"] = StaticAsset("index.html", html.encode())
+        self.assets = assets
+        self.loaded = True
+
+    @staticmethod
+    def rewrite_urls(html: str, assets: Dict[str, StaticAsset]) -> str:
+        def replace(match):
+            asset = assets.get(match.group(2))
+            return match.group(1) + asset.url if asset else match.group(0)
+        return re.sub(r'((?:src|href)=")/?static/([^"]+)', replace, html)
+
+    def get(self, name: str) -> Optional[StaticAsset]:
+        if not self.loaded:
+            self.load()
+        return self.assets.get(name)
@@ -0,0 +1,203 @@
+'''
+The cribbage board as SVG: 3 tracks of 120 holes plus the shared finish hole.
+
+The bare board never changes, so it is rendered once and cached. A game's
+image is the cached board with one peg per player appended, so a request
+only pays for the peg elements.
+
+Holes come in groups of 3, one per track. Points 1-35 go up the left column,
+36-45 around the top curve, 46-80 down the right column, 81-85 around the
+lower right curve and 86-120 up the middle column to the finish hole, 121.
+'''
+from functools import lru_cache
+import json
+from math import pi, sin, cos
+from typing import Iterator, List, Sequence, Tuple
+
+
+def inch_to_px(inches):
+    return int(inches * 96.0)
+
+# Constants (converted to pixels, 1" = 96px)
+BOARD_WIDTH = inch_to_px(3.5)
+BOARD_HEIGHT = inch_to_px(12)
+HOLE_DIAMETER = inch_to_px(0.125)
+HOLE_RADIUS = HOLE_DIAMETER / 2
+# space between edges of holes
+SPACE_BETWEEN_POINTS = inch_to_px(3/32)
+# space between hole centers
+HOLE_SPACING = SPACE_BETWEEN_POINTS + HOLE_DIAMETER
+# start_x and start_y are relative to the hole center at the bottom left of board
+START_X = inch_to_px(9/32) + HOLE_RADIUS
+START_Y = BOARD_HEIGHT - inch_to_px(2) - HOLE_RADIUS
+# vertical gap between centers between 5 point groups
+GROUP_VERT_GAP = inch_to_px(5/16)
+#
+GAP_BETWEEN_COLS = inch_to_px(1.25)
+# top curve. 10 points
+TOP_CENTER = (BOARD_WIDTH / 2, START_Y - inch_to_px(8))
+TOP_RADIUS = inch_to_px(1 + 15/32)
+# lower right curve. 5 points
+LOWER_CENTER = (inch_to_px(1.75 + 0.7), START_Y + inch_to_px(0.1))
+LOWER_RADIUS = inch_to_px(0.375)
+FINISH_HOLE = (BOARD_WIDTH / 2, inch_to_px(1 + 13/32))
+# pegs at score 0 wait below the first hole of their track
+START_PEG_OFFSET = inch_to_px(0.5)
+WINNING_POINT = 121
+
+# one track per color, player 1 on the first
+TRACK_COLORS = ("black", "red", "blue")
+POINT_SIZE = 14
+# the point counts printed next to the columns, bottom to top
+LABELS = '''
+START 85 80
+5 90 75
+10 95 70
+15 100 65
+20 105 60
+25 110 55
+30 115 50
+35 120 45
+'''.strip().splitlines()
+
+
+def fmt(value: float) -> str:
+    return f"{value:g}"
+
+
+def hole_group(x: float, y: float, angle_degrees: float = 0.0,
+               reverse_colors: bool = False) -> List[Tuple[float, float, str]]:
+    '''
+    The 3 holes of one point, (x, y, color).
+    angle_degrees is 0 horizontally (holes from left to right)
+    angle_degrees progresses clockwise
+    '''
+    colors = TRACK_COLORS[::-1] if reverse_colors else TRACK_COLORS
+    angle_rad = angle_degrees * 2 * pi / 360
+    step_x = HOLE_SPACING * cos(angle_rad)
+    step_y = HOLE_SPACING * sin(angle_rad)
+    return [(x + step_x * i, y + step_y * i, color) for i, color in enumerate(colors)]
+
+
+def column_rows() -> List[float]:
+    '''y of the 35 rows of the straight columns, bottom to top'''
+    rows = []
+    y_offset = START_Y
+    for group in range(7):
+        for point in range(5):
+            rows.append(y_offset)
+            y_offset -= HOLE_SPACING
+        # gap between groups of 5
+        y_offset += HOLE_SPACING
+        y_offset -= GROUP_VERT_GAP
+    return rows
+
+
+def point_groups() -> Iterator[List[Tuple[float, float, str]]]:
+    '''hole groups of points 1 to 120, in order'''
+    rows = column_rows()
+    # left column, bottom to top: 1-35
+    for y in rows:
+        yield hole_group(START_X, y)
+    # top curve, left to right: 36-45
+    center_x, center_y = TOP_CENTER
+    for angle_deg in range(15, 180, 15):
+        if angle_deg == 90:
+            continue  # skip center
+        angle_rad = angle_deg * 2 * pi / 360.
+        yield hole_group(center_x - cos(angle_rad) * TOP_RADIUS, center_y - sin(angle_rad) * TOP_RADIUS, angle_deg)
+    # right column, top to bottom: 46-80
+    for y in reversed(rows):
+        yield hole_group(START_X + 2 * GAP_BETWEEN_COLS, y, reverse_colors=True)
+    # lower right curve, right to left: 81-85
+    center_x, center_y = LOWER_CENTER
+    for angle_deg in range(30, 180, 30):
+        angle_rad = angle_deg * 2 * pi / 360.
+        yield hole_group(center_x + cos(angle_rad) * LOWER_RADIUS, center_y + sin(angle_rad) * LOWER_RADIUS,
+                         angle_deg, reverse_colors=True)
+    # middle column, bottom to top: 86-120
+    for y in rows:
+        yield hole_group(START_X + GAP_BETWEEN_COLS, y)
+
+
+@lru_cache(maxsize=None)
+def hole_table() -> Tuple[Tuple[Tuple[float, float], ...], ...]:
+    '''
+    Per track, the (x, y) of a peg at each score from 0 to 121. Computed once from
+    the geometry above; served to the web client by /board/holes.json.
+    '''
+    groups = list(point_groups())
+    tracks = []
+    for color in TRACK_COLORS:
+        start_x, start_y = next((x, y) for x, y, c in hole_group(START_X, START_Y) if c == color)
+        holes = [(start_x, start_y + START_PEG_OFFSET)]
+        holes.extend(next((x, y) for x, y, c in group if c == color) for group in groups)
+        holes.append(FINISH_HOLE)
+        tracks.append(tuple((round(x, 2), round(y, 2)) for x, y in holes))
+    return tuple(tracks)
+
+
+@lru_cache(maxsize=None)
+def holes_json() -> str:
+    return json.dumps({
+        "width": BOARD_WIDTH,
+        "height": BOARD_HEIGHT,
+        "hole_radius": HOLE_RADIUS,
+        "tracks": [{"color": color, "holes": holes} for color, holes in zip(TRACK_COLORS, hole_table())],
+        }, separators=(",", ":"))
+
+
+def peg_position(track: int, score: int) -> Tuple[float, float]:
+    '''center of the hole a peg on `track` sits in at `score`. Scores past 121 stay in the finish hole'''
+    return hole_table()[track][max(0, min(score, WINNING_POINT))]
+
+
+def circle(x: float, y: float, r: float, fill: str = "none", stroke: str = "black") -> str:
+    return f'<circle cx="{fmt(x)}" cy="{fmt(y)}" r="{fmt(r)}" fill="{fill}" stroke="{stroke}"/>'
+
+
+def label(text: str, x: float, y: float) -> str:
+    '''
+    x and y are the center position
+    '''
+    point_px = inch_to_px(POINT_SIZE / 72)
+    x -= len(text) * point_px / 2 / 2
+    y += point_px / 2
+    return f'<text x="{fmt(x)}" y="{fmt(y)}" fill="green" font-size="{POINT_SIZE}px">{text}</text>'
+
+
+@lru_cache(maxsize=None)
+def board_elements() -> str:
+    '''everything but the pegs, built on first use'''
+    elements = [f'<rect x="0" y="0" width="{BOARD_WIDTH}" height="{BOARD_HEIGHT}" fill="none" '
+                f'stroke="black" stroke-width="2"/>']
+    # grid every inch
+    y_offset = BOARD_HEIGHT
+    for i in range(1, 12):
+        y_offset -= inch_to_px(1)
+        elements.append(f'<line x1="0" y1="{y_offset}" x2="12" y2="{y_offset}" stroke="black" stroke-width="1"/>')
+    for group in point_groups():
+        elements.extend(circle(x, y, HOLE_RADIUS, stroke=color) for x, y, color in group)
+    elements.append(circle(*FINISH_HOLE, HOLE_RADIUS))
+    text_y = START_Y + inch_to_px(0.12)
+    for line in LABELS:
+        text_x = START_X + HOLE_SPACING
+        for part in line.split():
+            elements.append(label(part, text_x, text_y))
+            text_x += GAP_BETWEEN_COLS
+        text_y -= (5 * HOLE_DIAMETER + 4 * SPACE_BETWEEN_POINTS + inch_to_px(14/72))
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{BOARD_WIDTH}" height="{BOARD_HEIGHT}" '
+            f'viewBox="0 0 {BOARD_WIDTH} {BOARD_HEIGHT}">' + "".join(elements))
+
+
+def render_board(scores: Sequence[int] = ()) -> str:
+    '''the board with a peg per score, the first score on the first track'''
+    pegs = [circle(*peg_position(track, score), HOLE_RADIUS - 1, fill=TRACK_COLORS[track],
+                   stroke=TRACK_COLORS[track])
+            for track, score in enumerate(scores[:len(TRACK_COLORS)])]
+    return board_elements() + "".join(pegs) + "</svg>"
+
+
+@lru_cache(maxsize=None)
+def bare_board() -> str:
+    return render_board()
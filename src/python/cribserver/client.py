@@ -1,11 +1,15 @@
 import curses
+import os
+import random
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import json
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import threading
 import sys
 from .cards import Card
+from . import wire
 from .api_model import Player, GameState, GameListItem, PlayerState, JoinRequest, PlayRequest, DiscardRequest, GoRequest, CribbagePhase
 
 
@@ -13,6 +17,140 @@ from .api_model import Player, GameState, GameListItem, PlayerState, JoinRequest
 
 GAME_ID = "FIRST_GAME"
 
+# ask for the compact binary state, see wire.py
+STATE_HEADERS = {"Accept": wire.MEDIA_TYPE}
+
+
+def parse_state(response) -> PlayerState:
+    if response.headers.get("content-type", "").startswith(wire.MEDIA_TYPE):
+        return wire.decode_state(response.content)
+    return PlayerState(**response.json())
+
+
+# seconds. env CRIBCLIENT_CONNECT_TIMEOUT, CRIBCLIENT_READ_TIMEOUT
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10.0
+# extra attempts for GETs that fail with a connection error, timeout or 502-504
+GET_RETRIES = 3
+RETRY_BACKOFF = 0.25
+RETRY_STATUSES = (502, 503, 504)
+
+
+class ServerConnection:
+    """
+    One keep-alive requests.Session shared by the poll thread and the action
+    path, so both reuse the same pooled connections. GETs are idempotent and
+    retried with jittered exponential backoff; POSTs are sent once.
+    """
+    def __init__(self, server_url: str, connect_timeout: float = CONNECT_TIMEOUT, read_timeout: float = READ_TIMEOUT,
+                 retries: int = GET_RETRIES, backoff: float = RETRY_BACKOFF):
+        self.server_url = server_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        # poll thread + action path
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(STATE_HEADERS)
+
+    def retry_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        if response is not None and "Retry-After" in response.headers:
+            return float(response.headers["Retry-After"])
+        # full jitter, so clients that failed together don't retry together
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    def get(self, path: str, wait: float = 0, **kwargs) -> requests.Response:
+        """wait: seconds the server may hold the request (long-poll), added to the read timeout"""
+        connect_timeout, read_timeout = self.timeout
+        timeout = (connect_timeout, read_timeout + wait)
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                response = self.session.get(self.server_url + path, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if last_attempt:
+                    raise
+                time.sleep(self.retry_delay(attempt))
+                continue
+            if response.status_code not in RETRY_STATUSES or last_attempt:
+                return response
+            time.sleep(self.retry_delay(attempt, response))
+
+    def post(self, path: str, json: dict) -> requests.Response:
+        return self.session.post(self.server_url + path, json=json, timeout=self.timeout)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+# seconds the server may hold a state poll while we wait on the opponent
+LONG_POLL_WAIT = 10.0
+# when nothing can change until we act, poll every IDLE_MIN seconds, backing off to IDLE_MAX
+IDLE_MIN = 2.0
+IDLE_MAX = 15.0
+IDLE_BACKOFF = 1.5
+
+
+def waiting_on_opponent(player_state: PlayerState, player_id: str) -> bool:
+    """True if the next change to the state comes from the other player or the server."""
+    phase = player_state.phase
+    if phase == CribbagePhase.DONE:
+        return False
+    if phase == CribbagePhase.DISCARD:
+        # still holding 6 cards: our discard is due
+        return len(player_state.visible_piles.get(player_id, [])) != 6
+    if phase == CribbagePhase.COUNT:
+        return not player_state.my_turn
+    return True
+
+
+def next_poll(player_state: PlayerState, player_id: str, changed: bool, idle: float) -> Tuple[float, float, float]:
+    """
+    Plan the next state poll: returns (long-poll wait, delay before polling, new idle interval).
+    Waiting on the opponent, long-poll so their move shows up at once. Otherwise poll
+    slowly and back off further every time nothing changed.
+    """
+    if waiting_on_opponent(player_state, player_id):
+        return LONG_POLL_WAIT, 0, IDLE_MIN
+    idle = IDLE_MIN if changed else min(IDLE_MAX, idle * IDLE_BACKOFF)
+    return 0, idle, idle
+
+
+MIN_HEIGHT = 20
+MIN_WIDTH = 80
+
+
+def put(win, y: int, x: int, text: str, attr: int = 0) -> None:
+    """addstr clipped to the window. Writing the bottom right cell raises curses.error, which is harmless."""
+    height, width = win.getmaxyx()
+    if y >= height or x >= width:
+        return
+    try:
+        win.addstr(y, x, text[:width - x], attr)
+    except curses.error:
+        pass
+
+
+class Panel:
+    """
+    A curses window for one region of the screen. update() repaints it only when
+    its content changed, and only marks it for the next curses.doupdate().
+    """
+    def __init__(self, height: int, width: int, y: int, x: int):
+        self.height = height
+        self.win = curses.newwin(height, width, y, x)
+        self.content = None
+
+    def update(self, content, render) -> None:
+        if content == self.content:
+            return
+        self.content = content
+        self.win.erase()
+        render(self.win)
+        self.win.noutrefresh()
+
 
 def display_pile(card_indices):
     return ' '.join(Card.to_string(card_idx) for card_idx in card_indices)
@@ -32,9 +170,11 @@ def redraw_needed(player_state1: PlayerState, player_state2: PlayerState) -> boo
 
 
 class CribbageClient:
-    def __init__(self, stdscr, server_url: str, player_id: str, player_name: str, game_id: str):
+    def __init__(self, stdscr, server_url: str, player_id: str, player_name: str, game_id: str,
+                 connection: Optional[ServerConnection] = None):
         self.stdscr = stdscr
         self.server_url = server_url.rstrip('/')
+        self.connection = connection or ServerConnection(server_url)
         self.player_id = player_id
         self.player_name = player_name
         self.game_id = GAME_ID
@@ -53,6 +193,10 @@ class CribbageClient:
         self.message = "Joining game..."
         self.input_buffer = ""
         self.running = True
+        # ETag of the last polled state, sent as If-None-Match
+        self.state_etag: Optional[str] = None
+        # set after our own actions so the poll thread re-plans at once
+        self.poll_wakeup = threading.Event()
         self.join_game()
 
         # Set up curses
@@ -65,6 +209,7 @@ class CribbageClient:
         curses.init_pair(2, curses.COLOR_BLACK, -1)  # Clubs/Spades (black on default bg)
         curses.init_pair(3, curses.COLOR_GREEN, -1)  # Messages (green on default bg)
         self.stdscr.timeout(100)  # Non-blocking input
+        self.layout()
 
         # Start polling thread
         self.polling_thread = threading.Thread(target=self.poll_state, daemon=True)
@@ -100,12 +245,10 @@ class CribbageClient:
                 player_id=self.player_id,
                 name=self.player_name,
                 )
-            response = requests.post(
-                f"{self.server_url}/games/{self.game_id}/join",
-                json=request.dict(),
-            )
+            response = self.connection.post(f"/games/{self.game_id}/join", json=request.model_dump())
             response.raise_for_status()
-            self.set_player_state(PlayerState(**response.json()))
+            self.set_player_state(parse_state(response))
+            self.poll_wakeup.set()
             self.message = f"Joined game! Players: {len(self.player_state.players)}"
             if self.player_state.phase == CribbagePhase.DISCARD:
                 self.message += " Game started, check your hand."
@@ -117,19 +260,36 @@ class CribbageClient:
         with self.state_lock:
             self.player_state = player_state
 
+    def refresh_state(self, wait: float = 0) -> Tuple[bool, float]:
+        """
+        Fetch player state once, conditional on the last ETag.
+        Returns (changed, seconds to wait before the next request).
+        """
+        headers = {"If-None-Match": self.state_etag} if self.state_etag else {}
+        params = {"wait": wait} if wait else None
+        try:
+            response = self.connection.get(f"/games/{self.game_id}/{self.player_id}/state",
+                                           wait=wait, params=params, headers=headers)
+            if response.status_code in (429, 503):
+                return False, float(response.headers.get("Retry-After", 1))
+            if response.status_code == 304:
+                return False, 0
+            response.raise_for_status()
+            self.state_etag = response.headers.get("ETag")
+            self.set_player_state(parse_state(response))
+            return True, 0
+        except requests.RequestException as e:
+            self.message = f"Server error: {str(e)}"
+            return False, IDLE_MIN
+
     def poll_state(self):
-        """Poll server for player state."""
+        """Poll server for player state, see next_poll()."""
+        wait, idle = 0, IDLE_MIN
         while self.running:
-            try:
-                # Get game state
-                response = requests.get(f"{self.server_url}/games/{self.game_id}/{self.player_id}/state")
-                response.raise_for_status()
-                response_dict = response.json()
-                self.set_player_state(PlayerState(**response_dict))
-                json.dump(response_dict, open('x.json', 'w'))
-            except requests.RequestException as e:
-                self.message = f"Server error: {str(e)}"
-            time.sleep(5)
+            self.poll_wakeup.clear()
+            changed, retry_after = self.refresh_state(wait)
+            wait, delay, idle = next_poll(self.player_state, self.player_id, changed, idle)
+            self.poll_wakeup.wait(max(delay, retry_after))
 
     def discard_cards(self, card_idx1: int, card_idx2: int):
         """Send discard request to server."""
@@ -152,12 +312,10 @@ class CribbageClient:
                 player_id=self.player_id,
                 card_indices=[card_idx1, card_idx2],
                 )
-            response = requests.post(
-                f"{self.server_url}/games/{self.game_id}/discard",
-                json=request.dict(),
-            )
+            response = self.connection.post(f"/games/{self.game_id}/discard", json=request.model_dump())
             response.raise_for_status()
-            self.set_player_state(PlayerState(**response.json()))
+            self.set_player_state(parse_state(response))
+            self.poll_wakeup.set()
             self.message = "Cards discarded"
         except requests.RequestException as e:
             self.message = f"Error discarding: {str(e)}"
@@ -177,17 +335,18 @@ class CribbageClient:
         if card_idx not in mypile:
             self.message = "Invalid card selection"
             return
+        if card_idx not in self.player_state.legal_cards:
+            self.message = "Card exceeds 31"
+            return
         try:
             request = PlayRequest(
                 player_id=self.player_id,
                 card_idx=card_idx,
                 )
-            response = requests.post(
-                f"{self.server_url}/games/{self.game_id}/play",
-                json=request.dict(),
-            )
+            response = self.connection.post(f"/games/{self.game_id}/play", json=request.model_dump())
             response.raise_for_status()
-            self.set_player_state(PlayerState(**response.json()))
+            self.set_player_state(parse_state(response))
+            self.poll_wakeup.set()
             if self.player_state.phase == CribbagePhase.DONE:
                 self.message = f"Game over! "
                 self.message += f"Your Score: {self.get_me().score} "
@@ -197,68 +356,82 @@ class CribbageClient:
         except requests.RequestException as e:
             self.message = f"Error playing card: {str(e)}"
 
-    def draw(self):
-        """Draw the game UI."""
+    def layout(self):
+        """Split the screen into sub-windows. Called at startup and when the terminal is resized."""
         self.stdscr.clear()
+        self.stdscr.noutrefresh()
         height, width = self.stdscr.getmaxyx()
-        if height < 20 or width < 80:
-            self.stdscr.addstr(0, 0, "Terminal too small!")
-            self.stdscr.refresh()
+        self.panels = None
+        if height < MIN_HEIGHT or width < MIN_WIDTH:
+            put(self.stdscr, 0, 0, "Terminal too small!")
+            self.stdscr.noutrefresh()
             return
+        body = height - 10
+        self.panels = {
+            "header": Panel(3, width, 0, 0),
+            "table": Panel(4, width, 3, 0),
+            "hand": Panel(body, 30, 7, 0),
+            "log": Panel(body, width - 30, 7, 30),
+            "message": Panel(1, width, height - 3, 0),
+            "prompt": Panel(1, width, height - 2, 0),
+            "input": Panel(1, width, height - 1, 0),
+            }
 
-        # Header
-        self.stdscr.addstr(0, 0, f"Cribbage Game: {self.game_id}")
-        self.stdscr.addstr(1, 0, f"Player: {self.player_name} ({self.player_id})")
-
-        # Scores
-        score_str = "Scores: " + ", ".join(f"{p.name}: {p.score}" for p in self.player_state.players)
-        self.stdscr.addstr(2, 0, score_str)
-
-        # Starter card (only show after both players discard)
-        starter_pile = self.player_state.visible_piles.get("starter", [])
-        if self.player_state and len(starter_pile) == 1:
-            starter = starter_pile[0]
-            self.stdscr.addstr(4, 0, f"Starter: {display_pile(starter_pile)}")
-
-        # Played cards and running total
-        if self.player_state.phase == CribbagePhase.COUNT:
-            phase1_pile = self.player_state.visible_piles.get("phase1", [])
-            phase1_total = self.phase1_pile_total()
-            self.stdscr.addstr(5, 0, f"Played: {display_pile(phase1_pile)} (Total: {phase1_total})")
+    def draw(self):
+        """Redraw the panels whose slice of the state changed, then update the terminal once."""
+        if self.panels is None:
+            curses.doupdate()
+            return
+        state = self.player_state
+        panels = self.panels
+
+        # Header and scores
+        def draw_header(win):
+            put(win, 0, 0, f"Cribbage Game: {self.game_id}")
+            put(win, 1, 0, f"Player: {self.player_name} ({self.player_id})")
+            put(win, 2, 0, "Scores: " + ", ".join(f"{p.name}: {p.score}" for p in state.players))
+        panels["header"].update(tuple((p.name, p.score) for p in state.players), draw_header)
+
+        # Starter card (only shown after both players discard), played cards and running total
+        starter_pile = state.visible_piles.get("starter", [])
+        phase1_pile = state.visible_piles.get("phase1", []) if state.phase == CribbagePhase.COUNT else None
+        def draw_table(win):
+            if len(starter_pile) == 1:
+                put(win, 1, 0, f"Starter: {display_pile(starter_pile)}")
+            if phase1_pile is not None:
+                put(win, 2, 0, f"Played: {display_pile(phase1_pile)} (Total: {self.phase1_pile_total()})")
+        panels["table"].update((tuple(starter_pile), phase1_pile and tuple(phase1_pile)), draw_table)
 
         # Player's hand
-        me = self.get_me()
-        if me is not None:
-            my_hand = self.get_my_hand()
+        my_hand = self.get_my_hand() if self.get_me() is not None else []
+        def draw_hand(win):
             if my_hand:
-                self.stdscr.addstr(7, 0, "Your Hand:")
+                put(win, 0, 0, "Your Hand:")
                 for i, card_idx in enumerate(my_hand):
-                    self.stdscr.addstr(8 + i, 0, f"{i+1}: {Card.to_string(card_idx)}")
+                    put(win, 1 + i, 0, f"{i+1}: {Card.to_string(card_idx)}")
+        panels["hand"].update(tuple(my_hand), draw_hand)
 
-        # Input prompt (discard or play phase)
-        if self.player_state.phase == CribbagePhase.COUNT:
-            prompt = f"{'Your turn!' if self.player_state.my_turn else 'Waiting for opponent...'} Enter card to play (e.g., 'JH'), 'q' to quit: "
-            self.stdscr.addstr(height - 2, 0, prompt)
-            self.stdscr.addstr(height - 1, 0, self.input_buffer)
-        elif self.player_state.phase == CribbagePhase.DISCARD:
-            prompt = "Enter two cards to play (e.g., '3C 9H'), 'q' to quit: "
-            self.stdscr.addstr(height - 2, 0, prompt)
-            self.stdscr.addstr(height - 1, 0, self.input_buffer)
+        # Game log, most recent lines
+        log_lines = tuple(state.game_log[-panels["log"].height:])
+        def draw_log(win):
+            for i, line in enumerate(log_lines):
+                put(win, i, 0, line)
+        panels["log"].update(log_lines, draw_log)
 
-        # Messages
-        message_lines = self.message.split("\n")
-        for i, line in enumerate(message_lines[:5]):
-            self.stdscr.addstr(7 + i, 30, line[:width-31], curses.color_pair(3))
+        panels["message"].update(self.message, lambda win: put(win, 0, 0, self.message.split("\n")[0], curses.color_pair(3)))
 
-        # Game log (display up to 20 most recent lines on the right)
-        log_start_col = max(30, width - 40)  # Start at column 30 or ensure 40 chars max width
-        log_lines = self.player_state.game_log[-20:]  # Get last 20 lines
-        for i, line in enumerate(log_lines):
-            if i + 7 < height:  # Ensure we don't exceed screen height
-                truncated_line = line[:width - log_start_col - 1]  # Truncate to fit
-                self.stdscr.addstr(7 + i, log_start_col, truncated_line)
+        # Input prompt (discard or play phase)
+        if state.phase == CribbagePhase.COUNT:
+            prompt = f"{'Your turn!' if state.my_turn else 'Waiting for opponent...'} Enter card to play (e.g., 'JH'), 'q' to quit: "
+        elif state.phase == CribbagePhase.DISCARD:
+            prompt = "Enter two cards to play (e.g., '3C 9H'), 'q' to quit: "
+        else:
+            prompt = ""
+        panels["prompt"].update(prompt, lambda win: put(win, 0, 0, prompt))
+        input_text = self.input_buffer if prompt else ""
+        panels["input"].update(input_text, lambda win: put(win, 0, 0, input_text))
 
-        self.stdscr.refresh()
+        curses.doupdate()
 
     def run(self):
         """Main loop for handling input and drawing UI."""
@@ -276,14 +449,16 @@ class CribbageClient:
                 else:
                     keychar = None
                 self.needs_draw = True
-                if key == ord('q'):
+                if key == curses.KEY_RESIZE:
+                    self.layout()
+                elif key == ord('q'):
                     self.running = False
                 elif key in range(ord('0'), ord('9') + 1) or keychar in ('C', 'D', 'H', 'S', 'A', 'J', 'Q', 'K'):
                     self.input_buffer += keychar
                 elif key == ord(' '):
                     self.input_buffer += " "
                 elif key == ord('P'):
-                    self.poll_state()
+                    self.refresh_state()
                 elif key == ord('\n'):
                     if self.input_buffer.strip():
                         # Discard phase: expect two numbers
@@ -324,14 +499,21 @@ def main(stdscr):
     """Entry point for the curses client."""
     # Configuration (hardcoded for simplicity; could use argparse)
     #server_url = "http://192.168.1.100:5000"  # Replace with your server IP
-    import os
     server_url = os.environ['CRIBSERVER']
     player_id = f"player_{int(time.time())}"  # Unique ID
     player_name = os.environ.get('CRIBNAME')
     game_id = "game1"
 
-    client = CribbageClient(stdscr, server_url, player_id, player_name, game_id)
-    client.run()
+    connection = ServerConnection(
+        server_url,
+        connect_timeout=float(os.environ.get('CRIBCLIENT_CONNECT_TIMEOUT', CONNECT_TIMEOUT)),
+        read_timeout=float(os.environ.get('CRIBCLIENT_READ_TIMEOUT', READ_TIMEOUT)),
+        )
+    client = CribbageClient(stdscr, server_url, player_id, player_name, game_id, connection)
+    try:
+        client.run()
+    finally:
+        connection.close()
 
 def run_client():
     """Console entry point for running the curses client."""
@@ -72,6 +72,9 @@ import random
 import itertools
 from .cards import Card, Deck
 
+# points needed to win a match
+WINNING_SCORE = 121
+
 def score_show_phase(hand: List[int], starter: int, is_crib: bool = False, score_log: List[str] = None) -> int:
     """Score hand or crib in show phase (standard Cribbage rules) and log scoring events."""
     # traceback.print_stack()
@@ -80,10 +83,11 @@ def score_show_phase(hand: List[int], starter: int, is_crib: bool = False, score
     score = 0
     cards = hand + [starter]
 
-    # Fifteens
+    # Fifteens. card values and cards are combined in step, so each combo's values sum in C
+    values = [Card.get_value(card) for card in cards]
     for r in range(2, len(cards) + 1):
-        for combo in itertools.combinations(cards, r):
-            if sum(Card.get_value(card) for card in combo) == 15:
+        for combo_values, combo in zip(itertools.combinations(values, r), itertools.combinations(cards, r)):
+            if sum(combo_values) == 15:
                 score += 2
                 combo_cards = [cts(card) for card in combo]
                 score_log.append(f"2 points for 15 from {', '.join(combo_cards)}")
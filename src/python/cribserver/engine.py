@@ -0,0 +1,406 @@
+from fastapi import HTTPException
+from pydantic import BaseModel
+from typing import List, Dict, Optional
+import asyncio
+import json
+import logging
+import os
+import time
+from .cards import Card, Deck
+from .cribbage import score_play_phase, score_show_phase, deal_to_players, WINNING_SCORE
+from . import logconfig, rating, stats
+from .logconfig import log_event
+from .leaderboard import Leaderboard
+from .lobby import Lobby
+from .matchmaking import Matchmaker
+from .metrics import Registry, Counter, Gauge, Histogram
+from .api_model import Player, GameState, CribbagePhase, LogType
+
+game_log = logconfig.get_logger(logconfig.GAME)
+rejected_log = logconfig.get_logger(logconfig.REJECTED)
+archive_log = logconfig.get_logger(logconfig.ARCHIVE)
+
+
+class ServerConfig(BaseModel):
+    # player stats are loaded at startup and saved when a player first joins and after each game. None keeps them in memory only
+    stats_file: Optional[str] = "player_stats.json"
+    # served at / and /static
+    static_dir: str = "static"
+    # enables /admin/ endpoints. Defaults to the CRIBSERVER_ADMIN_TOKEN env variable
+    admin_token: Optional[str] = None
+    # start the queue logging listener with the app (process wide, see logconfig)
+    setup_logging: bool = True
+    # state polls per second per player, and per client address for /games/. None disables the limit
+    poll_rate: Optional[float] = 5.0
+    poll_burst: float = 10
+    # all polls from one client address, whatever player_ids it polls as (room for a NAT full of
+    # players). None disables the limit
+    address_poll_rate: Optional[float] = 200.0
+    address_poll_burst: float = 400
+    # past this many requests in flight, polls get a 503 so actions still get through
+    max_inflight: int = 64
+
+
+# DeckCreator is a hook for tests to override
+class DeckCreator:
+    def create_deck(self):
+        return Deck()
+
+
+class CribbageEngine:
+    '''
+    All state of one server instance: games, player stats, lobby index,
+    matchmaking queue and metrics, plus the game rules that act on them.
+    Methods raise HTTPException for invalid actions.
+    '''
+
+    def __init__(self, config: Optional[ServerConfig] = None, deck_creator: Optional[DeckCreator] = None):
+        self.config = config or ServerConfig()
+        self.deck_creator = deck_creator or DeckCreator()
+        # In-memory game state
+        self.games: Dict[str, GameState] = {}
+        # player_id -> running stats, see stats.py
+        self.player_stats: Dict[str, Dict] = {}
+        # ranked players, updated as games finish
+        self.leaderboard = Leaderboard()
+        # monotonic seconds, for move timing. Tests replace it
+        self.clock = time.monotonic
+        # index of games by phase and open seats, for /games/
+        self.lobby = Lobby()
+        # players waiting to be paired by /matchmaking/
+        self.matchmaker = Matchmaker()
+        # game_id -> event set on the game's next change, for long-polling state requests
+        self.change_events: Dict[str, asyncio.Event] = {}
+
+        # metrics for /metrics
+        self.registry = Registry()
+        self.request_seconds = self.registry.add(Histogram("cribserver_request_duration_seconds", "Request latency by route"))
+        self.registry.add(Gauge("cribserver_games", "Resident games by phase",
+            lambda: {(("phase", phase.name),): count for phase, count in self.lobby.count_by_phase().items()}))
+        self.scoring_seconds = self.registry.add(Histogram("cribserver_scoring_seconds", "Time spent in score_play_phase/score_show_phase"))
+        self.save_stats_seconds = self.registry.add(Histogram("cribserver_save_stats_seconds", "save_stats duration"))
+        self.save_stats_bytes = self.registry.add(Counter("cribserver_save_stats_bytes_total", "Bytes written by save_stats"))
+        self.state_polls = self.registry.add(Counter("cribserver_state_polls_total", "State endpoint requests"))
+        self.state_changes = self.registry.add(Counter("cribserver_state_poll_changes_total", "State polls that returned a changed state"))
+        self.rejected_requests = self.registry.add(Counter("cribserver_rejected_requests_total", "Polls turned away by rate limiting or load shedding"))
+        self.registry.add(Gauge("cribserver_state_poll_change_ratio", "Fraction of state polls that saw a change",
+            lambda: {(): self.state_changes.get() / self.state_polls.get()} if self.state_polls.get() else {}))
+
+    # Load/save stats
+    def load_stats(self):
+        stats_file = self.config.stats_file
+        if stats_file and os.path.exists(stats_file):
+            with open(stats_file, "r") as f:
+                # update in place: callers may hold a reference to player_stats
+                self.player_stats.clear()
+                self.player_stats.update(json.load(f))
+        self.leaderboard.load(self.player_stats)
+
+    def save_stats(self):
+        if not self.config.stats_file:
+            return
+        with self.save_stats_seconds.time():
+            data = json.dumps(self.player_stats, indent=2)
+            with open(self.config.stats_file, "w") as f:
+                f.write(data)
+        self.save_stats_bytes.inc(len(data))
+
+    def changed(self, game: GameState) -> None:
+        """Bump the game version and wake any long-polls waiting on it."""
+        game.version += 1
+        event = self.change_events.pop(game.game_id, None)
+        if event is not None:
+            event.set()
+
+    async def wait_for_change(self, game: GameState, version: int, timeout: float) -> None:
+        """Return once game.version differs from version, or after timeout seconds."""
+        if game.version != version:
+            return
+        event = self.change_events.get(game.game_id)
+        if event is None:
+            event = self.change_events[game.game_id] = asyncio.Event()
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def stats_for(self, player: Player) -> Dict:
+        if player.player_id not in self.player_stats:
+            self.player_stats[player.player_id] = stats.new_stats(player.name)
+        return self.player_stats[player.player_id]
+
+    def get_game(self, game_id: str) -> GameState:
+        if game_id not in self.games:
+            raise HTTPException(status_code=404, detail="Game not found")
+        return self.games[game_id]
+
+    def get_player(self, game: GameState, player_id: str) -> Player:
+        player = next((p for p in game.players if p.player_id == player_id), None)
+        if not player:
+            raise HTTPException(status_code=404, detail="Player not found")
+        return player
+
+    def start_hand(self, game: GameState) -> None:
+        """Deal 6 cards to each player. The first player to join deals first, then the deal alternates."""
+        deck = game.deck
+        if game.dealer is None:
+            dealer, pone = game.players
+        else:
+            self.archive_hand(game)
+            game.end_hand()
+            pone = self.get_player(game, game.dealer)
+            dealer = next(p for p in game.players if p is not pone)
+        # initialize game and deck
+        game.change_phase(CribbagePhase.DEAL)
+        deal_to_players(deck, dealer.player_id, pone.player_id)
+        # record
+        for i in range(0, 6):
+            for player in (dealer, pone):
+                game.log_action(LogType.DEAL, player.player_id, Card.to_string(deck.get_cards(player.player_id)[i]))
+        # set state
+        game.dealer = dealer.player_id
+        game.current_turn = pone.player_id  # Non-dealer starts discard phase
+        game.turn_started = self.clock()
+        game.change_phase(CribbagePhase.DISCARD)
+        log_event(game_log, logging.INFO, "hand dealt", game_id=game.game_id, hand=game.hand_number, dealer=game.dealer)
+
+    def add_player(self, game_id: str, player_id: str, name: str, match: bool = False) -> GameState:
+        """Add a player to a game, creating it if needed, and deal cards when full."""
+        if game_id not in self.games:
+            self.games[game_id] = GameState(
+                game_id=game_id,
+                players=[],
+                deck=self.deck_creator.create_deck(),
+                dealer=None,
+                current_turn=None,
+                phase=CribbagePhase.JOIN,
+                on_phase_change=self.lobby.update,
+                target_score=WINNING_SCORE if match else None,
+            )
+
+        game = self.games[game_id]
+        if len(game.players) >= 2:
+            raise HTTPException(status_code=400, detail="Game full (2 players max)")
+        if any(p.player_id == player_id for p in game.players):
+            raise HTTPException(status_code=400, detail="Player already in game")
+        game.players.append(Player(player_id=player_id, name=name))
+        game.game_log.append((LogType.PUBLIC, f"Player {name} joined game"))
+        game.log_action(LogType.JOIN, player_id, game_id)
+        self.lobby.update(game)
+        log_event(game_log, logging.INFO, "player joined", game_id=game_id, player_id=player_id)
+
+
+        # Deal 6 cards to each player when 2 players join
+        if len(game.players) == 2:
+            self.start_hand(game)
+
+        # games_played is counted when the game finishes
+        if player_id not in self.player_stats:
+            self.player_stats[player_id] = stats.new_stats(name)
+            self.save_stats()
+        self.changed(game)
+        return game
+
+    def discard(self, game: GameState, player_id: str, card_indices: List[int]) -> None:
+        """Move 2 cards from the player's hand to the crib. Flips the starter once both players discarded."""
+        deck = game.deck
+        if game.phase != CribbagePhase.DISCARD:
+            raise HTTPException(status_code=400, detail="Can only discard in DISCARD phase")
+
+        player = self.get_player(game, player_id)
+        if len(card_indices) != 2:
+            raise HTTPException(status_code=400, detail="Must discard exactly 2 cards")
+        if any(card not in deck.get_cards(player.player_id) for card in card_indices):
+            log_event(rejected_log, logging.INFO, "discard rejected", game_id=game.game_id, player_id=player_id,
+                      reason="not in hand", cards=card_indices, hand=list(deck.piles[player_id]))
+            raise HTTPException(status_code=400, detail="Cards not in hand")
+
+        # both players discard from the deal, so both are timed from it
+        stats.add(self.stats_for(player), stats.MOVE_SECONDS, self.clock() - game.turn_started)
+        # Move cards to crib
+        for card_idx in card_indices:
+            deck.play_card(card_idx, player.player_id, "crib")
+        game.log_action(LogType.DISCARD, player.player_id, ' '.join([Card.to_string(card_idx) for card_idx in card_indices]))
+        game.game_log.append((LogType.PUBLIC, f"Player {player.name} discarded 2 cards"))
+        self.changed(game)
+
+        # Check if both players have discarded
+        if len(deck.get_cards("crib")) == 4:
+            # flip starter card
+            game.change_phase(CribbagePhase.FLIP_STARTER)
+            deck.deal_to_pile("starter")
+            game.log_action(LogType.DEAL, "starter", Card.to_string(deck.get_cards("starter")[0]))
+            # Non-dealer (player 1) starts play phase
+            game.current_turn = next(p.player_id for p in game.players if p.player_id != game.dealer)
+            game.update_legal_cards()
+            game.turn_started = self.clock()
+            game.change_phase(CribbagePhase.COUNT)
+
+    def play(self, game: GameState, player_id: str, card_idx: int) -> None:
+        """Play a card in the count phase, scoring pegging points, Go and, after the last card, the show."""
+        deck = game.deck
+        if game.phase != CribbagePhase.COUNT:
+            self.reject_play(game, player_id, card_idx, "wrong phase")
+            raise HTTPException(status_code=400, detail="In show phase, cannot play cards")
+        if player_id != game.current_turn:
+            self.reject_play(game, player_id, card_idx, "not your turn")
+            raise HTTPException(status_code=400, detail="Not your turn")
+
+        player = self.get_player(game, player_id)
+
+        if card_idx not in deck.get_cards(player_id):
+            self.reject_play(game, player_id, card_idx, "not in hand")
+            raise HTTPException(status_code=400, detail=f"Card {card_idx} not in hand")
+        if game.phase1_total() + Card.get_value(card_idx) > 31:
+            self.reject_play(game, player_id, card_idx, "exceeds 31")
+            raise HTTPException(status_code=400, detail="Card exceeds 31")
+
+        now = self.clock()
+        stats.add(self.stats_for(player), stats.MOVE_SECONDS, now - game.turn_started)
+        game.turn_started = now
+        # Play card
+        deck.play_card(card_idx, player_id, "phase1")
+        game.phase1_count += Card.get_value(card_idx)
+        game.update_legal_cards()
+        game.game_log.append((LogType.PUBLIC, f"Player {player.name} played {Card.to_string(card_idx)}"))
+        game.log_action(LogType.PLAY, player.player_id, Card.to_string(card_idx))
+        game.played_cards.append((player_id, card_idx))  # store for SHOW phase
+        self.changed(game)
+        with self.scoring_seconds.time(phase="play"):
+            player.score += score_play_phase(deck.get_cards("phase1"), score_log=game.append_log(player))
+        if self.check_winner(game, player):
+            return
+
+        # Check for Go
+        next_player = game.players[(game.players.index(player) + 1) % 2]
+        next_valid = bool(game.legal_cards[next_player.player_id])
+        cur_valid = bool(game.legal_cards[player.player_id])
+        if next_valid:
+            game.current_turn = next_player.player_id
+        else:
+            # opponent doesn't have any cards < 31. keep playing with the current player
+            if cur_valid:
+                # current player has more cards < 31. Let him continue playing
+                game.current_turn = player.player_id
+            else:
+                # current player doesn't have cards < 31 either. finish this round. Next player starts
+                if game.phase1_total() != 31:
+                    # Go point. Don't double count if 31
+                    player.score += 1
+                    game.game_log.append((LogType.PUBLIC, f"{player.name} 1 point for Go"))
+                    if self.check_winner(game, player):
+                        return
+                # next player starts the new count, unless only the current player has cards left
+                if deck.get_cards(player.player_id) and not deck.get_cards(next_player.player_id):
+                    game.current_turn = player.player_id
+                else:
+                    game.current_turn = next_player.player_id
+                deck.drain_pile("phase1")
+                game.phase1_count = 0
+                game.update_legal_cards()
+
+
+        # Advance turn or move to show phase
+        if not any(deck.get_cards(p.player_id) for p in game.players):
+            game.change_phase(CribbagePhase.SHOW)
+            for p in game.players:
+                stats.add(self.stats_for(p), stats.PEGGING_POINTS, p.score - game.hand_start_scores.get(p.player_id, 0))
+            # Score show phase. non-dealer counts first
+            for p in sorted(game.players, key=lambda p: p.player_id == game.dealer):
+            # move cards back into player's hands and score
+                hand = []
+                for played_by, played_idx in game.played_cards:
+                    if p.player_id == played_by:
+                        hand.append(played_idx)
+                with self.scoring_seconds.time(phase="show"):
+                    points = score_show_phase(hand, deck.get_cards("starter")[0], is_crib=False, score_log=game.append_log(p))
+                p.score += points
+                stats.add_hand(self.stats_for(p), points)
+                if self.check_winner(game, p):
+                    return
+            # move to CRIB phase
+            game.change_phase(CribbagePhase.CRIB)
+            if game.dealer:
+                dealer = next(p for p in game.players if p.player_id == game.dealer)
+                with self.scoring_seconds.time(phase="crib"):
+                    points = score_show_phase(deck.get_cards("crib"), deck.get_cards("starter")[0], is_crib=True, score_log=game.append_log(dealer))
+                dealer.score += points
+                stats.add_hand(self.stats_for(dealer), points, is_crib=True)
+                if self.check_winner(game, dealer):
+                    return
+            if game.target_score is None:
+                # single hand: highest score wins
+                self.finish_game(game, max(game.players, key=lambda p: p.score))
+            else:
+                self.start_hand(game)
+
+    def go(self, game: GameState, player_id: str) -> None:
+        """
+        Say Go. The server already passes the turn and awards the Go point as soon as
+        a player can't play, so saying Go with no playable card is accepted and changes
+        nothing. With a playable card it is rejected.
+        """
+        if game.phase != CribbagePhase.COUNT:
+            raise HTTPException(status_code=400, detail="Can only say Go in COUNT phase")
+        self.get_player(game, player_id)
+        if not game.legal_cards.get(player_id):
+            return
+        if player_id != game.current_turn:
+            raise HTTPException(status_code=400, detail="Not your turn")
+        raise HTTPException(status_code=400, detail="You have a playable card")
+
+    def reject_play(self, game: GameState, player_id: str, card_idx: int, reason: str) -> None:
+        log_event(rejected_log, logging.INFO, "play rejected", game_id=game.game_id, player_id=player_id,
+                  reason=reason, card=card_idx, phase=game.phase.name)
+
+    def check_winner(self, game: GameState, player: Player) -> bool:
+        """In match play, end the game as soon as a player reaches the target score."""
+        if game.target_score is None or player.score < game.target_score:
+            return False
+        self.finish_game(game, player)
+        return True
+
+    def finish_game(self, game: GameState, winner: Player) -> None:
+        for player in game.players:
+            game.game_log.append((LogType.PUBLIC, f"Player {player.name} score: {player.score}"))
+        game.game_log.append((LogType.PUBLIC, f"Player {winner.name} wins"))
+        for player in game.players:
+            entry = self.stats_for(player)
+            entry["games_played"] += 1
+            opponent = next((p for p in game.players if p is not player), player)
+            stats.add(entry, stats.MARGIN, player.score - opponent.score)
+        self.stats_for(winner)["wins"] += 1
+        loser = next((p for p in game.players if p is not winner), None)
+        if loser is not None:
+            rating.update(self.stats_for(winner), self.stats_for(loser))
+        for player in game.players:
+            self.leaderboard.update(player.player_id, self.player_stats[player.player_id])
+        self.save_stats()
+        # Reset game
+        game.change_phase(CribbagePhase.DONE)
+        log_event(game_log, logging.INFO, "game finished", game_id=game.game_id, winner=winner.player_id,
+                  scores={p.player_id: p.score for p in game.players})
+        self.archive_hand(game, winner)
+
+    def archive_hand(self, game: GameState, winner: Optional[Player] = None) -> None:
+        """
+        Write the hand's action and public logs to the archive, if archiving is enabled.
+        Match play writes one record per hand. The last record has the winner.
+        """
+        if not archive_log.isEnabledFor(logging.INFO):
+            return
+        log_event(archive_log, logging.INFO, "hand", **self.hand_record(game, winner))
+
+    @staticmethod
+    def hand_record(game: GameState, winner: Optional[Player] = None) -> Dict:
+        """The archive record of the current hand. replay.py reads these back."""
+        return dict(
+            game_id=game.game_id,
+            hand=game.hand_number,
+            players=[p.model_dump() for p in game.players],
+            dealer=game.dealer,
+            target_score=game.target_score,
+            actions=[line for typ, line in game.game_log if typ == LogType.PRIVATE],
+            public_log=[line for typ, line in game.game_log if typ == LogType.PUBLIC],
+            winner=winner.player_id if winner else None,
+            )
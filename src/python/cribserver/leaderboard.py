@@ -0,0 +1,66 @@
+from typing import Dict, List, Optional, Tuple
+from sortedcontainers import SortedList
+from .matchmaking import MIN_RATED_GAMES
+from .rating import DEFAULT_RATING
+
+
+def ranking_key(stats: Dict) -> Optional[Tuple[float, ...]]:
+    '''
+    (rating, win rate, wins), higher is better. None until the player has
+    MIN_RATED_GAMES finished games, like matchmaking's skill buckets.
+    '''
+    games = stats.get("games_played", 0)
+    if games < MIN_RATED_GAMES:
+        return None
+    return (stats.get("rating", DEFAULT_RATING), stats["wins"] / games, stats["wins"])
+
+
+class Leaderboard:
+    '''
+    Ranked players in a SortedList of (negated key, player_id), best first.
+    A game finishing moves its two players (O(log n) each); the top N is a
+    slice and a player's rank a bisect, so neither depends on how many
+    players there are.
+    '''
+
+    def __init__(self):
+        self.entries = SortedList()
+        # player_id -> their entry in self.entries
+        self.positions: Dict[str, tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.positions.clear()
+
+    def load(self, player_stats: Dict[str, Dict]) -> None:
+        self.clear()
+        for player_id, stats in player_stats.items():
+            self.update(player_id, stats)
+
+    def update(self, player_id: str, stats: Dict) -> None:
+        self.remove(player_id)
+        key = ranking_key(stats)
+        if key is None:
+            return
+        entry = (tuple(-k for k in key), player_id)
+        self.entries.add(entry)
+        self.positions[player_id] = entry
+
+    def remove(self, player_id: str) -> None:
+        entry = self.positions.pop(player_id, None)
+        if entry is not None:
+            self.entries.remove(entry)
+
+    def top(self, limit: int) -> List[str]:
+        '''player_ids of the best `limit` players, best first'''
+        return [player_id for _, player_id in self.entries[:limit]]
+
+    def rank(self, player_id: str) -> Optional[int]:
+        '''1 for the best player, None if not ranked'''
+        entry = self.positions.get(player_id)
+        if entry is None:
+            return None
+        return self.entries.index(entry) + 1
@@ -0,0 +1,180 @@
+'''
+Load generator: pairs of bots play complete games against a running server
+through the HTTP API, then report games/min, per-endpoint latency
+percentiles and error rates.
+
+    cribserver &
+    cribload --players 200 --duration 60
+
+The bots discard their first two cards and play their first legal card.
+All bots poll from one address, so past a few hundred polls a second the
+server's per-address poll limit (ServerConfig.address_poll_rate) shows up
+as 429s.
+needs httpx: pip install cribserver[async]
+'''
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from .aioclient import AsyncCribbageClient, CribbageError
+from .api_model import CribbagePhase, PlayerState
+
+# seconds a bot's state request may wait on the server for the opponent
+POLL_WAIT = 10.0
+# give up on a game that takes longer than this
+GAME_TIMEOUT = 120.0
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    '''nearest rank'''
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    '''
+    latency samples and errors per endpoint
+    '''
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+        self.games = 0
+        self.failed_games = 0
+
+    async def call(self, endpoint: str, coro):
+        start = time.perf_counter()
+        try:
+            return await coro
+        except CribbageError as e:
+            self.error(endpoint, str(e.status_code))
+            raise
+        except Exception as e:
+            self.error(endpoint, type(e).__name__)
+            raise
+        finally:
+            self.latencies.setdefault(endpoint, []).append(time.perf_counter() - start)
+
+    def error(self, endpoint: str, kind: str) -> None:
+        errors = self.errors.setdefault(endpoint, {})
+        errors[kind] = errors.get(kind, 0) + 1
+
+    def report(self, elapsed: float) -> Dict:
+        endpoints = {}
+        for endpoint, samples in sorted(self.latencies.items()):
+            samples = sorted(samples)
+            errors = self.errors.get(endpoint, {})
+            endpoints[endpoint] = {
+                "requests": len(samples),
+                "error_rate": sum(errors.values()) / len(samples),
+                "errors": errors,
+                "p50_ms": percentile(samples, 50) * 1000,
+                "p95_ms": percentile(samples, 95) * 1000,
+                "p99_ms": percentile(samples, 99) * 1000,
+                }
+        return {
+            "seconds": elapsed,
+            "games": self.games,
+            "failed_games": self.failed_games,
+            "games_per_min": self.games * 60 / elapsed if elapsed else 0.0,
+            "endpoints": endpoints,
+            }
+
+
+async def play_bot(client: AsyncCribbageClient, recorder: Recorder, game_id: str, player_id: str) -> None:
+    '''join game_id and play until it is DONE'''
+    state = await recorder.call("join", client.join(game_id, player_id, player_id))
+    while state.phase != CribbagePhase.DONE:
+        try:
+            state = await move(client, recorder, game_id, player_id, state)
+        except CribbageError as e:
+            if e.status_code not in (429, 503):
+                raise
+            await asyncio.sleep(1)
+            state = await recorder.call("state", client.state(game_id, player_id))
+    client.last_state.pop((game_id, player_id), None)
+
+
+async def move(client: AsyncCribbageClient, recorder: Recorder, game_id: str, player_id: str,
+               state: PlayerState) -> PlayerState:
+    hand = state.visible_piles.get(player_id, [])
+    if state.phase == CribbagePhase.DISCARD and len(hand) == 6:
+        return await recorder.call("discard", client.discard(game_id, player_id, hand[:2]))
+    if state.phase == CribbagePhase.COUNT and state.my_turn and state.legal_cards:
+        return await recorder.call("play", client.play(game_id, player_id, state.legal_cards[0]))
+    # the opponent is to move
+    return await recorder.call("state", client.state(game_id, player_id, wait=POLL_WAIT))
+
+
+async def play_pair(client: AsyncCribbageClient, recorder: Recorder, prefix: str, pair: int,
+                    deadline: float, games: int) -> None:
+    played = 0
+    while time.monotonic() < deadline and (not games or played < games):
+        game_id = f"{prefix}-{pair}-{played}"
+        bots = [asyncio.ensure_future(play_bot(client, recorder, game_id, f"{prefix}-{pair}-{seat}"))
+                for seat in ("a", "b")]
+        try:
+            await asyncio.wait_for(asyncio.gather(*bots), GAME_TIMEOUT)
+            recorder.games += 1
+        except Exception:
+            # failed requests are already counted; a bot left without an opponent would wait forever
+            recorder.failed_games += 1
+        finally:
+            for bot in bots:
+                bot.cancel()
+        played += 1
+
+
+async def run_load(client: AsyncCribbageClient, players: int, duration: float, games: int = 0) -> Dict:
+    '''
+    players/2 pairs each play games back to back until `duration` seconds
+    have passed, or `games` games per pair if set.
+    '''
+    recorder = Recorder()
+    prefix = f"load-{uuid.uuid4().hex[:8]}"
+    start = time.monotonic()
+    deadline = start + duration
+    await asyncio.gather(*(play_pair(client, recorder, prefix, pair, deadline, games)
+                           for pair in range(players // 2)))
+    return recorder.report(time.monotonic() - start)
+
+
+def format_report(report: Dict) -> str:
+    lines = [
+        f"{report['games']} games in {report['seconds']:.1f}s: {report['games_per_min']:.1f} games/min"
+        f" ({report['failed_games']} failed)",
+        f"{'endpoint':10s} {'requests':>9s} {'errors':>7s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s}",
+        ]
+    for endpoint, stats in report["endpoints"].items():
+        lines.append(f"{endpoint:10s} {stats['requests']:9d} {stats['error_rate']:7.2%} "
+                     f"{stats['p50_ms']:8.2f} {stats['p95_ms']:8.2f} {stats['p99_ms']:8.2f}")
+    return "\n".join(lines)
+
+
+async def main(args: argparse.Namespace) -> Dict:
+    async with AsyncCribbageClient(args.server, binary=not args.json_wire,
+                                   max_connections=args.players + 10) as client:
+        return await run_load(client, args.players, args.duration, args.games)
+
+
+def run_loadgen(argv: Optional[List[str]] = None):
+    """Console entry point for the load generator."""
+    parser = argparse.ArgumentParser(description="Play bot games against a cribserver and report throughput.")
+    parser.add_argument("--server", default="http://localhost:5000")
+    parser.add_argument("--players", type=int, default=20, help="number of bots, two per game")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to keep starting games")
+    parser.add_argument("--games", type=int, default=0, help="stop each pair after this many games")
+    parser.add_argument("--json-wire", action="store_true", help="use JSON instead of the binary wire format")
+    parser.add_argument("--report-json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+    if args.players < 2:
+        parser.error("--players must be at least 2")
+    report = asyncio.run(main(args))
+    print(json.dumps(report, indent=2) if args.report_json else format_report(report))
+
+
+if __name__ == "__main__":
+    run_loadgen()
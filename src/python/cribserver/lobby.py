@@ -0,0 +1,89 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+import heapq
+import itertools
+from sortedcontainers import SortedDict
+from .api_model import CribbagePhase, GameListItem
+
+MAX_PLAYERS = 2
+
+
+def entries_after(bucket: SortedDict, cursor: int) -> Iterator[Tuple[int, str]]:
+    '''(seq, game_id) of a bucket, in order, from the first seq after cursor'''
+    for seq in bucket.irange(minimum=cursor + 1):
+        yield seq, bucket[seq]
+
+
+class Lobby:
+    '''
+    Index of resident games, bucketed by (phase, open seats).
+
+    Games are re-indexed whenever they change (join, change_phase), so listing
+    never has to look at every game. Each bucket is a SortedDict of sequence
+    number -> game_id. A game gets a new sequence number each time it enters a
+    bucket, and the sequence number of the last item returned works as a
+    pagination cursor: the next page starts with a bisect into each bucket.
+    '''
+
+    def __init__(self):
+        self.buckets: Dict[Tuple[CribbagePhase, int], SortedDict] = {}
+        self.items: Dict[str, GameListItem] = {}
+        # game_id -> (bucket key, sequence number)
+        self.keys: Dict[str, Tuple[Tuple[CribbagePhase, int], int]] = {}
+        self.sequence = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def clear(self) -> None:
+        self.buckets.clear()
+        self.items.clear()
+        self.keys.clear()
+
+    def update(self, game) -> None:
+        '''
+        (re)index a game after its phase or players changed
+        '''
+        key = (game.phase, MAX_PLAYERS - len(game.players))
+        self.items[game.game_id] = GameListItem.from_game_state(game)
+        old = self.keys.get(game.game_id)
+        if old is not None:
+            old_key, old_seq = old
+            if old_key == key:
+                return
+            del self.buckets[old_key][old_seq]
+        seq = next(self.sequence)
+        if key not in self.buckets:
+            self.buckets[key] = SortedDict()
+        self.buckets[key][seq] = game.game_id
+        self.keys[game.game_id] = (key, seq)
+
+    def remove(self, game_id: str) -> None:
+        old = self.keys.pop(game_id, None)
+        if old is not None:
+            key, seq = old
+            del self.buckets[key][seq]
+            del self.items[game_id]
+
+    def count_by_phase(self) -> Dict[CribbagePhase, int]:
+        counts = {}
+        for (phase, _), bucket in self.buckets.items():
+            counts[phase] = counts.get(phase, 0) + len(bucket)
+        return counts
+
+    def list_games(self, phase: Optional[CribbagePhase] = None, open_only: bool = False,
+                   cursor: int = 0, limit: int = 50) -> Tuple[List[GameListItem], Optional[int]]:
+        '''
+        returns (items, next_cursor). next_cursor is None on the last page.
+        Only the buckets matching the filters are visited, each from the cursor
+        on, so any page costs O(limit log n) however many games are resident.
+        '''
+        streams = []
+        for (bucket_phase, open_seats), bucket in self.buckets.items():
+            if phase is not None and bucket_phase != phase:
+                continue
+            if open_only and open_seats == 0:
+                continue
+            streams.append(entries_after(bucket, cursor))
+        page = list(itertools.islice(heapq.merge(*streams), limit + 1))
+        next_cursor = page[limit - 1][0] if len(page) > limit else None
+        return [self.items[game_id] for _, game_id in page[:limit]], next_cursor
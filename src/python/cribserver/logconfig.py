@@ -0,0 +1,160 @@
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+import json
+import logging
+import os
+import queue
+
+ROOT = "cribserver"
+# joins, hands dealt, games finished
+GAME = "cribserver.game"
+# plays and discards rejected with a 4xx. hot path, sampled
+REJECTED = "cribserver.rejected"
+# one JSON record per finished hand, see CribbageEngine.archive_hand() in engine.py
+ARCHIVE = "cribserver.archive"
+
+# env: comma separated category=LEVEL, e.g. "rejected=DEBUG,game=WARNING"
+LEVELS_ENV = "CRIBSERVER_LOG_LEVELS"
+# env: path of the archive file (JSON lines). archiving is off when unset
+ARCHIVE_ENV = "CRIBSERVER_ARCHIVE"
+# env: keep 1 of every N rejected actions
+SAMPLE_ENV = "CRIBSERVER_LOG_SAMPLE"
+
+DEFAULT_LEVELS = {GAME: "INFO", REJECTED: "INFO", ARCHIVE: "CRITICAL"}
+
+
+def get_logger(category: str) -> logging.Logger:
+    return logging.getLogger(category)
+
+
+def log_event(logger: logging.Logger, level: int, event: str, **fields) -> None:
+    '''
+    log an event with structured fields. Cheap when the level is disabled.
+    '''
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={"fields": fields})
+
+
+class StructuredFormatter(logging.Formatter):
+    '''
+    one JSON object per line: time, level, category, event and the event fields
+    '''
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "category": record.name,
+            "event": record.getMessage(),
+            }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    '''
+    pass 1 of every `every` records. The kept record is tagged with the rate.
+    '''
+    def __init__(self, every: int):
+        super().__init__()
+        self.every = max(1, every)
+        self.count = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        self.count += 1
+        if (self.count - 1) % self.every:
+            return False
+        if self.every > 1:
+            record.fields = dict(getattr(record, "fields", {}), sampled=self.every)
+        return True
+
+
+class ArchiveFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(getattr(record, "fields", {}), default=str)
+
+
+class CategoryFilter(logging.Filter):
+    '''
+    pass records of one category, or with exclude=True everything else
+    '''
+    def __init__(self, category: str, exclude: bool = False):
+        super().__init__()
+        self.category = category
+        self.exclude = exclude
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return (record.name == self.category) != self.exclude
+
+
+_listener: Optional[QueueListener] = None
+
+
+def parse_levels(spec: Optional[str]) -> Dict[str, str]:
+    '''
+    "rejected=DEBUG,game=WARNING" -> {"cribserver.rejected": "DEBUG", "cribserver.game": "WARNING"}
+    '''
+    levels = {}
+    for part in (spec or "").split(","):
+        if "=" not in part:
+            continue
+        category, level = part.split("=", 1)
+        category = category.strip()
+        if not category.startswith(ROOT):
+            category = f"{ROOT}.{category}"
+        levels[category] = level.strip().upper()
+    return levels
+
+
+def setup_logging(levels: Optional[Dict[str, str]] = None, archive_path: Optional[str] = None,
+                  sample_every: Optional[int] = None) -> None:
+    '''
+    Route all cribserver loggers through a queue, so request handlers never block on
+    stderr or disk. A background QueueListener thread formats and writes the records.
+    Arguments default to the CRIBSERVER_* environment variables.
+    '''
+    global _listener
+    stop_logging()
+    if levels is None:
+        levels = parse_levels(os.environ.get(LEVELS_ENV))
+    if archive_path is None:
+        archive_path = os.environ.get(ARCHIVE_ENV)
+    if sample_every is None:
+        sample_every = int(os.environ.get(SAMPLE_ENV, "10"))
+
+    effective = dict(DEFAULT_LEVELS)
+    if archive_path:
+        effective[ARCHIVE] = "INFO"
+    effective.update(levels)
+    for category, level in effective.items():
+        logging.getLogger(category).setLevel(level)
+
+    records = queue.SimpleQueue()
+    root = logging.getLogger(ROOT)
+    root.handlers = [QueueHandler(records)]
+    root.propagate = False
+    rejected = logging.getLogger(REJECTED)
+    rejected.filters = [SamplingFilter(sample_every)]
+
+    console = logging.StreamHandler()
+    console.setFormatter(StructuredFormatter())
+    console.addFilter(CategoryFilter(ARCHIVE, exclude=True))
+    handlers = [console]
+    if archive_path:
+        archive = logging.FileHandler(archive_path)
+        archive.setFormatter(ArchiveFormatter())
+        archive.addFilter(CategoryFilter(ARCHIVE))
+        handlers.append(archive)
+    _listener = QueueListener(records, *handlers)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    '''
+    flush the queue and stop the background thread
+    '''
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
@@ -0,0 +1,127 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+import asyncio
+import time
+from .rating import BUCKET_WIDTH, DEFAULT_RATING
+
+# bucket used when the player doesn't ask for skill bucketing
+ANY_BUCKET = "any"
+# players need this many finished games before their win rate is trusted
+MIN_RATED_GAMES = 5
+# a waiting player that hasn't polled (or re-enqueued) for this many seconds is
+# assumed gone. Longer than the longest long-poll, so a player between polls stays
+TICKET_TIMEOUT = 90.0
+
+
+def skill_bucket(stats: Optional[Dict]) -> Hashable:
+    '''
+    map player_stats to a bucket: "new" until MIN_RATED_GAMES, then a BUCKET_WIDTH
+    wide rating band. Entries from before ratings use their win rate quartile.
+    '''
+    if not stats or stats.get("games_played", 0) < MIN_RATED_GAMES:
+        return "new"
+    if "rating" not in stats:
+        win_rate = stats["wins"] / stats["games_played"]
+        return "win_rate", min(int(win_rate * 4), 3)
+    return int((stats["rating"] - DEFAULT_RATING) // BUCKET_WIDTH)
+
+
+class Ticket:
+    '''
+    a player waiting in (or matched by) the matchmaking queue
+    '''
+    def __init__(self, player_id: str, name: str, bucket: Hashable, now: float):
+        self.player_id = player_id
+        self.name = name
+        self.bucket = bucket
+        self.game_id: Optional[str] = None
+        self.matched = asyncio.Event()
+        # when the player last enqueued or polled, and how many long-polls are open
+        self.last_poll = now
+        self.waiting = 0
+
+    def stale(self, now: float, timeout: float) -> bool:
+        return not self.waiting and now - self.last_poll > timeout
+
+    def assign(self, game_id: str) -> None:
+        self.game_id = game_id
+        self.matched.set()
+
+
+class Matchmaker:
+    '''
+    FIFO queues of waiting players, one per bucket.
+    Each queue is an OrderedDict so enqueue, pairing (popitem) and cancel are all O(1).
+    Players that stopped polling are dropped from the head of the queue when
+    someone would be paired with them.
+    '''
+
+    def __init__(self, ticket_timeout: float = TICKET_TIMEOUT, clock: Callable[[], float] = time.monotonic):
+        self.queues: Dict[Hashable, "OrderedDict[str, Ticket]"] = {}
+        self.tickets: Dict[str, Ticket] = {}
+        self.ticket_timeout = ticket_timeout
+        self.clock = clock
+
+    def clear(self) -> None:
+        self.queues.clear()
+        self.tickets.clear()
+
+    def enqueue(self, player_id: str, name: str, bucket: Hashable = ANY_BUCKET) -> Tuple[Ticket, Optional[Ticket]]:
+        '''
+        returns (ticket, opponent). opponent is the longest waiting player in the
+        same bucket, or None if this player now waits in the queue.
+        A player that is already queued keeps their place.
+        '''
+        now = self.clock()
+        ticket = self.tickets.get(player_id)
+        if ticket is not None:
+            ticket.last_poll = now
+            return ticket, None
+        ticket = Ticket(player_id, name, bucket, now)
+        self.tickets[player_id] = ticket
+        queue = self.queues.setdefault(bucket, OrderedDict())
+        while queue:
+            _, opponent = queue.popitem(last=False)
+            if not opponent.stale(now, self.ticket_timeout):
+                return ticket, opponent
+            # disconnected without cancelling
+            del self.tickets[opponent.player_id]
+        queue[player_id] = ticket
+        return ticket, None
+
+    def cancel(self, player_id: str) -> bool:
+        ticket = self.tickets.pop(player_id, None)
+        if ticket is None:
+            return False
+        queue = self.queues.get(ticket.bucket)
+        if queue is not None:
+            queue.pop(player_id, None)
+        return True
+
+    def collect(self, player_id: str) -> Optional[Ticket]:
+        '''
+        returns the ticket, forgetting it once it has been assigned a game
+        '''
+        ticket = self.tickets.get(player_id)
+        if ticket is not None and ticket.game_id is not None:
+            del self.tickets[player_id]
+        return ticket
+
+    async def wait(self, player_id: str, timeout: float) -> Optional[Ticket]:
+        '''
+        long-poll: wait up to timeout seconds for the player to be matched
+        '''
+        ticket = self.tickets.get(player_id)
+        if ticket is None:
+            return None
+        ticket.last_poll = self.clock()
+        if ticket.game_id is None and timeout > 0:
+            ticket.waiting += 1
+            try:
+                await asyncio.wait_for(ticket.matched.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                ticket.waiting -= 1
+                ticket.last_poll = self.clock()
+        return self.collect(player_id)
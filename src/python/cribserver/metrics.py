@@ -0,0 +1,112 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+import time
+
+# seconds. request handlers, scoring and stats writes are all sub-second
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def format_labels(labels: LabelKey, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(tuple(sorted(labels.items())), 0)
+
+    def samples(self) -> Iterator[str]:
+        for key, value in self.values.items():
+            yield f"{self.name}{format_labels(key)} {value}"
+
+
+class Gauge:
+    '''
+    value computed when scraped
+    '''
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, collect: Callable[[], Dict[LabelKey, float]]):
+        self.name = name
+        self.help = help
+        self.collect = collect
+
+    def samples(self) -> Iterator[str]:
+        for key, value in self.collect().items():
+            yield f"{self.name}{format_labels(key)} {value}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = list(buckets)
+        # per label set: [count per bucket + overflow], sum, count
+        self.series: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = ([0] * (len(self.buckets) + 1), [0.0, 0])
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+        series[1][1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> Iterator[str]:
+        for key, (counts, (total, count)) in self.series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % bound
+                yield f"{self.name}_bucket{format_labels(key, le)} {cumulative}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{format_labels(key, le)} {count}"
+            yield f"{self.name}_sum{format_labels(key)} {total}"
+            yield f"{self.name}_count{format_labels(key)} {count}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        '''
+        Prometheus text exposition format
+        '''
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,98 @@
+from typing import Dict, List, Optional
+import cProfile
+import io
+import pstats
+import re
+import sys
+import threading
+import time
+
+
+def frame_name(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{code.co_name}"
+
+
+class SamplingProfiler:
+    '''
+    Statistical profiler: every `interval` seconds, record the stack of every
+    other thread. Output is the collapsed stack format used by flamegraph.pl
+    and speedscope: "outer;inner;leaf count" per line.
+    '''
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+
+    def sample(self, seconds: float) -> Dict[str, int]:
+        me = threading.get_ident()
+        stacks: Dict[str, int] = {}
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                names = []
+                while frame is not None:
+                    names.append(frame_name(frame))
+                    frame = frame.f_back
+                stack = ";".join(reversed(names))
+                stacks[stack] = stacks.get(stack, 0) + 1
+            time.sleep(self.interval)
+        return stacks
+
+    @staticmethod
+    def collapse(stacks: Dict[str, int]) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+
+class RequestProfiler:
+    '''
+    Wraps the next `count` requests whose path matches `pattern` in cProfile.
+    Used from the http middleware in server.py. On the event loop the profile
+    also includes other coroutines that ran while the request was awaiting.
+    Only one request is profiled at a time: Python allows one active profiler
+    (3.12+ raises, older versions silently hand the data to the newest one),
+    so matching requests that arrive during a capture run unprofiled.
+    '''
+
+    def __init__(self):
+        self.pattern: Optional[re.Pattern] = None
+        self.remaining = 0
+        self.reports: List[Dict[str, str]] = []
+        # a capture is running. Only touched from the event loop, so a flag is enough
+        self.active = False
+
+    def arm(self, pattern: str, count: int) -> None:
+        '''raises re.error for a bad pattern'''
+        self.pattern = re.compile(pattern)
+        self.remaining = count
+        self.reports = []
+
+    def wants(self, path: str) -> bool:
+        if self.active or self.remaining <= 0 or not self.pattern.search(path):
+            return False
+        self.remaining -= 1
+        return True
+
+    def start(self) -> Optional[cProfile.Profile]:
+        '''None if another profiler (e.g. one outside the server) is already running'''
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            self.remaining += 1
+            return None
+        self.active = True
+        return profile
+
+    def finish(self, profile: cProfile.Profile, method: str, path: str, limit: int = 40) -> None:
+        profile.disable()
+        self.active = False
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(limit)
+        self.reports.append({"method": method, "path": path, "report": out.getvalue()})
+
+    def collect(self) -> List[Dict[str, str]]:
+        reports, self.reports = self.reports, []
+        return reports
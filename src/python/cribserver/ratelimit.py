@@ -0,0 +1,95 @@
+from collections import OrderedDict
+from typing import Optional
+import math
+import re
+import time
+
+# GET /games/{game_id}/{player_id}/state
+STATE_PATH = re.compile(r"^/games/[^/]+/([^/]+)/state$")
+
+
+class TokenBucket:
+    '''
+    holds up to `burst` tokens, refilled at `rate` tokens per second
+    '''
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        '''
+        take a token. Returns 0 on success, else seconds until one is available
+        '''
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    '''
+    One token bucket per key (player_id or client address). The least
+    recently used buckets are dropped beyond max_keys; a dropped bucket
+    comes back full, which only errs on the side of letting requests in.
+    '''
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def check(self, key: str, now: Optional[float] = None) -> float:
+        '''
+        0 if the request may proceed, else the Retry-After in seconds
+        '''
+        if now is None:
+            now = time.monotonic()
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(self.rate, self.burst, now)
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+        return bucket.take(now)
+
+
+class LoadShedder:
+    '''
+    Counts requests in flight. Past max_inflight, polls are turned away so
+    discards and plays keep getting through.
+    '''
+
+    def __init__(self, max_inflight: int):
+        self.max_inflight = max_inflight
+        self.inflight = 0
+
+    def overloaded(self) -> bool:
+        return self.inflight >= self.max_inflight
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
+
+
+def poll_key(method: str, path: str, client_host: str) -> Optional[str]:
+    '''
+    rate limit key for polling requests, None for everything else.
+    State polls are limited per player and client address (the player_id in
+    the URL isn't authenticated, so it alone would let anyone use up another
+    player's bucket), the lobby list per client address.
+    '''
+    if method != "GET":
+        return None
+    match = STATE_PATH.match(path)
+    if match:
+        return f"player:{client_host}/{match.group(1)}"
+    if path == "/games/":
+        return "addr:" + client_host
+    return None
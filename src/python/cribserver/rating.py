@@ -0,0 +1,92 @@
+'''
+Elo ratings. Both players' ratings move when a game finishes; the winner
+gains what the loser gives up, more for an upset than for a favourite.
+
+Ratings can be rebuilt from the game archive (see replay.py for the format),
+e.g. after changing K_FACTOR or to fill in players from before ratings:
+
+    python -m cribserver.rating game_archive.jsonl [--stats-file player_stats.json]
+'''
+from typing import Dict, Iterable, List, Optional, Tuple
+import argparse
+import json
+import time
+
+# rating of a player who hasn't finished a game
+DEFAULT_RATING = 1500.0
+# most points that change hands in one game
+K_FACTOR = 32.0
+# width of a matchmaking bucket, in rating points
+BUCKET_WIDTH = 200
+
+
+def expected_score(rating: float, opponent: float) -> float:
+    '''chance that `rating` beats `opponent`'''
+    return 1.0 / (1.0 + 10.0 ** ((opponent - rating) / 400.0))
+
+
+def rate_game(winner: float, loser: float) -> Tuple[float, float]:
+    '''new (winner, loser) ratings'''
+    delta = K_FACTOR * (1.0 - expected_score(winner, loser))
+    return winner + delta, loser - delta
+
+
+def update(winner_stats: Dict, loser_stats: Dict) -> None:
+    '''rate a finished game, in the players' player_stats entries'''
+    winner_stats["rating"], loser_stats["rating"] = rate_game(
+        winner_stats.get("rating", DEFAULT_RATING), loser_stats.get("rating", DEFAULT_RATING))
+
+
+def rate_history(results: Iterable[Tuple[str, str]],
+                 ratings: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    '''
+    Ratings after a sequence of (winner, loser) player_ids, oldest first.
+    Each game depends on the ratings the previous ones produced, so this is
+    one sequential pass: a few hundred thousand games per second.
+    '''
+    ratings = {} if ratings is None else ratings
+    get = ratings.get
+    for winner, loser in results:
+        ratings[winner], ratings[loser] = rate_game(get(winner, DEFAULT_RATING), get(loser, DEFAULT_RATING))
+    return ratings
+
+
+def archive_results(records: Iterable[Dict]) -> List[Tuple[str, str]]:
+    '''(winner, loser) of each game finished in the archive, in the order they finished'''
+    results = []
+    for record in records:
+        winner = record.get("winner")
+        if winner:
+            loser = next((p["player_id"] for p in record["players"] if p["player_id"] != winner), None)
+            if loser is not None:
+                results.append((winner, loser))
+    return results
+
+
+def run_ratings(argv: Optional[List[str]] = None):
+    # replay imports the engine, which imports this module
+    from .replay import read_records
+    parser = argparse.ArgumentParser(description="Recompute Elo ratings from the game archive.")
+    parser.add_argument("paths", nargs="+", help="archive files (JSON lines), oldest first")
+    parser.add_argument("--stats-file", help="write the ratings into this player stats file")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = archive_results(read_records(args.paths))
+    ratings = rate_history(results)
+    print(f"{len(results)} games, {len(ratings)} players rated in {time.perf_counter() - start:.2f}s")
+    if args.stats_file:
+        with open(args.stats_file) as f:
+            player_stats = json.load(f)
+        for player_id, rating in ratings.items():
+            if player_id in player_stats:
+                player_stats[player_id]["rating"] = rating
+        with open(args.stats_file, "w") as f:
+            json.dump(player_stats, f, indent=2)
+    else:
+        for player_id, rating in sorted(ratings.items(), key=lambda item: -item[1]):
+            print(f"{rating:8.1f} {player_id}")
+
+
+if __name__ == "__main__":
+    run_ratings()
@@ -0,0 +1,269 @@
+'''
+Replay archived games straight into the engine, without HTTP, and check
+that every hand comes out as recorded: public log, action log, scores and
+winner. Run it over the production archive after a change to catch rule
+regressions; the games/s it reports catches performance regressions.
+
+The corpus is the archive the server writes when CRIBSERVER_ARCHIVE is set:
+JSON lines, one record per finished hand (see CribbageEngine.hand_record).
+A match is the run of records with the same game_id starting at hand 1.
+
+    cribreplay game_archive.jsonl [more.jsonl ...]
+    cribreplay --generate 1000 corpus.jsonl       # bot games, e.g. for timing
+'''
+from typing import Dict, Iterable, Iterator, List, Optional
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+from fastapi import HTTPException
+from pydantic import BaseModel
+from .cards import Card, Deck
+from .engine import CribbageEngine, DeckCreator, ServerConfig
+from .api_model import CribbagePhase, GameState, Player
+from . import logconfig
+
+# compared between the recorded and the replayed hand, in this order
+RECORD_FIELDS = ("hand", "dealer", "target_score", "actions", "public_log", "players", "winner")
+# "10C" -> card index. Card.from_string validates each character, this is a dict lookup
+CARDS = {Card.to_string(card_idx).strip(): card_idx for card_idx in range(52)}
+
+
+class ReplayFailure(BaseModel):
+    game_id: str
+    # hand the mismatch or error was found in
+    hand: int
+    detail: str
+
+
+class ReplayDeck(Deck):
+    '''
+    Deals the recorded cards: one list per hand, in DEAL order with the
+    starter last. Once they run out (a match archived before it finished)
+    it shuffles like a normal deck.
+    '''
+    def __init__(self, hands: List[List[int]]):
+        self.hands = iter(hands)
+        self.piles = {self.REMAINING: [], self.DISCARD: []}
+
+    def shuffle(self) -> None:
+        cards = next(self.hands, None)
+        if cards is None:
+            super().shuffle()
+            return
+        for pile in self.piles.values():
+            pile.clear()
+        self.piles[self.REMAINING] = list(cards)
+
+
+class ReplayDeckCreator(DeckCreator):
+    def __init__(self):
+        self.deck: Deck = Deck()
+
+    def create_deck(self):
+        return self.deck
+
+
+class RecordingEngine(CribbageEngine):
+    '''
+    keeps the archive record of each finished hand in `records` instead of logging it
+    '''
+    def __init__(self, deck_creator: Optional[DeckCreator] = None):
+        super().__init__(ServerConfig(stats_file=None, setup_logging=False), deck_creator)
+        self.records: List[Dict] = []
+
+    def archive_hand(self, game: GameState, winner: Optional[Player] = None) -> None:
+        self.records.append(self.hand_record(game, winner))
+
+    def forget(self, game: GameState) -> None:
+        '''drop a finished game so a long run doesn't grow the engine'''
+        self.games.pop(game.game_id, None)
+        self.lobby.remove(game.game_id)
+        for player in game.players:
+            self.player_stats.pop(player.player_id, None)
+            self.leaderboard.remove(player.player_id)
+
+
+class Replayer(RecordingEngine):
+    def __init__(self):
+        super().__init__(ReplayDeckCreator())
+
+    def replay_game(self, records: List[Dict]) -> List[ReplayFailure]:
+        '''
+        Replay one game (all of its hand records, in order) and compare each
+        replayed hand with its record. Stops at the first bad hand.
+        '''
+        first = records[0]
+        game_id = first["game_id"]
+        self.deck_creator.deck = ReplayDeck([
+            [CARDS[line.split(",", 2)[2].strip()] for line in record["actions"] if line.startswith("DEAL,")]
+            for record in records
+            ])
+        self.records = []
+        names = {p["player_id"]: p["name"] for p in first["players"]}
+        game = None
+        line = ""
+        try:
+            for n, record in enumerate(records):
+                for line in record["actions"]:
+                    action, player_id, subject = line.split(",", 2)
+                    if action == "DEAL":
+                        continue
+                    if action == "JOIN":
+                        game = self.add_player(game_id, player_id, names[player_id],
+                                               match=first["target_score"] is not None)
+                    elif action == "DISCARD":
+                        self.discard(game, player_id, [CARDS[card] for card in subject.split()])
+                    elif action == "PLAY":
+                        self.play(game, player_id, CARDS[subject.strip()])
+                    else:
+                        raise ValueError(f"unknown action {line!r}")
+                # the engine archives the hand as its last action finishes it
+                if len(self.records) <= n:
+                    detail = "hand not finished after its recorded actions"
+                else:
+                    detail = compare_hand(record, self.records[n])
+                if detail:
+                    return [ReplayFailure(game_id=game_id, hand=record["hand"], detail=detail)]
+        except HTTPException as e:
+            return [ReplayFailure(game_id=game_id, hand=len(self.records) + first["hand"],
+                                  detail=f"{line.strip()!r} rejected: {e.detail}")]
+        except (ValueError, KeyError, IndexError, AttributeError) as e:
+            return [ReplayFailure(game_id=game_id, hand=len(self.records) + first["hand"],
+                                  detail=f"bad record: {e}")]
+        finally:
+            if game is not None:
+                self.forget(game)
+        return []
+
+
+def compare_hand(expected: Dict, replayed: Dict) -> Optional[str]:
+    '''what differs between two hand records, or None'''
+    for field in RECORD_FIELDS:
+        want, got = expected.get(field), replayed[field]
+        if want == got:
+            continue
+        if isinstance(want, list) and isinstance(got, list):
+            index = next((i for i, (w, g) in enumerate(zip(want, got)) if w != g), min(len(want), len(got)))
+            want = want[index] if index < len(want) else "<end>"
+            got = got[index] if index < len(got) else "<end>"
+            return f"{field}[{index}]: expected {want!r}, got {got!r}"
+        return f"{field}: expected {want!r}, got {got!r}"
+    return None
+
+
+def read_records(paths: Iterable[str]) -> Iterator[Dict]:
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def group_games(records: Iterable[Dict]) -> Iterator[List[Dict]]:
+    '''
+    Hands of concurrent games are interleaved in the archive. Yields each
+    game's records once it has a winner, then whatever is left unfinished.
+    '''
+    open_games: Dict[str, List[Dict]] = {}
+    for record in records:
+        game_id = record["game_id"]
+        if game_id in open_games and record["hand"] == 1:
+            # game_id reused after a restart
+            yield open_games.pop(game_id)
+        open_games.setdefault(game_id, []).append(record)
+        if record.get("winner"):
+            yield open_games.pop(game_id)
+    yield from open_games.values()
+
+
+class ReplayReport(BaseModel):
+    games: int = 0
+    hands: int = 0
+    seconds: float = 0.0
+    failures: List[ReplayFailure] = []
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds else 0.0
+
+
+def replay(games: Iterable[List[Dict]], max_failures: Optional[int] = None) -> ReplayReport:
+    replayer = Replayer()
+    report = ReplayReport()
+    start = time.perf_counter()
+    for records in games:
+        report.games += 1
+        report.hands += len(records)
+        report.failures.extend(replayer.replay_game(records))
+        if max_failures is not None and len(report.failures) >= max_failures:
+            break
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def generate(games: int, match: bool = False) -> Iterator[Dict]:
+    '''
+    hand records of bot games: discard the first two cards, play the first legal card
+    '''
+    engine = RecordingEngine()
+    for n in range(games):
+        game = engine.add_player(f"replay-{n}", "bot1", "Bot 1", match=match)
+        engine.add_player(game.game_id, "bot2", "Bot 2")
+        while game.phase != CribbagePhase.DONE:
+            if game.phase == CribbagePhase.DISCARD:
+                for player in game.players:
+                    hand = game.deck.get_cards(player.player_id)
+                    if len(hand) == 6:
+                        engine.discard(game, player.player_id, hand[:2])
+            else:
+                engine.play(game, game.current_turn, game.legal_cards[game.current_turn][0])
+        engine.forget(game)
+        yield from engine.records
+        engine.records = []
+
+
+def format_report(report: ReplayReport, max_lines: int = 20) -> str:
+    lines = [f"{report.games} games ({report.hands} hands) in {report.seconds:.2f}s: "
+             f"{report.games_per_second:.0f} games/s, {len(report.failures)} failed"]
+    for failure in report.failures[:max_lines]:
+        lines.append(f"{failure.game_id} hand {failure.hand}: {failure.detail}")
+    if len(report.failures) > max_lines:
+        lines.append(f"... and {len(report.failures) - max_lines} more")
+    return "\n".join(lines)
+
+
+def run_replay(argv: Optional[List[str]] = None):
+    """Console entry point for the replay engine."""
+    parser = argparse.ArgumentParser(description="Replay archived games and check them against the current rules.")
+    parser.add_argument("paths", nargs="+", help="archive files (JSON lines), or the output file with --generate")
+    parser.add_argument("--generate", type=int, metavar="GAMES", help="write bot games to the output file instead")
+    parser.add_argument("--match", action="store_true", help="with --generate: play matches to 121")
+    parser.add_argument("--seed", type=int, help="with --generate: random seed for the deals")
+    parser.add_argument("--max-failures", type=int, help="stop after this many failed games")
+    parser.add_argument("--report-json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+    # per hand INFO logging would cost more than the replay itself
+    for category in (logconfig.GAME, logconfig.REJECTED):
+        logging.getLogger(category).setLevel(logging.WARNING)
+
+    if args.generate is not None:
+        if args.seed is not None:
+            random.seed(args.seed)
+        with open(args.paths[0], "w") as f:
+            for record in generate(args.generate, args.match):
+                f.write(json.dumps(record) + "\n")
+        return
+    report = replay(group_games(read_records(args.paths)), args.max_failures)
+    if args.report_json:
+        print(json.dumps(dict(report.model_dump(), games_per_second=report.games_per_second), indent=2))
+    else:
+        print(format_report(report))
+    if report.failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_replay()
@@ -1,255 +1,427 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from typing import List, Dict, Optional
-import json
 import os
-from pathlib import Path
-import random
-import uvicorn
-from .cards import Card, Deck
-from .cribbage import score_play_phase, score_show_phase, deal_to_players
-from .api_model import Player, GameState, GameListItem, PlayerState, JoinRequest, PlayRequest, DiscardRequest, GoRequest, CribbagePhase, LogType
-
-# Initialize FastAPI app
-app = FastAPI(title="Cribbage Game Server")
-
-# In-memory game state
-games: Dict[str, GameState] = {}
-player_stats: Dict[str, Dict] = {}
-STATS_FILE = "player_stats.json"
-
-# DeckCreator is a hook for tests to override
-class DeckCreator:
-    def create_deck(self):
-        return Deck()
-DECK_CREATOR = DeckCreator()
-
-# Load/save stats
-def load_stats():
-    global player_stats
-    if os.path.exists(STATS_FILE):
-        with open(STATS_FILE, "r") as f:
-            player_stats = json.load(f)
-
-def save_stats():
-    with open(STATS_FILE, "w") as f:
-        json.dump(player_stats, f, indent=2)
-
-load_stats()
-
-# static resources
-app.mount("/static", StaticFiles(directory="static"), name="static")
-@app.get("/", response_class=HTMLResponse)
-async def read_root():
-    html_path = Path("static/index.html")
-    return html_path.read_text()
+import asyncio
+import re
+import time
+import uuid
+from urllib.parse import parse_qs
+from . import board, logconfig, stats, wire
+from .assets import AssetCache, DAILY, IMMUTABLE, REVALIDATE, content_hash
+from .engine import CribbageEngine, DeckCreator, ServerConfig
+from .matchmaking import ANY_BUCKET, skill_bucket
+from .profiler import SamplingProfiler, RequestProfiler
+from .ratelimit import LoadShedder, RateLimiter, poll_key, retry_after_header
+from .api_model import GameListPage, PlayerState, JoinRequest, PlayRequest, DiscardRequest, GoRequest, MatchRequest, MatchStatus, LeaderboardEntry, LeaderboardPage, ActionType, ActionBatchRequest, ActionError, ActionBatchResult, CribbagePhase
+
+# /admin/ endpoints are disabled unless this env variable (or ServerConfig.admin_token) is set when the app is created
+ADMIN_TOKEN_ENV = "CRIBSERVER_ADMIN_TOKEN"
+
+router = APIRouter()
+
+
+def get_engine(request: Request) -> CribbageEngine:
+    return request.app.state.engine
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # disk I/O is deferred until the app actually starts serving
+    engine = app.state.engine
+    if engine.config.setup_logging:
+        logconfig.setup_logging()
+    engine.load_stats()
+    app.state.assets.load()
+    yield
+    if engine.config.setup_logging:
+        logconfig.stop_logging()
+
+
+def create_app(config: Optional[ServerConfig] = None, deck_creator: Optional[DeckCreator] = None) -> FastAPI:
+    """
+    Build an app with its own games, stats, lobby and metrics. Nothing is read
+    from disk until startup, so tests and workers can create as many as they like.
+    """
+    engine = CribbageEngine(config, deck_creator)
+    app = FastAPI(title="Cribbage Game Server", lifespan=lifespan)
+    app.state.engine = engine
+    app.state.admin_token = engine.config.admin_token or os.environ.get(ADMIN_TOKEN_ENV)
+    app.state.request_profiler = RequestProfiler()
+    # static files are read into memory at startup (or on first request)
+    app.state.assets = AssetCache(engine.config.static_dir)
+    config = engine.config
+    app.state.poll_limiter = RateLimiter(config.poll_rate, config.poll_burst) if config.poll_rate else None
+    app.state.address_limiter = (RateLimiter(config.address_poll_rate, config.address_poll_burst)
+                                 if config.address_poll_rate else None)
+    app.state.load_shedder = LoadShedder(config.max_inflight)
+    # request profiling is only possible through the admin endpoints
+    app.add_middleware(RequestMiddleware, engine=engine, poll_limiter=app.state.poll_limiter,
+                       address_limiter=app.state.address_limiter, load_shedder=app.state.load_shedder,
+                       request_profiler=app.state.request_profiler if app.state.admin_token else None)
+    app.include_router(router)
+    return app
+
+
+class RequestMiddleware:
+    """
+    Per-request bookkeeping as one plain ASGI layer: cProfile captures when armed,
+    route latency for /metrics, and poll rate limiting and load shedding. Each
+    BaseHTTPMiddleware layer costs a task and a pair of memory streams per
+    request, which shows on state polls.
+    """
+
+    def __init__(self, app, engine: CribbageEngine, poll_limiter: Optional[RateLimiter],
+                 address_limiter: Optional[RateLimiter], load_shedder: LoadShedder,
+                 request_profiler: Optional[RequestProfiler] = None):
+        self.app = app
+        self.engine = engine
+        self.poll_limiter = poll_limiter
+        self.address_limiter = address_limiter
+        self.load_shedder = load_shedder
+        self.request_profiler = request_profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_profiler = self.request_profiler
+        profile = None
+        if request_profiler is not None and request_profiler.wants(scope["path"]):
+            profile = request_profiler.start()
+        if profile is None:
+            await self.timed(scope, receive, send)
+            return
+        try:
+            await self.timed(scope, receive, send)
+        finally:
+            request_profiler.finish(profile, scope["method"], scope["path"])
+
+    async def timed(self, scope, receive, send):
+        start = time.perf_counter()
+        await self.limited(scope, receive, send)
+        # label by route template, not raw path, to keep the series count bounded
+        route = scope.get("route")
+        self.engine.request_seconds.observe(
+            time.perf_counter() - start, route=getattr(route, "path", "unmatched"), method=scope["method"])
+
+    async def limited(self, scope, receive, send):
+        """Rate limit polls per player and per address, and shed polls first when overloaded."""
+        method, path = scope["method"], scope["path"]
+        client = scope.get("client")
+        host = client[0] if client else ""
+        key = poll_key(method, path, host)
+        if key is not None:
+            if self.load_shedder.overloaded():
+                self.engine.rejected_requests.inc(reason="overloaded")
+                response = JSONResponse({"detail": "Server busy"}, status_code=503, headers={"Retry-After": "1"})
+                await response(scope, receive, send)
+                return
+            retry_after = 0.0
+            if self.poll_limiter is not None:
+                retry_after = self.poll_limiter.check(key)
+            # a client cycling through player_ids still gets a single address budget
+            if not retry_after and self.address_limiter is not None:
+                retry_after = self.address_limiter.check(host)
+            if retry_after:
+                self.engine.rejected_requests.inc(reason="rate_limited")
+                response = JSONResponse({"detail": "Too many requests"}, status_code=429,
+                                        headers={"Retry-After": retry_after_header(retry_after)})
+                await response(scope, receive, send)
+                return
+        # long-polls sit idle, they don't count as load
+        if method == "GET" and (path.startswith("/matchmaking/") or is_long_poll(scope)):
+            await self.app(scope, receive, send)
+            return
+        self.load_shedder.inflight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.load_shedder.inflight -= 1
+
+def is_long_poll(scope) -> bool:
+    query = scope["query_string"]
+    if b"wait=" not in query:
+        return False
+    try:
+        return float(parse_qs(query.decode("latin-1")).get("wait", ["0"])[-1]) > 0
+    except ValueError:
+        return False
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(engine: CribbageEngine = Depends(get_engine)):
+    """Prometheus metrics."""
+    return engine.registry.render()
+
+def require_admin(request: Request, x_admin_token: Optional[str] = Header(None)):
+    expected = request.app.state.admin_token
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token != expected:
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@router.get("/admin/profile", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+async def sample_profile(seconds: float = Query(5.0, gt=0, le=60), interval: float = Query(0.005, ge=0.001, le=1)):
+    """Sample all threads for `seconds` and return collapsed stacks (flamegraph.pl/speedscope input)."""
+    profiler = SamplingProfiler(interval)
+    # sample from a worker thread so the event loop keeps serving the workload being profiled
+    stacks = await asyncio.get_running_loop().run_in_executor(None, profiler.sample, seconds)
+    return SamplingProfiler.collapse(stacks)
+
+@router.post("/admin/profile/requests", dependencies=[Depends(require_admin)])
+async def arm_request_profiler(request: Request, path: str, count: int = Query(1, ge=1, le=100)):
+    """Run cProfile on the next `count` requests whose path matches the regex `path`."""
+    try:
+        request.app.state.request_profiler.arm(path, count)
+    except re.error as e:
+        raise HTTPException(status_code=400, detail=f"Bad path pattern: {e}")
+    return {"path": path, "count": count}
+
+@router.get("/admin/profile/requests", dependencies=[Depends(require_admin)])
+async def get_request_profiles(request: Request):
+    """Return and clear the cProfile reports collected so far."""
+    return request.app.state.request_profiler.collect()
+
+def serve_asset(request: Request, name: str) -> Response:
+    asset = request.app.state.assets.get(name)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    encoding = asset.select(request.headers.get("accept-encoding"))
+    etag = asset.etag(encoding)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE if name != asset.name else REVALIDATE,
+        "Vary": "Accept-Encoding",
+        }
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(asset.variants[encoding], media_type=asset.content_type, headers=headers)
+
+@router.get("/")
+async def read_root(request: Request):
+    return serve_asset(request, "index.html")
+
+@router.get("/static/{name}")
+async def read_static(request: Request, name: str):
+    """Static files from memory. /static/<stem>.<hash><ext> URLs are cached for a year."""
+    return serve_asset(request, name)
+
+@lru_cache(maxsize=8)
+def generated_etag(body: str) -> str:
+    # bodies are cached strings, so after the first request this is a dict lookup
+    return f'"{content_hash(body.encode())}"'
+
+def generated_response(request: Request, body: str, media_type: str) -> Response:
+    """Content computed once per server process, revalidated with its hash after a day."""
+    etag = generated_etag(body)
+    headers = {"ETag": etag, "Cache-Control": DAILY}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type=media_type, headers=headers)
+
+@router.get("/board/board.svg")
+async def get_bare_board(request: Request):
+    """The board without pegs. Clients place their own pegs with /board/holes.json."""
+    return generated_response(request, board.bare_board(), "image/svg+xml")
+
+@router.get("/board/holes.json")
+async def get_board_holes(request: Request):
+    """Peg coordinates on /board/board.svg: per track, [x, y] for each score from 0 to 121."""
+    return generated_response(request, board.holes_json(), "application/json")
+
+def player_state_response(request: Request, game, player_id: str):
+    """PlayerState as JSON, or in the binary wire format if the client asks for it."""
+    state = PlayerState.from_game_state(game, player_id)
+    if wire.accepts(request.headers.get("accept")):
+        return Response(wire.encode_state(state), media_type=wire.MEDIA_TYPE)
+    # serialize directly: returning the model would make FastAPI dump, revalidate and re-encode it
+    return Response(state.model_dump_json(), media_type="application/json")
 
 # API Endpoints
-@app.get("/games/", response_model=List[GameListItem])
-async def list_games():
-    """List all available games."""
-    result = []
-    for game in games:
-        item = GameListItem.from_game_state(game)
-        result.append(item)
-    return result
-
-@app.post("/games/{game_id}/join", response_model=PlayerState)
-async def join_game(game_id: str, request: JoinRequest):
+@router.get("/games/", response_model=GameListPage)
+async def list_games(phase: Optional[str] = None, open: bool = False, cursor: int = 0,
+                     limit: int = Query(50, ge=1, le=500), engine: CribbageEngine = Depends(get_engine)):
+    """List games, optionally filtered by phase name (e.g. JOIN) and open seats."""
+    phase_filter = None
+    if phase is not None:
+        try:
+            phase_filter = CribbagePhase[phase.upper()]
+        except KeyError:
+            raise HTTPException(status_code=400, detail=f"Unknown phase {phase}")
+    items, next_cursor = engine.lobby.list_games(phase_filter, open_only=open, cursor=cursor, limit=limit)
+    return GameListPage(games=items, next_cursor=next_cursor)
+
+@router.post("/games/{game_id}/join", response_model=PlayerState)
+async def join_game(game_id: str, request: JoinRequest, http_request: Request, engine: CribbageEngine = Depends(get_engine)):
     """Join a Cribbage game (2 players) and deal cards when full."""
-    if game_id not in games:
-        games[game_id] = GameState(
-            game_id=game_id,
-            players=[],
-            deck=DECK_CREATOR.create_deck(),
-            dealer=None,
-            current_turn=None,
-            phase=CribbagePhase.JOIN,
-        )
-
-    game = games[game_id]
-    deck = game.deck
-    if len(game.players) >= 2:
-        raise HTTPException(status_code=400, detail="Game full (2 players max)")
-    if any(p.player_id == request.player_id for p in game.players):
-        raise HTTPException(status_code=400, detail="Player already in game")
-    game.players.append(Player(player_id=request.player_id, name=request.name))
-    game.game_log.append((LogType.PUBLIC, f"Player {request.name} joined game"))
-    game.log_action(LogType.JOIN, request.player_id, game_id)
-
-
-    # Deal 6 cards to each player and set starter when 2 players join
-    if len(game.players) == 2:
-        # initialize game and deck
-        game.change_phase(CribbagePhase.DEAL)
-        deal_to_players(deck, game.players[0].player_id, game.players[1].player_id)
-        # record
-        for i in range(0, 6):
-            for player in game.players:
-                game.log_action(LogType.DEAL, player.player_id, Card.to_string(deck.get_cards(player.player_id)[i]))
-        # set state
-        game.dealer = game.players[0].player_id
-        game.current_turn = game.players[1].player_id  # Non-dealer starts discard phase
-        game.change_phase(CribbagePhase.DISCARD)
-
-    # Update player stats
-    if request.player_id not in player_stats:
-        player_stats[request.player_id] = {"name": request.name, "wins": 0, "games_played": 1}
-    else:
-        player_stats[request.player_id]["games_played"] += 1
-    save_stats()
-
-    return PlayerState.from_game_state(game, request.player_id)
-
-@app.get("/games/{game_id}/{player_id}/state")
-async def get_game_state(game_id: str, player_id: str):
-    """Get current game state."""
-    if game_id not in games:
-        raise HTTPException(status_code=404, detail="Game not found")
-    game = games[game_id]
-    return PlayerState.from_game_state(game, player_id)
-
-
-@app.post("/games/{game_id}/discard", response_model=PlayerState)
-async def discard_cards(game_id: str, request: DiscardRequest):
+    game = engine.add_player(game_id, request.player_id, request.name, match=request.match)
+    return player_state_response(http_request, game, request.player_id)
+
+@router.post("/matchmaking/enqueue", response_model=MatchStatus)
+async def enqueue_for_match(request: MatchRequest, engine: CribbageEngine = Depends(get_engine)):
+    """Wait for an opponent. The game is created and dealt as soon as two players are paired."""
+    matchmaker = engine.matchmaker
+    bucket = skill_bucket(engine.player_stats.get(request.player_id)) if request.skill_bucketing else ANY_BUCKET
+    ticket, opponent = matchmaker.enqueue(request.player_id, request.name, bucket)
+    if opponent is not None:
+        game_id = f"match-{uuid.uuid4().hex[:12]}"
+        # longest waiting player joins first and deals
+        engine.add_player(game_id, opponent.player_id, opponent.name)
+        engine.add_player(game_id, ticket.player_id, ticket.name)
+        opponent.assign(game_id)
+        ticket.assign(game_id)
+    matchmaker.collect(request.player_id)
+    return MatchStatus(player_id=request.player_id, game_id=ticket.game_id)
+
+@router.get("/matchmaking/{player_id}", response_model=MatchStatus)
+async def get_match(player_id: str, timeout: float = Query(25.0, ge=0, le=60), engine: CribbageEngine = Depends(get_engine)):
+    """Long-poll for a match. Returns when matched or after timeout seconds with game_id None."""
+    ticket = await engine.matchmaker.wait(player_id, timeout)
+    if ticket is None:
+        raise HTTPException(status_code=404, detail="Player not queued")
+    return MatchStatus(player_id=player_id, game_id=ticket.game_id)
+
+@router.delete("/matchmaking/{player_id}")
+async def cancel_match(player_id: str, engine: CribbageEngine = Depends(get_engine)):
+    """Leave the matchmaking queue."""
+    if not engine.matchmaker.cancel(player_id):
+        raise HTTPException(status_code=404, detail="Player not queued")
+    return {"player_id": player_id, "cancelled": True}
+
+def state_etag(game, binary: bool) -> str:
+    # a player's view only changes when the game version does
+    return f'"{game.version}{"b" if binary else ""}"'
+
+@router.get("/games/{game_id}/{player_id}/state")
+async def get_game_state(game_id: str, player_id: str, request: Request, wait: float = Query(0, ge=0, le=60),
+                         if_none_match: Optional[str] = Header(None), engine: CribbageEngine = Depends(get_engine)):
+    """
+    Get current game state. Send the last ETag as If-None-Match to get a 304 when
+    nothing changed; with wait=N the request is held up to N seconds for a change.
+    """
+    game = engine.get_game(game_id)
+    binary = wire.accepts(request.headers.get("accept"))
+    if wait and if_none_match == state_etag(game, binary):
+        await engine.wait_for_change(game, game.version, wait)
+    engine.state_polls.inc()
+    etag = state_etag(game, binary)
+    headers = {"ETag": etag, "Vary": "Accept"}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    if game.polled_versions.get(player_id) != game.version:
+        engine.state_changes.inc()
+        game.polled_versions[player_id] = game.version
+    response = player_state_response(request, game, player_id)
+    response.headers.update(headers)
+    return response
+
+@router.get("/games/{game_id}/board.svg")
+async def get_board(game_id: str, if_none_match: Optional[str] = Header(None),
+                    engine: CribbageEngine = Depends(get_engine)):
+    """The board with a peg per player. The image only changes with the scores, which make the ETag."""
+    game = engine.get_game(game_id)
+    scores = [p.score for p in game.players]
+    headers = {"ETag": '"' + "-".join(str(score) for score in scores) + '"', "Cache-Control": REVALIDATE}
+    if if_none_match == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(board.render_board(scores), media_type="image/svg+xml", headers=headers)
+
+@router.post("/games/{game_id}/discard", response_model=PlayerState)
+async def discard_cards(game_id: str, request: DiscardRequest, http_request: Request, engine: CribbageEngine = Depends(get_engine)):
     """Discard 2 cards to the crib."""
-    if game_id not in games:
-        raise HTTPException(status_code=404, detail="Game not found")
+    game = engine.get_game(game_id)
+    engine.discard(game, request.player_id, request.card_indices)
+    return player_state_response(http_request, game, request.player_id)
 
-    game = games[game_id]
-    deck = game.deck
-    if game.phase != CribbagePhase.DISCARD:
-        raise HTTPException(status_code=400, detail="Can only discard in DISCARD phase")
-
-    player = next((p for p in game.players if p.player_id == request.player_id), None)
-    if not player:
-        raise HTTPException(status_code=404, detail="Player not found")
-    if len(request.card_indices) != 2:
-        raise HTTPException(status_code=400, detail="Must discard exactly 2 cards")
-    if any(card not in deck.get_cards(player.player_id) for card in request.card_indices):
-        print(f"NOT IN HAND: player_id={player.player_id}  cards={deck.get_cards(player.player_id)}")
-        raise HTTPException(status_code=400, detail="Cards not in hand")
-
-    # Move cards to crib
-    for card_idx in request.card_indices:
-        deck.play_card(card_idx, player.player_id, "crib")
-    game.log_action(LogType.DISCARD, player.player_id, ' '.join([Card.to_string(card_idx) for card_idx in request.card_indices]))
-    game.game_log.append((LogType.PUBLIC, f"Player {player.name} discarded 2 cards"))
-
-    # Check if both players have discarded
-    if len(deck.get_cards("crib")) == 4:
-        # flip starter card
-        game.change_phase(CribbagePhase.FLIP_STARTER)
-        deck.deal_to_pile("starter")
-        game.log_action(LogType.DEAL, "starter", Card.to_string(deck.get_cards("starter")[0]))
-        # Non-dealer (player 1) starts play phase
-        game.current_turn = next(p.player_id for p in game.players if p.player_id != game.dealer)
-        game.change_phase(CribbagePhase.COUNT)
-    return PlayerState.from_game_state(game, player.player_id)
-
-@app.post("/games/{game_id}/play")
-async def play_card(game_id: str, request: PlayRequest, response_model=PlayerState):
+@router.post("/games/{game_id}/play", response_model=PlayerState)
+async def play_card(game_id: str, request: PlayRequest, http_request: Request, engine: CribbageEngine = Depends(get_engine)):
     """Play a card in the count phase."""
-    if game_id not in games:
-        raise HTTPException(status_code=404, detail="Game not found")
-
-    game = games[game_id]
-    deck = game.deck
-    if game.phase != CribbagePhase.COUNT:
-        print("1")
-        raise HTTPException(status_code=400, detail="In show phase, cannot play cards")
-    if request.player_id != game.current_turn:
-        print("2")
-        raise HTTPException(status_code=400, detail="Not your turn")
-
-    player = next((p for p in game.players if p.player_id == request.player_id), None)
-    if not player:
-        raise HTTPException(status_code=404, detail="Player not found")
+    game = engine.get_game(game_id)
+    engine.play(game, request.player_id, request.card_idx)
+    return player_state_response(http_request, game, request.player_id)
+
+@router.post("/games/{game_id}/go", response_model=PlayerState)
+async def say_go(game_id: str, request: GoRequest, http_request: Request, engine: CribbageEngine = Depends(get_engine)):
+    """Say Go. Accepted when no card in hand fits under 31; the server has already passed the turn."""
+    game = engine.get_game(game_id)
+    engine.go(game, request.player_id)
+    return player_state_response(http_request, game, request.player_id)
+
+@router.post("/games/{game_id}/actions", response_model=ActionBatchResult)
+async def apply_actions(game_id: str, request: ActionBatchRequest, http_request: Request, engine: CribbageEngine = Depends(get_engine)):
+    """
+    Apply an ordered list of discard/play/go actions for one player in a single request.
+    Actions run back to back with no other request in between. The batch stops at the
+    first action that fails; its error is reported and the later actions are not applied.
+    """
+    game = engine.get_game(game_id)
+    errors = []
+    applied = 0
+    for index, action in enumerate(request.actions):
+        try:
+            if action.type == ActionType.DISCARD:
+                engine.discard(game, request.player_id, action.card_indices or [])
+            elif action.type == ActionType.PLAY:
+                if action.card_idx is None:
+                    raise HTTPException(status_code=400, detail="card_idx required for play")
+                engine.play(game, request.player_id, action.card_idx)
+            else:
+                engine.go(game, request.player_id)
+        except HTTPException as e:
+            errors.append(ActionError(index=index, status_code=e.status_code, detail=str(e.detail)))
+            break
+        applied += 1
+    result = ActionBatchResult(
+        applied=applied,
+        errors=errors,
+        state=PlayerState.from_game_state(game, request.player_id),
+        )
+    if wire.accepts(http_request.headers.get("accept")):
+        return Response(wire.encode_batch_result(result), media_type=wire.MEDIA_TYPE)
+    return result
 
-    # Convert request.card to Card object
-    card_idx = request.card_idx
-    if card_idx not in deck.get_cards(request.player_id):
-        print("3")
-        raise HTTPException(status_code=400, detail=f"Card {card_idx} not in hand")
-    if game.phase1_total() + Card.get_value(card_idx) > 31:
-        print("4")
-        raise HTTPException(status_code=400, detail="Card exceeds 31")
-
-    # Play card
-    deck.play_card(card_idx, request.player_id, "phase1")
-    game.game_log.append((LogType.PUBLIC, f"Player {player.name} played {Card.to_string(card_idx)}"))
-    game.log_action(LogType.PLAY, player.player_id, Card.to_string(card_idx))
-    game.played_cards.append((request.player_id, card_idx))  # store for SHOW phase
-    player.score += score_play_phase(deck.get_cards("phase1"), score_log=game.append_log(player))
-
-    # Check for Go
-    next_player = game.players[(game.players.index(player) + 1) % 2]
-    next_valid = any(Card.get_value(c) + game.phase1_total() <= 31 for c in deck.get_cards(next_player.player_id))
-    cur_valid = any(Card.get_value(c) + game.phase1_total() <= 31 for c in deck.get_cards(player.player_id))
-    if next_valid:
-        game.current_turn = next_player.player_id
-    else:
-        # opponent doesn't have any cards < 31. keep playing with the current player
-        if cur_valid:
-            # current player has more cards < 31. Let him continue playing
-            game.current_turn = player.player_id
-        else:
-            # current player doesn't have cards < 31 either. finish this round. Next player starts
-            if game.phase1_total() != 31:
-                # Go point. Don't double count if 31
-                player.score += 1
-                game.game_log.append((LogType.PUBLIC, f"{player.name} 1 point for Go"))
-            game.current_turn = next_player.player_id
-            deck.drain_pile("phase1")
-
-
-    # Advance turn or move to show phase
-    if not any(deck.get_cards(p.player_id) for p in game.players):
-        game.change_phase(CribbagePhase.SHOW)
-        # Score show phase
-        for p in reversed(game.players): # second player counts first
-        # move cards back into player's hands and score
-            hand = []
-            for player_id, card_idx in game.played_cards:
-                if p.player_id == player_id:
-                    hand.append(card_idx)
-            p.score += score_show_phase(hand, deck.get_cards("starter")[0], is_crib=False, score_log=game.append_log(p))
-        # move to CRIB phase
-        game.change_phase(CribbagePhase.CRIB)
-        if game.dealer:
-            dealer = next(p for p in game.players if p.player_id == game.dealer)
-            dealer.score += score_show_phase(deck.get_cards("crib"), deck.get_cards("starter")[0], is_crib=True, score_log=game.append_log(dealer))
-        # Determine winner
-        for player in game.players:
-            game.game_log.append((LogType.PUBLIC, f"Player {player.name} score: {player.score}"))
-        winner = max(game.players, key=lambda p: p.score)
-        game.game_log.append((LogType.PUBLIC, f"Player {winner.name} wins"))
-        player_stats[winner.player_id]["wins"] += 1
-        save_stats()
-        # Reset game
-        game.change_phase(CribbagePhase.DONE)
-
-        # DEBUG LOG
-        for typ, line in game.game_log:
-            if typ == LogType.PRIVATE:
-                print(line)
-        print('')
-        for typ, line in game.game_log:
-            if typ == LogType.PUBLIC:
-                print(line)
-        return PlayerState.from_game_state(game, request.player_id)
-
-    return PlayerState.from_game_state(game, request.player_id)
-
-@app.get("/players/{player_id}/stats")
-async def get_player_stats(player_id: str):
-    """Get player stats."""
-    if player_id not in player_stats:
+@router.get("/players/{player_id}/stats")
+async def get_player_stats(player_id: str, engine: CribbageEngine = Depends(get_engine)):
+    """Wins, games and running averages of hand, crib and pegging points, margin and move time."""
+    if player_id not in engine.player_stats:
         raise HTTPException(status_code=404, detail="Player not found")
-    return player_stats[player_id]
+    return stats.summary(engine.player_stats[player_id])
 
-def run_server():
-    """Run the FastAPI server with uvicorn."""
-    uvicorn.run("cribserver.server:app", host="0.0.0.0", port=5000, reload=True)
 
+@router.get("/leaderboard", response_model=LeaderboardPage)
+async def get_leaderboard(limit: int = Query(10, ge=1, le=500), engine: CribbageEngine = Depends(get_engine)):
+    """Best players by rating. Players are ranked after a few finished games."""
+    player_ids = engine.leaderboard.top(limit)
+    return LeaderboardPage(
+        players=[LeaderboardEntry.from_stats(rank, player_id, engine.player_stats[player_id])
+                 for rank, player_id in enumerate(player_ids, 1)],
+        total=len(engine.leaderboard),
+        )
+
+@router.get("/players/{player_id}/rank", response_model=LeaderboardEntry)
+async def get_player_rank(player_id: str, engine: CribbageEngine = Depends(get_engine)):
+    """A player's leaderboard position."""
+    rank = engine.leaderboard.rank(player_id)
+    if rank is None:
+        raise HTTPException(status_code=404, detail="Player not ranked")
+    return LeaderboardEntry.from_stats(rank, player_id, engine.player_stats[player_id])
+
+
+# Default app for `uvicorn cribserver.server:app` and the existing tests.
+# These module globals are the default app's state.
+app = create_app()
+games = app.state.engine.games
+player_stats = app.state.engine.player_stats
+lobby = app.state.engine.lobby
+matchmaker = app.state.engine.matchmaker
+DECK_CREATOR = app.state.engine.deck_creator
+
+def run_server():
+    """Run the FastAPI server with uvicorn. CRIBSERVER_PORT runs extra instances side by side."""
+    import uvicorn
+    port = int(os.environ.get("CRIBSERVER_PORT", "5000"))
+    uvicorn.run("cribserver.server:create_app", factory=True, host="0.0.0.0", port=port, reload=True)
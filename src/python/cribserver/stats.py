@@ -0,0 +1,66 @@
+'''
+Running per-player statistics, updated in O(1) as hands are scored and
+moves are made, so nothing ever rescans game history.
+
+Entries live in CribbageEngine.player_stats (and the stats file) as plain
+dicts. Each running statistic is stored as {"n", "mean", "m2"} and updated
+with Welford's algorithm; summary() turns an entry into what
+/players/{player_id}/stats returns. Entries from older stats files only
+have name, wins and games_played; the other keys are added on first use.
+'''
+from typing import Dict
+import math
+from .rating import DEFAULT_RATING
+
+# running statistics kept per player
+HAND_POINTS = "hand_points"
+CRIB_POINTS = "crib_points"
+PEGGING_POINTS = "pegging_points"
+# final score minus the opponent's, negative for a loss
+MARGIN = "margin"
+# seconds from a player's turn (or the deal, for discards) to their move
+MOVE_SECONDS = "move_seconds"
+RUNNING = (HAND_POINTS, CRIB_POINTS, PEGGING_POINTS, MARGIN, MOVE_SECONDS)
+
+
+def new_stats(name: str) -> Dict:
+    return {"name": name, "wins": 0, "games_played": 0}
+
+
+def add(stats: Dict, key: str, value: float) -> None:
+    '''fold one value into the running mean and variance of stats[key]'''
+    running = stats.get(key)
+    if running is None:
+        running = stats[key] = {"n": 0, "mean": 0.0, "m2": 0.0}
+    running["n"] += 1
+    delta = value - running["mean"]
+    running["mean"] += delta / running["n"]
+    running["m2"] += delta * (value - running["mean"])
+
+
+def add_hand(stats: Dict, points: int, is_crib: bool = False) -> None:
+    add(stats, CRIB_POINTS if is_crib else HAND_POINTS, points)
+    if points == 29:
+        stats["twenty_nines"] = stats.get("twenty_nines", 0) + 1
+
+
+def describe(running: Dict) -> Dict:
+    n = running["n"]
+    variance = running["m2"] / (n - 1) if n > 1 else 0.0
+    return {"count": n, "mean": running["mean"], "variance": variance, "stddev": math.sqrt(variance)}
+
+
+def summary(stats: Dict) -> Dict:
+    games = stats.get("games_played", 0)
+    result = {
+        "name": stats.get("name"),
+        "wins": stats.get("wins", 0),
+        "games_played": games,
+        "win_rate": stats.get("wins", 0) / games if games else 0.0,
+        "rating": stats.get("rating", DEFAULT_RATING),
+        "twenty_nines": stats.get("twenty_nines", 0),
+        }
+    empty = {"n": 0, "mean": 0.0, "m2": 0.0}
+    for key in RUNNING:
+        result[key] = describe(stats.get(key, empty))
+    return result
@@ -0,0 +1,203 @@
+'''
+Compact binary encoding of PlayerState and ActionBatchResult.
+
+Sent instead of JSON when the request has "Accept: application/x-cribbage".
+All integers are big endian. Cards are single bytes (card index 0-51),
+the phase is its enum value, strings are utf-8 with an H length prefix.
+
+PlayerState:
+    magic "CB", format version   B B B
+    flags                        B   1=is_dealer 2=my_turn 8=has target_score
+    phase                        B
+    hand_number, target_score    H H
+    game_id                      str
+    players                      B count, then str player_id, str name, H score
+    visible_piles                B count, then str pile name, B count, card bytes
+    legal_cards                  B count, card bytes
+    game_log                     H count, then str
+    hand_summaries               B count, then H hand, str dealer,
+                                 B count, then str player_id, h points, H score
+    previous_hand_log            H count, then str
+ActionBatchResult:
+    applied                      H
+    errors                       H count, then H index, H status_code, str detail
+    state                        PlayerState as above
+'''
+from typing import List, Tuple
+import struct
+from .api_model import ActionBatchResult, ActionError, CribbagePhase, HandSummary, Player, PlayerState
+
+MEDIA_TYPE = "application/x-cribbage"
+MAGIC = b"CB"
+VERSION = 4
+
+IS_DEALER = 1
+MY_TURN = 2
+HAS_TARGET = 8
+
+HEADER = struct.Struct(">2sBBBHH")
+U8 = struct.Struct(">B")
+U16 = struct.Struct(">H")
+SCORE = struct.Struct(">hH")
+ERROR = struct.Struct(">HH")
+
+
+def accepts(accept_header: str) -> bool:
+    return MEDIA_TYPE in (accept_header or "")
+
+
+class Writer:
+    def __init__(self):
+        self.parts: List[bytes] = []
+
+    def u8(self, value: int) -> None:
+        self.parts.append(U8.pack(value))
+
+    def u16(self, value: int) -> None:
+        self.parts.append(U16.pack(value))
+
+    def text(self, value: str) -> None:
+        data = value.encode()
+        self.parts.append(U16.pack(len(data)) + data)
+
+    def cards(self, cards: List[int]) -> None:
+        self.parts.append(U8.pack(len(cards)) + bytes(cards))
+
+    def getvalue(self) -> bytes:
+        return b"".join(self.parts)
+
+
+class Reader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def unpack(self, fmt: struct.Struct) -> Tuple:
+        values = fmt.unpack_from(self.data, self.pos)
+        self.pos += fmt.size
+        return values
+
+    def u8(self) -> int:
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def u16(self) -> int:
+        return self.unpack(U16)[0]
+
+    def raw(self, length: int) -> bytes:
+        value = self.data[self.pos:self.pos + length]
+        if len(value) != length:
+            raise ValueError("truncated message")
+        self.pos += length
+        return value
+
+    def text(self) -> str:
+        return self.raw(self.u16()).decode()
+
+    def cards(self) -> List[int]:
+        return list(self.raw(self.u8()))
+
+
+def write_state(out: Writer, state: PlayerState) -> None:
+    flags = ((IS_DEALER if state.is_dealer else 0) | (MY_TURN if state.my_turn else 0)
+             | (HAS_TARGET if state.target_score is not None else 0))
+    out.parts.append(HEADER.pack(MAGIC, VERSION, flags, state.phase.value,
+                                 state.hand_number, state.target_score or 0))
+    out.text(state.game_id)
+    out.u8(len(state.players))
+    for player in state.players:
+        out.text(player.player_id)
+        out.text(player.name)
+        out.u16(player.score)
+    piles = state.visible_piles or {}
+    out.u8(len(piles))
+    for name, cards in piles.items():
+        out.text(name)
+        out.cards(cards)
+    out.cards(state.legal_cards)
+    out.u16(len(state.game_log))
+    for line in state.game_log:
+        out.text(line)
+    out.u8(len(state.hand_summaries))
+    for summary in state.hand_summaries:
+        out.u16(summary.hand)
+        out.text(summary.dealer)
+        out.u8(len(summary.scores))
+        for player_id, score in summary.scores.items():
+            out.text(player_id)
+            out.parts.append(SCORE.pack(summary.points.get(player_id, 0), score))
+    out.u16(len(state.previous_hand_log))
+    for line in state.previous_hand_log:
+        out.text(line)
+
+
+def read_state(src: Reader) -> PlayerState:
+    magic, version, flags, phase, hand_number, target_score = src.unpack(HEADER)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a cribbage state message")
+    game_id = src.text()
+    players = [Player.model_construct(player_id=src.text(), name=src.text(), score=src.u16())
+               for _ in range(src.u8())]
+    visible_piles = {}
+    for _ in range(src.u8()):
+        name = src.text()
+        visible_piles[name] = src.cards()
+    legal_cards = src.cards()
+    game_log = [src.text() for _ in range(src.u16())]
+    hand_summaries = []
+    for _ in range(src.u8()):
+        hand = src.u16()
+        dealer = src.text()
+        points, scores = {}, {}
+        for _ in range(src.u8()):
+            player_id = src.text()
+            points[player_id], scores[player_id] = src.unpack(SCORE)
+        hand_summaries.append(HandSummary.model_construct(hand=hand, dealer=dealer, points=points, scores=scores))
+    previous_hand_log = [src.text() for _ in range(src.u16())]
+    # trusted server output: skip validation
+    return PlayerState.model_construct(
+        game_id=game_id,
+        players=players,
+        visible_piles=visible_piles,
+        is_dealer=bool(flags & IS_DEALER),
+        my_turn=bool(flags & MY_TURN),
+        phase=CribbagePhase(phase),
+        game_log=game_log,
+        legal_cards=legal_cards,
+        target_score=target_score if flags & HAS_TARGET else None,
+        hand_number=hand_number,
+        hand_summaries=hand_summaries,
+        previous_hand_log=previous_hand_log,
+        )
+
+
+def encode_state(state: PlayerState) -> bytes:
+    out = Writer()
+    write_state(out, state)
+    return out.getvalue()
+
+
+def decode_state(data: bytes) -> PlayerState:
+    return read_state(Reader(data))
+
+
+def encode_batch_result(result: ActionBatchResult) -> bytes:
+    out = Writer()
+    out.u16(result.applied)
+    out.u16(len(result.errors))
+    for error in result.errors:
+        out.parts.append(ERROR.pack(error.index, error.status_code))
+        out.text(error.detail)
+    write_state(out, result.state)
+    return out.getvalue()
+
+
+def decode_batch_result(data: bytes) -> ActionBatchResult:
+    src = Reader(data)
+    applied = src.u16()
+    errors = []
+    for _ in range(src.u16()):
+        index, status_code = src.unpack(ERROR)
+        errors.append(ActionError.model_construct(index=index, status_code=status_code, detail=src.text()))
+    return ActionBatchResult.model_construct(applied=applied, errors=errors, state=read_state(src))
@@ -88,6 +88,46 @@ async function joinGame() {
     }
 }
 
+// Board: fetched once, then pegs are moved client side using the hole table
+let boardHoles = null; // tracks[i].holes[score] = [x, y]
+async function loadBoard() {
+    try {
+        const [svg, holes] = await Promise.all([
+            fetch('/board/board.svg').then(r => r.text()),
+            fetch('/board/holes.json').then(r => r.json())
+        ]);
+        document.getElementById('board').innerHTML = svg;
+        boardHoles = holes;
+        const state = document.getElementById('scores').dataset.state;
+        if (state) {
+            movePegs(JSON.parse(state).players);
+        }
+    } catch (e) {
+        console.error('Board error:', e);
+    }
+}
+
+function movePegs(players) {
+    const svg = document.querySelector('#board svg');
+    if (!svg || !boardHoles) {
+        return;
+    }
+    players.slice(0, boardHoles.tracks.length).forEach((player, i) => {
+        const track = boardHoles.tracks[i];
+        let peg = document.getElementById(`peg-${i}`);
+        if (!peg) {
+            peg = document.createElementNS('http://www.w3.org/2000/svg', 'circle');
+            peg.id = `peg-${i}`;
+            peg.setAttribute('r', boardHoles.hole_radius - 1);
+            peg.setAttribute('fill', track.color);
+            svg.appendChild(peg);
+        }
+        const [x, y] = track.holes[Math.max(0, Math.min(player.score, track.holes.length - 1))];
+        peg.setAttribute('cx', x);
+        peg.setAttribute('cy', y);
+    });
+}
+
 // Update UI based on game state
 function updateUI(state) {
     console.log('Updating UI with state:', state);
@@ -96,6 +136,7 @@ function updateUI(state) {
     // Update scores
     const scores = state.players.map(p => `${p.name}: ${p.score}`).join(', ');
     document.getElementById('scores').innerHTML = `<p>Scores: ${scores}</p>`;
+    movePegs(state.players);
 
     // Update starter card
     const starter = state.visible_piles.starter || [];
@@ -288,4 +329,5 @@ document.getElementById('action-button').addEventListener('click', submitAction)
 
 // Start join process
 console.log('Starting client...');
+loadBoard();
 joinGame();
@@ -0,0 +1,82 @@
+import asyncio
+import unittest
+import httpx
+from cribserver.server import create_app, ServerConfig, DeckCreator
+from cribserver.cards import Deck
+from cribserver.api_model import CribbagePhase, Action, ActionType
+from cribserver.aioclient import AsyncCribbageClient, CribbageError
+
+
+class TestAsyncClient(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        # Ace to King of Clubs, dealt in order
+        deck = Deck()
+        deck.piles[Deck.REMAINING] = list(range(13))
+        deck.shuffle = lambda: None
+        deck_creator = DeckCreator()
+        deck_creator.create_deck = lambda: deck
+        self.app = create_app(ServerConfig(stats_file=None, setup_logging=False, poll_rate=None), deck_creator)
+        self.client = AsyncCribbageClient("http://cribserver", transport=httpx.ASGITransport(app=self.app))
+        self.json_client = AsyncCribbageClient("http://cribserver", binary=False,
+                                               transport=httpx.ASGITransport(app=self.app))
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.json_client.close()
+
+    async def start_game(self):
+        await self.client.join("g1", "player1", "P1")
+        state = await self.json_client.join("g1", "player2", "P2")
+        self.assertEqual(state.phase, CribbagePhase.DISCARD)
+        await self.client.discard("g1", "player1", [0, 2])
+        await self.client.discard("g1", "player2", [11, 1])
+
+    async def test_game(self):
+        await self.start_game()
+        state = await self.client.state("g1", "player2")
+        self.assertTrue(state.my_turn)
+        self.assertEqual(state.legal_cards, [3, 5, 7, 9])
+        state = await self.client.play("g1", "player2", 9)
+        self.assertEqual(state.visible_piles["phase1"], [9])
+        with self.assertRaises(CribbageError) as cm:
+            await self.client.play("g1", "player2", 3)
+        self.assertEqual(cm.exception.status_code, 400)
+        self.assertEqual(cm.exception.detail, "Not your turn")
+        with self.assertRaises(CribbageError):
+            await self.client.go("g1", "player1")
+        result = await self.json_client.actions("g1", "player1", [Action(type=ActionType.PLAY, card_idx=4)])
+        self.assertEqual(result.applied, 1)
+        page = await self.client.list_games(phase="COUNT")
+        self.assertEqual([g.game_id for g in page.games], ["g1"])
+
+    async def test_etag(self):
+        await self.start_game()
+        state = await self.client.state("g1", "player1")
+        polls = self.app.state.engine.state_polls.get()
+        changes = self.app.state.engine.state_changes.get()
+        # unchanged: 304 and the cached state
+        self.assertIs(await self.client.state("g1", "player1"), state)
+        self.assertEqual(self.app.state.engine.state_polls.get(), polls + 1)
+        self.assertEqual(self.app.state.engine.state_changes.get(), changes)
+        await self.client.play("g1", "player2", 9)
+        self.assertEqual((await self.client.state("g1", "player1")).visible_piles["phase1"], [9])
+
+    async def test_long_poll(self):
+        await self.start_game()
+        await self.client.state("g1", "player1")
+        waiting = asyncio.ensure_future(self.client.state("g1", "player1", wait=5))
+        await asyncio.sleep(0.05)
+        self.assertFalse(waiting.done())
+        await self.json_client.play("g1", "player2", 9)
+        state = await asyncio.wait_for(waiting, 1)
+        self.assertTrue(state.my_turn)
+        self.assertEqual(state.visible_piles["phase1"], [9])
+
+    async def test_long_poll_timeout(self):
+        await self.start_game()
+        state = await self.client.state("g1", "player1")
+        self.assertIs(await self.client.state("g1", "player1", wait=0.05), state)
+
+
+if __name__ == "__main__":
+    unittest.main()
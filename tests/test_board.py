@@ -0,0 +1,86 @@
+import unittest
+import xml.etree.ElementTree as ET
+from fastapi.testclient import TestClient
+from cribserver import board
+from cribserver.server import create_app, ServerConfig
+from cribserver.api_model import JoinRequest
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+
+class TestBoard(unittest.TestCase):
+    def circles(self, svg):
+        return ET.fromstring(svg).findall(f"{SVG}circle")
+
+    def test_bare_board(self):
+        circles = self.circles(board.render_board())
+        # 120 points x 3 tracks and the finish hole
+        self.assertEqual(len(circles), 361)
+        self.assertTrue(all(c.get("fill") == "none" for c in circles))
+
+    def test_pegs(self):
+        svg = board.render_board([5, 121])
+        self.assertTrue(svg.startswith(board.board_elements()))
+        pegs = self.circles(svg)[361:]
+        self.assertEqual([p.get("fill") for p in pegs], ["black", "red"])
+        self.assertEqual((float(pegs[1].get("cx")), float(pegs[1].get("cy"))), board.FINISH_HOLE)
+
+    def test_tracks_keep_their_color(self):
+        holes = {(round(x, 2), round(y, 2)): color for group in board.point_groups() for x, y, color in group}
+        for track, color in enumerate(board.TRACK_COLORS):
+            for score in range(1, 121):
+                x, y = board.peg_position(track, score)
+                self.assertEqual(holes[(x, y)], color, f"track {track} score {score}")
+
+    def test_path(self):
+        # black track: up the left column, across the top, down the right column
+        self.assertEqual(board.peg_position(0, 1), (board.START_X, board.START_Y))
+        self.assertGreater(board.peg_position(0, 0)[1], board.START_Y)
+        self.assertLess(board.peg_position(0, 35)[1], board.peg_position(0, 1)[1])
+        self.assertLess(board.peg_position(0, 36)[0], board.peg_position(0, 45)[0])
+        self.assertEqual(board.peg_position(0, 80)[1], board.START_Y)
+        self.assertGreater(board.peg_position(0, 81)[0], board.peg_position(0, 85)[0])
+        self.assertEqual(board.peg_position(0, 86), (board.START_X + board.GAP_BETWEEN_COLS, board.START_Y))
+
+    def test_endpoint(self):
+        app = create_app(ServerConfig(stats_file=None, setup_logging=False))
+        client = TestClient(app)
+        for player_id in ("p1", "p2"):
+            client.post("/games/g1/join", json=JoinRequest(player_id=player_id, name=player_id).model_dump())
+        response = client.get("/games/g1/board.svg")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "image/svg+xml")
+        self.assertEqual(response.headers["etag"], '"0-0"')
+        self.assertEqual(len(self.circles(response.text)), 363)
+        response = client.get("/games/g1/board.svg", headers={"If-None-Match": '"0-0"'})
+        self.assertEqual(response.status_code, 304)
+        app.state.engine.games["g1"].players[1].score = 7
+        response = client.get("/games/g1/board.svg", headers={"If-None-Match": '"0-0"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["etag"], '"0-7"')
+        self.assertEqual(client.get("/games/nope/board.svg").status_code, 404)
+
+    def test_hole_table(self):
+        tracks = board.hole_table()
+        self.assertEqual([len(holes) for holes in tracks], [122, 122, 122])
+        # every track ends in the shared finish hole, and no two scores share a hole otherwise
+        self.assertEqual({holes[121] for holes in tracks}, {board.FINISH_HOLE})
+        self.assertEqual(len({hole for holes in tracks for hole in holes[:121]}), 3 * 121)
+
+    def test_holes_endpoint(self):
+        client = TestClient(create_app(ServerConfig(stats_file=None, setup_logging=False)))
+        response = client.get("/board/holes.json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["cache-control"], "public, max-age=86400")
+        holes = response.json()
+        self.assertEqual([track["color"] for track in holes["tracks"]], list(board.TRACK_COLORS))
+        self.assertEqual(holes["tracks"][1]["holes"][30], list(board.peg_position(1, 30)))
+        response = client.get("/board/holes.json", headers={"If-None-Match": response.headers["etag"]})
+        self.assertEqual(response.status_code, 304)
+        response = client.get("/board/board.svg")
+        self.assertEqual(response.headers["content-type"], "image/svg+xml")
+        self.assertEqual(len(self.circles(response.text)), 361)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import unittest
+from unittest import mock
+import requests
+from cribserver.client import ServerConnection, STATE_HEADERS, next_poll, LONG_POLL_WAIT, IDLE_MIN, IDLE_MAX, CribbageClient, Panel
+from cribserver.api_model import PlayerState, CribbagePhase, Player
+
+
+def make_response(status_code, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    return response
+
+
+class TestServerConnection(unittest.TestCase):
+    def setUp(self):
+        self.connection = ServerConnection("http://cribserver:5000/", connect_timeout=1, read_timeout=2,
+                                           retries=2, backoff=0)
+
+    def tearDown(self):
+        self.connection.close()
+
+    def test_get_retries_connection_errors(self):
+        with mock.patch.object(self.connection.session, "get", side_effect=[
+                requests.ConnectionError(), requests.Timeout(), make_response(200)]) as get:
+            response = self.connection.get("/games/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get.call_count, 3)
+        get.assert_called_with("http://cribserver:5000/games/", timeout=(1, 2))
+
+    def test_get_gives_up(self):
+        with mock.patch.object(self.connection.session, "get", side_effect=requests.ConnectionError()) as get:
+            with self.assertRaises(requests.ConnectionError):
+                self.connection.get("/games/")
+        self.assertEqual(get.call_count, 3)
+
+    def test_get_retries_bad_gateway(self):
+        with mock.patch.object(self.connection.session, "get", side_effect=[
+                make_response(502), make_response(404)]) as get:
+            self.assertEqual(self.connection.get("/games/").status_code, 404)
+        self.assertEqual(get.call_count, 2)
+        with mock.patch.object(self.connection.session, "get", return_value=make_response(503)) as get:
+            self.assertEqual(self.connection.get("/games/").status_code, 503)
+        self.assertEqual(get.call_count, 3)
+
+    def test_retry_after(self):
+        self.assertEqual(self.connection.retry_delay(0, make_response(503, {"Retry-After": "2"})), 2)
+
+    def test_post_not_retried(self):
+        with mock.patch.object(self.connection.session, "post", side_effect=requests.ConnectionError()) as post:
+            with self.assertRaises(requests.ConnectionError):
+                self.connection.post("/games/g1/play", json={"player_id": "p1", "card_idx": 3})
+        self.assertEqual(post.call_count, 1)
+
+    def test_shared_session(self):
+        self.assertEqual(self.connection.session.headers["Accept"], STATE_HEADERS["Accept"])
+        adapter = self.connection.session.get_adapter("http://cribserver:5000/")
+        self.assertIs(adapter, self.connection.session.get_adapter("https://cribserver:5000/"))
+
+
+class TestAdaptivePolling(unittest.TestCase):
+    def state(self, phase, my_turn=False, hand=()):
+        return PlayerState(game_id="g1", players=[], visible_piles={"p1": list(hand)},
+                           my_turn=my_turn, phase=phase)
+
+    def test_long_poll_on_opponent(self):
+        for state in (self.state(CribbagePhase.JOIN),
+                      self.state(CribbagePhase.COUNT, my_turn=False, hand=[1, 2]),
+                      self.state(CribbagePhase.DISCARD, hand=[1, 2, 3, 4])):
+            self.assertEqual(next_poll(state, "p1", changed=False, idle=IDLE_MAX), (LONG_POLL_WAIT, 0, IDLE_MIN))
+
+    def test_idle_backoff(self):
+        state = self.state(CribbagePhase.COUNT, my_turn=True, hand=[1, 2])
+        wait, delay, idle = next_poll(state, "p1", changed=False, idle=IDLE_MIN)
+        self.assertEqual(wait, 0)
+        self.assertGreater(delay, IDLE_MIN)
+        for _ in range(20):
+            wait, delay, idle = next_poll(state, "p1", changed=False, idle=idle)
+        self.assertEqual(delay, IDLE_MAX)
+        self.assertEqual(next_poll(state, "p1", changed=True, idle=idle), (0, IDLE_MIN, IDLE_MIN))
+        discard = self.state(CribbagePhase.DISCARD, hand=range(6))
+        self.assertEqual(next_poll(discard, "p1", changed=True, idle=idle)[0], 0)
+        self.assertEqual(next_poll(self.state(CribbagePhase.DONE), "p1", changed=True, idle=idle)[0], 0)
+
+
+class StubWindow:
+    """records what a panel does to its curses window"""
+    def __init__(self, height, width):
+        self.height, self.width = height, width
+        self.erased = 0
+        self.refreshed = 0
+        self.text = []
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def erase(self):
+        self.erased += 1
+        self.text = []
+
+    def clear(self):
+        self.erase()
+
+    def addstr(self, y, x, text, attr=0):
+        self.text.append(text)
+
+    def noutrefresh(self):
+        self.refreshed += 1
+
+
+@mock.patch("cribserver.client.curses.color_pair", lambda n: 0)
+@mock.patch("cribserver.client.curses.doupdate")
+@mock.patch("cribserver.client.curses.newwin", lambda height, width, y, x: StubWindow(height, width))
+class TestPanels(unittest.TestCase):
+    def test_panel_update(self, doupdate):
+        panel = Panel(1, 80, 0, 0)
+        render = mock.Mock()
+        panel.update("a", render)
+        panel.update("a", render)
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual((panel.win.erased, panel.win.refreshed), (1, 1))
+        panel.update("b", render)
+        self.assertEqual(render.call_count, 2)
+        self.assertEqual((panel.win.erased, panel.win.refreshed), (2, 2))
+
+    def make_client(self):
+        # skip __init__: it joins a game and starts the poll thread
+        client = CribbageClient.__new__(CribbageClient)
+        client.stdscr = StubWindow(24, 80)
+        client.player_id, client.player_name, client.game_id = "p1", "P1", "g1"
+        client.message = "Joined"
+        client.input_buffer = ""
+        client.player_state = PlayerState(
+            game_id="g1", players=[Player(player_id="p1", name="P1"), Player(player_id="p2", name="P2")],
+            visible_piles={"p1": [0, 1, 2, 3, 4, 5]}, is_dealer=True, my_turn=False,
+            phase=CribbagePhase.DISCARD, game_log=["game.phase -> DISCARD"])
+        client.layout()
+        return client
+
+    def test_only_changed_panels_redrawn(self, doupdate):
+        client = self.make_client()
+        client.draw()
+        windows = {name: panel.win for name, panel in client.panels.items()}
+        self.assertTrue(all(win.erased == 1 for win in windows.values()))
+        self.assertIn("Your Hand:", windows["hand"].text)
+
+        # nothing changed: no panel is touched, the terminal is still updated once
+        client.draw()
+        self.assertTrue(all(win.erased == 1 for win in windows.values()))
+        self.assertEqual(doupdate.call_count, 2)
+
+        # a discard changes the hand and the log, the score stays
+        client.player_state = client.player_state.model_copy(update={
+            "visible_piles": {"p1": [2, 3, 4, 5]},
+            "game_log": ["game.phase -> DISCARD", "Player P1 discarded 2 cards"],
+            })
+        client.message = "Discarded"
+        client.draw()
+        redrawn = {name for name, win in windows.items() if win.erased == 2}
+        self.assertEqual(redrawn, {"hand", "log", "message"})
+        self.assertIn("Player P1 discarded 2 cards", windows["log"].text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+from cribserver.engine import CribbageEngine, ServerConfig
+from cribserver.api_model import CribbagePhase
+
+
+class TestEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = CribbageEngine(ServerConfig(stats_file=None, setup_logging=False))
+        self.game = self.engine.add_player("g1", "a", "A")
+        self.engine.add_player("g1", "b", "B")
+        for player_id in ("a", "b"):
+            self.engine.discard(self.game, player_id, self.game.deck.piles[player_id][:2])
+
+    def test_go_when_opponent_out_of_cards(self):
+        game = self.game
+        piles = game.deck.piles
+        # count is 20. A plays the queen for 30 and keeps a 4, B has no cards left
+        piles["phase1"] = [9, 10]
+        game.phase1_count = 20
+        piles["a"] = [11, 16]
+        piles["b"] = []
+        game.current_turn = "a"
+        game.update_legal_cards()
+        self.engine.play(game, "a", 11)
+        self.assertEqual(game.phase, CribbagePhase.COUNT)
+        # A gets the Go and starts the next count instead of passing the turn to B
+        self.assertEqual(game.current_turn, "a")
+        self.assertEqual(piles["phase1"], [])
+        self.assertEqual(game.legal_cards["a"], [16])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+from fastapi.testclient import TestClient
+from cribserver.leaderboard import Leaderboard
+from cribserver.matchmaking import MIN_RATED_GAMES
+from cribserver.server import create_app, ServerConfig
+
+
+def record(wins, games):
+    return {"name": "x", "wins": wins, "games_played": games}
+
+
+class TestLeaderboard(unittest.TestCase):
+    def test_order_and_rank(self):
+        board = Leaderboard()
+        board.update("a", record(5, 10))
+        board.update("b", record(9, 10))
+        board.update("c", record(10, 20))
+        board.update("new", record(1, MIN_RATED_GAMES - 1))
+        # same win rate: more wins first
+        self.assertEqual(board.top(10), ["b", "c", "a"])
+        self.assertEqual(board.top(1), ["b"])
+        self.assertEqual([board.rank(p) for p in ("a", "b", "c", "new")], [3, 1, 2, None])
+
+    def test_update_moves_player(self):
+        board = Leaderboard()
+        board.update("a", record(5, 10))
+        board.update("b", record(6, 10))
+        board.update("a", record(8, 11))
+        self.assertEqual(board.top(10), ["a", "b"])
+        self.assertEqual(len(board), 2)
+        board.remove("a")
+        self.assertEqual(board.top(10), ["b"])
+        self.assertIsNone(board.rank("a"))
+
+
+class TestLeaderboardEndpoints(unittest.TestCase):
+    def test_endpoints(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            stats_file = os.path.join(tmp, "stats.json")
+            with open(stats_file, "w") as f:
+                json.dump({f"p{i}": {"name": f"P{i}", "wins": i, "games_played": 10} for i in range(8)}, f)
+            app = create_app(ServerConfig(stats_file=stats_file, setup_logging=False))
+            with TestClient(app) as client:
+                body = client.get("/leaderboard", params={"limit": 3}).json()
+                self.assertEqual(body["total"], 8)
+                self.assertEqual([(p["rank"], p["player_id"]) for p in body["players"]], [(1, "p7"), (2, "p6"), (3, "p5")])
+                self.assertEqual(body["players"][0]["win_rate"], 0.7)
+                response = client.get("/players/p2/rank")
+                self.assertEqual(response.json()["rank"], 6)
+                self.assertEqual(client.get("/players/nobody/rank").status_code, 404)
+                self.assertEqual(client.get("/leaderboard", params={"limit": 0}).status_code, 422)
+
+    def test_updated_when_game_finishes(self):
+        app = create_app(ServerConfig(stats_file=None, setup_logging=False))
+        engine = app.state.engine
+        for n in range(MIN_RATED_GAMES):
+            game = engine.add_player(f"g{n}", "p1", "P1")
+            engine.add_player(game.game_id, "p2", "P2")
+            engine.finish_game(game, game.players[0])
+        self.assertEqual(engine.leaderboard.top(10), ["p1", "p2"])
+        self.assertEqual(TestClient(app).get("/players/p2/rank").json()["win_rate"], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
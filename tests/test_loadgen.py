@@ -0,0 +1,33 @@
+import unittest
+import httpx
+from cribserver.server import create_app, ServerConfig
+from cribserver.aioclient import AsyncCribbageClient
+from cribserver.api_model import CribbagePhase
+from cribserver.loadgen import run_load, percentile, format_report
+
+
+class TestLoadGenerator(unittest.IsolatedAsyncioTestCase):
+    async def test_run_load(self):
+        app = create_app(ServerConfig(stats_file=None, setup_logging=False))
+        async with AsyncCribbageClient("http://cribserver", transport=httpx.ASGITransport(app=app)) as client:
+            report = await run_load(client, players=4, duration=30, games=2)
+        self.assertEqual(report["games"], 4)
+        self.assertEqual(report["failed_games"], 0)
+        games = app.state.engine.games
+        self.assertEqual(len(games), 4)
+        self.assertTrue(all(game.phase == CribbagePhase.DONE for game in games.values()))
+        self.assertEqual(report["endpoints"]["join"]["requests"], 8)
+        self.assertEqual(report["endpoints"]["discard"]["requests"], 8)
+        self.assertEqual(report["endpoints"]["play"]["error_rate"], 0)
+        self.assertIn("games/min", format_report(report))
+
+    def test_percentile(self):
+        values = [float(v) for v in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([3.0], 95), 3)
+        self.assertEqual(percentile([], 95), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
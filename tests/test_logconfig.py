@@ -0,0 +1,74 @@
+import json
+import logging
+import os
+import tempfile
+import unittest
+from fastapi.testclient import TestClient
+from cribserver import logconfig
+from cribserver.server import create_app, ServerConfig, DeckCreator
+from cribserver.cards import Deck
+from cribserver.api_model import JoinRequest, DiscardRequest, PlayRequest
+
+# GAME1 from test_server_game_log
+PLAYS = [("player2", 9), ("player1", 4), ("player2", 7), ("player1", 6),
+         ("player2", 3), ("player1", 10), ("player2", 5), ("player1", 8)]
+
+
+class TestLogging(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.archive_path = os.path.join(self.tmpdir.name, "archive.jsonl")
+
+    def tearDown(self):
+        logconfig.stop_logging()
+        # back to the import-time defaults
+        for category in logconfig.DEFAULT_LEVELS:
+            logging.getLogger(category).setLevel(logging.NOTSET)
+        logging.getLogger(logconfig.REJECTED).filters = []
+        root = logging.getLogger(logconfig.ROOT)
+        root.handlers = []
+        root.propagate = True
+        self.tmpdir.cleanup()
+
+    def test_parse_levels(self):
+        self.assertEqual(logconfig.parse_levels("rejected=debug, cribserver.game=WARNING,bogus"), {
+            "cribserver.rejected": "DEBUG",
+            "cribserver.game": "WARNING",
+            })
+
+    def test_sampling(self):
+        sampler = logconfig.SamplingFilter(3)
+        record = logging.LogRecord("x", logging.INFO, "", 0, "m", None, None)
+        self.assertEqual([sampler.filter(record) for _ in range(7)], [True, False, False, True, False, False, True])
+        self.assertEqual(record.fields["sampled"], 3)
+
+    def test_archive(self):
+        logconfig.setup_logging(levels={logconfig.GAME: "WARNING"}, archive_path=self.archive_path)
+        deck = Deck()
+        deck.piles[Deck.REMAINING] = list(range(13))
+        deck.shuffle = lambda: None
+        deck_creator = DeckCreator()
+        deck_creator.create_deck = lambda: deck
+        # logging was set up above, with the archive
+        client = TestClient(create_app(ServerConfig(stats_file=None, setup_logging=False), deck_creator))
+        for player_id, name in (("player1", "P1"), ("player2", "P2")):
+            client.post("/games/test_game/join", json=JoinRequest(player_id=player_id, name=name).model_dump())
+        for player_id, cards in (("player1", [0, 2]), ("player2", [11, 1])):
+            client.post("/games/test_game/discard", json=DiscardRequest(player_id=player_id, card_indices=cards).model_dump())
+        for player_id, card_idx in PLAYS:
+            client.post("/games/test_game/play", json=PlayRequest(player_id=player_id, card_idx=card_idx).model_dump())
+        logconfig.stop_logging()
+
+        with open(self.archive_path) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 1)
+        record = records[0]
+        self.assertEqual(record["game_id"], "test_game")
+        self.assertEqual(record["winner"], "player1")
+        self.assertEqual(record["actions"][:3], ["JOIN,player1,test_game", "JOIN,player2,test_game", "DEAL,player1, AC"])
+        self.assertEqual(record["actions"][-1], "PLAY,player1, 9C")
+        self.assertEqual(record["public_log"][-1], "game.phase -> DONE")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+from fastapi.testclient import TestClient
+from cribserver.metrics import Registry, Counter, Histogram
+from cribserver.server import create_app, ServerConfig
+from cribserver.api_model import JoinRequest
+
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_render(self):
+        registry = Registry()
+        histogram = registry.add(Histogram("h", "help text", buckets=(0.1, 1.0)))
+        counter = registry.add(Counter("c_total", "a counter"))
+        histogram.observe(0.05, route="/a")
+        histogram.observe(0.5, route="/a")
+        histogram.observe(5, route="/a")
+        counter.inc(3)
+        self.assertEqual(registry.render().splitlines(), [
+            "# HELP h help text",
+            "# TYPE h histogram",
+            'h_bucket{route="/a",le="0.1"} 1',
+            'h_bucket{route="/a",le="1.0"} 2',
+            'h_bucket{route="/a",le="+Inf"} 3',
+            'h_sum{route="/a"} 5.55',
+            'h_count{route="/a"} 3',
+            "# HELP c_total a counter",
+            "# TYPE c_total counter",
+            "c_total 3",
+            ])
+
+    def test_endpoint(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        # a stats file, so joins go through save_stats
+        config = ServerConfig(stats_file=os.path.join(tmpdir.name, "stats.json"), setup_logging=False)
+        client = TestClient(create_app(config))
+        client.post("/games/g1/join", json=JoinRequest(player_id="p1", name="P1").model_dump())
+        client.post("/games/g1/join", json=JoinRequest(player_id="p2", name="P2").model_dump())
+        client.get("/games/g1/p1/state")
+        client.get("/games/g1/p1/state")
+
+        text = client.get("/metrics").text
+        self.assertIn('cribserver_request_duration_seconds_count{method="POST",route="/games/{game_id}/join"}', text)
+        self.assertIn('cribserver_games{phase="DISCARD"} 1', text)
+        self.assertIn("cribserver_save_stats_seconds_count", text)
+        self.assertIn("cribserver_state_poll_change_ratio", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import asyncio
+import os
+import unittest
+from unittest import mock
+import httpx
+from fastapi.testclient import TestClient
+from cribserver.server import create_app, ServerConfig, ADMIN_TOKEN_ENV
+from cribserver.api_model import JoinRequest
+
+HEADERS = {"X-Admin-Token": "secret"}
+
+
+def make_client(**config):
+    return TestClient(create_app(ServerConfig(stats_file=None, setup_logging=False, **config)))
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.client = make_client(admin_token="secret")
+
+    def test_admin_token(self):
+        with mock.patch.dict(os.environ, {}, clear=False):
+            os.environ.pop(ADMIN_TOKEN_ENV, None)
+            client = make_client()
+        self.assertEqual(client.get("/admin/profile", params={"seconds": 0.01}).status_code, 404)
+        # no profiler hook without the admin endpoints
+        self.assertIsNone(client.app.user_middleware[0].kwargs["request_profiler"])
+        with mock.patch.dict(os.environ, {ADMIN_TOKEN_ENV: "secret"}):
+            client = make_client()
+        response = client.get("/admin/profile", params={"seconds": 0.01}, headers={"X-Admin-Token": "wrong"})
+        self.assertEqual(response.status_code, 403)
+
+    def test_sampling(self):
+        response = self.client.get("/admin/profile", params={"seconds": 0.05}, headers=HEADERS)
+        self.assertEqual(response.status_code, 200)
+        # the event loop thread is waiting on the sampler
+        line = response.text.splitlines()[0]
+        stack, count = line.rsplit(" ", 1)
+        self.assertIn(";", stack)
+        self.assertGreater(int(count), 0)
+
+    def test_request_profile(self):
+        response = self.client.post("/admin/profile/requests", params={"path": "/state$"}, headers=HEADERS)
+        self.assertEqual(response.status_code, 200)
+        self.client.post("/games/g1/join", json=JoinRequest(player_id="p1", name="P1").model_dump())
+        self.client.get("/games/g1/p1/state")
+        self.client.get("/games/g1/p1/state")
+        reports = self.client.get("/admin/profile/requests", headers=HEADERS).json()
+        self.assertEqual(len(reports), 1)
+        self.assertEqual(reports[0]["path"], "/games/g1/p1/state")
+        self.assertIn("function calls", reports[0]["report"])
+
+    def test_bad_pattern(self):
+        response = self.client.post("/admin/profile/requests", params={"path": "(unclosed"}, headers=HEADERS)
+        self.assertEqual(response.status_code, 400)
+
+
+class TestConcurrentProfiles(unittest.IsolatedAsyncioTestCase):
+    async def test_one_capture_at_a_time(self):
+        app = create_app(ServerConfig(stats_file=None, setup_logging=False, poll_rate=None, admin_token="secret"))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://cribserver") as client:
+            await client.post("/games/g1/join", json=JoinRequest(player_id="p1", name="P1").model_dump())
+            etag = (await client.get("/games/g1/p1/state")).headers["etag"]
+            await client.post("/admin/profile/requests", params={"path": "/state$", "count": 2}, headers=HEADERS)
+            # two long-polls overlap: the second runs unprofiled instead of failing
+            poll = lambda: client.get("/games/g1/p1/state", params={"wait": 0.1}, headers={"If-None-Match": etag})
+            responses = await asyncio.gather(poll(), poll())
+            self.assertEqual([r.status_code for r in responses], [304, 304])
+            reports = (await client.get("/admin/profile/requests", headers=HEADERS)).json()
+        self.assertEqual(len(reports), 1)
+        # the skipped request didn't use up the count
+        self.assertEqual(app.state.request_profiler.remaining, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+from fastapi.testclient import TestClient
+from cribserver.server import create_app, ServerConfig, is_long_poll
+from cribserver.ratelimit import RateLimiter, poll_key
+from cribserver.api_model import JoinRequest
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_token_bucket(self):
+        limiter = RateLimiter(rate=2, burst=3)
+        self.assertEqual([limiter.check("p1", now=0) for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(limiter.check("p1", now=0), 0.5)
+        # other keys have their own bucket
+        self.assertEqual(limiter.check("p2", now=0), 0)
+        # refilled at 2 per second
+        self.assertEqual(limiter.check("p1", now=0.5), 0)
+        self.assertGreater(limiter.check("p1", now=0.5), 0)
+
+    def test_max_keys(self):
+        limiter = RateLimiter(rate=1, burst=1, max_keys=2)
+        for key in ("a", "b", "c"):
+            limiter.check(key, now=0)
+        self.assertEqual(list(limiter.buckets), ["b", "c"])
+
+    def test_poll_key(self):
+        self.assertEqual(poll_key("GET", "/games/g1/p1/state", "10.0.0.2"), "player:10.0.0.2/p1")
+        self.assertEqual(poll_key("GET", "/games/", "10.0.0.2"), "addr:10.0.0.2")
+        self.assertIsNone(poll_key("POST", "/games/g1/play", "10.0.0.2"))
+
+    def test_long_poll(self):
+        self.assertTrue(is_long_poll({"query_string": b"wait=25"}))
+        self.assertFalse(is_long_poll({"query_string": b"wait=0"}))
+        self.assertFalse(is_long_poll({"query_string": b"wait=soon"}))
+        self.assertFalse(is_long_poll({"query_string": b""}))
+
+
+class TestServerRateLimit(unittest.TestCase):
+    def make_client(self, **config):
+        app = create_app(ServerConfig(stats_file=None, setup_logging=False, **config))
+        client = TestClient(app)
+        request = JoinRequest(player_id="p1", name="P1")
+        self.assertEqual(client.post("/games/g1/join", json=request.model_dump()).status_code, 200)
+        return app, client
+
+    def test_too_many_polls(self):
+        app, client = self.make_client(poll_rate=0.5, poll_burst=2)
+        self.assertEqual(client.get("/games/g1/p1/state").status_code, 200)
+        self.assertEqual(client.get("/games/g1/p1/state").status_code, 200)
+        response = client.get("/games/g1/p1/state")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["retry-after"], "2")
+        # polling as p1 from another address doesn't use up p1's bucket
+        other = TestClient(app, client=("10.0.0.9", 50000))
+        self.assertEqual(other.get("/games/g1/p1/state").status_code, 200)
+        # actions are unaffected
+        request = JoinRequest(player_id="p2", name="P2")
+        self.assertEqual(client.post("/games/g1/join", json=request.model_dump()).status_code, 200)
+        self.assertEqual(app.state.engine.rejected_requests.get(reason="rate_limited"), 1)
+
+    def test_changing_player_ids(self):
+        app, client = self.make_client(address_poll_rate=0.5, address_poll_burst=3)
+        statuses = [client.get(f"/games/g1/bot{i}/state").status_code for i in range(5)]
+        # a fresh player bucket each time, but one budget for the address
+        self.assertEqual(statuses, [200, 200, 200, 429, 429])
+        other = TestClient(app, client=("10.0.0.9", 50000))
+        self.assertEqual(other.get("/games/g1/bot9/state").status_code, 200)
+
+    def test_overload_sheds_polls(self):
+        app, client = self.make_client(poll_rate=None)
+        app.state.load_shedder.inflight = app.state.load_shedder.max_inflight
+        response = client.get("/games/g1/p1/state")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["retry-after"], "1")
+        request = JoinRequest(player_id="p2", name="P2")
+        self.assertEqual(client.post("/games/g1/join", json=request.model_dump()).status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import random
+import unittest
+from cribserver import rating
+from cribserver.matchmaking import MIN_RATED_GAMES, skill_bucket
+from cribserver.replay import RecordingEngine
+
+
+class TestRating(unittest.TestCase):
+    def test_rate_game(self):
+        self.assertEqual(rating.expected_score(1500, 1500), 0.5)
+        self.assertEqual(rating.rate_game(1500, 1500), (1516.0, 1484.0))
+        # an upset moves more points than a favourite winning
+        favourite, underdog = rating.rate_game(1700, 1300)
+        upset_winner, upset_loser = rating.rate_game(1300, 1700)
+        self.assertLess(favourite - 1700, upset_winner - 1300)
+        self.assertAlmostEqual(favourite + underdog, 3000)
+        self.assertAlmostEqual(upset_winner + upset_loser, 3000)
+
+    def test_engine_and_history_agree(self):
+        random.seed(3)
+        engine = RecordingEngine()
+        players = ["a", "b", "c"]
+        for n in range(30):
+            p1, p2 = random.sample(players, 2)
+            game = engine.add_player(f"g{n}", p1, p1.upper())
+            engine.add_player(game.game_id, p2, p2.upper())
+            engine.finish_game(game, random.choice(game.players))
+        ratings = rating.rate_history(rating.archive_results(engine.records))
+        self.assertEqual(len(engine.records), 30)
+        for player_id in players:
+            self.assertAlmostEqual(engine.player_stats[player_id]["rating"], ratings[player_id])
+        # ratings are zero sum
+        self.assertAlmostEqual(sum(ratings.values()), 3 * rating.DEFAULT_RATING)
+        # and feed the leaderboard
+        best = max(players, key=ratings.get)
+        self.assertEqual(engine.leaderboard.top(1), [best])
+
+    def test_skill_bucket(self):
+        rated = {"name": "P", "wins": 5, "games_played": MIN_RATED_GAMES, "rating": 1720}
+        self.assertEqual(skill_bucket(rated), 1)
+        self.assertEqual(skill_bucket(dict(rated, rating=1350)), -1)
+        self.assertEqual(skill_bucket(dict(rated, games_played=1)), "new")
+        # from before ratings
+        self.assertEqual(skill_bucket({"name": "P", "wins": 9, "games_played": 10}), ("win_rate", 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
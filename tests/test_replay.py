@@ -0,0 +1,81 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+from cribserver import replay
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        random.seed(7)
+        self.hands = list(replay.generate(20))
+        self.matches = list(replay.generate(2, match=True))
+
+    def test_generated_games_replay_clean(self):
+        report = replay.replay(replay.group_games(self.hands + self.matches))
+        self.assertEqual(report.failures, [])
+        self.assertEqual(report.games, 22)
+        self.assertEqual(report.hands, 20 + len(self.matches))
+        self.assertGreater(len(self.matches), 2)
+
+    def test_corpus_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "corpus.jsonl")
+            with open(path, "w") as f:
+                for record in self.matches:
+                    f.write(json.dumps(record) + "\n")
+            games = list(replay.group_games(replay.read_records([path])))
+        self.assertEqual(games, list(replay.group_games(self.matches)))
+        self.assertEqual(len(games), 2)
+        self.assertEqual(replay.replay(games).failures, [])
+
+    def test_interleaved_archive(self):
+        first, second = list(replay.group_games(self.matches))
+        interleaved = [record for pair in zip(first, second) for record in pair]
+        interleaved += first[len(second):] + second[len(first):]
+        games = list(replay.group_games(interleaved))
+        self.assertEqual(sorted(len(game) for game in games), sorted([len(first), len(second)]))
+        self.assertEqual(replay.replay(games).failures, [])
+
+    def test_public_log_mismatch(self):
+        record = dict(self.hands[0])
+        record["public_log"] = record["public_log"][:-1] + ["Player Bot 9 wins"]
+        failures = replay.Replayer().replay_game([record])
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(failures[0].hand, 1)
+        self.assertTrue(failures[0].detail.startswith("public_log["))
+        self.assertIn("Bot 9", failures[0].detail)
+
+    def test_score_mismatch(self):
+        record = dict(self.hands[0])
+        record["players"] = [dict(p, score=p["score"] + 1) for p in record["players"]]
+        failures = replay.Replayer().replay_game([record])
+        self.assertTrue(failures[0].detail.startswith("players[0]: expected"))
+
+    def test_illegal_action(self):
+        record = dict(self.hands[0])
+        plays = [i for i, line in enumerate(record["actions"]) if line.startswith("PLAY,")]
+        actions = list(record["actions"])
+        actions[plays[0]], actions[plays[1]] = actions[plays[1]], actions[plays[0]]
+        record["actions"] = actions
+        failures = replay.Replayer().replay_game([record])
+        self.assertIn("rejected: Not your turn", failures[0].detail)
+
+    def test_unfinished_hand(self):
+        record = dict(self.hands[0])
+        record["actions"] = record["actions"][:-1]
+        failures = replay.Replayer().replay_game([record])
+        self.assertEqual(failures[0].detail, "hand not finished after its recorded actions")
+
+    def test_replayer_reuse(self):
+        # a replayer forgets each game, so the same game_id can be replayed again
+        replayer = replay.Replayer()
+        for _ in range(2):
+            self.assertEqual(replayer.replay_game(self.hands[:1]), [])
+        self.assertEqual(replayer.games, {})
+        self.assertEqual(replayer.player_stats, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
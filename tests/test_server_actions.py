@@ -0,0 +1,111 @@
+import unittest
+from fastapi.testclient import TestClient
+from cribserver.server import create_app, ServerConfig, DeckCreator
+from cribserver.cards import Deck
+from cribserver.api_model import JoinRequest, ActionBatchRequest, Action, ActionType, CribbagePhase, GoRequest, MAX_BATCH_ACTIONS
+
+
+class TestActionBatch(unittest.TestCase):
+    def setUp(self):
+        # Ace to King of Clubs: P1 gets even cards, P2 odd cards, starter KC
+        self.deck = Deck()
+        self.deck.piles[Deck.REMAINING] = list(range(13))
+        self.deck.shuffle = lambda: None
+        deck_creator = DeckCreator()
+        deck_creator.create_deck = lambda: self.deck
+        app = create_app(ServerConfig(stats_file=None, setup_logging=False), deck_creator)
+        self.engine = app.state.engine
+        self.client = TestClient(app)
+        for player_id, name in (("player1", "P1"), ("player2", "P2")):
+            request = JoinRequest(player_id=player_id, name=name)
+            self.client.post("/games/test_game/join", json=request.model_dump())
+
+    def batch(self, player_id, actions):
+        request = ActionBatchRequest(player_id=player_id, actions=actions)
+        response = self.client.post("/games/test_game/actions", json=request.model_dump(mode="json"))
+        self.assertEqual(response.status_code, 200, response.text)
+        return response.json()
+
+    def test_batch(self):
+        result = self.batch("player1", [Action(type=ActionType.DISCARD, card_indices=[0, 2])])
+        self.assertEqual(result["applied"], 1)
+        self.assertEqual(result["errors"], [])
+        self.assertEqual(result["state"]["visible_piles"]["player1"], [4, 6, 8, 10])
+
+        result = self.batch("player2", [
+            Action(type=ActionType.DISCARD, card_indices=[11, 1]),
+            Action(type=ActionType.PLAY, card_idx=9),
+            ])
+        self.assertEqual(result["applied"], 2)
+        self.assertEqual(result["state"]["phase"], CribbagePhase.COUNT.value)
+        self.assertEqual(result["state"]["visible_piles"]["phase1"], [9])
+
+        # second play fails: it is P2's turn again after 5C
+        result = self.batch("player1", [
+            Action(type=ActionType.PLAY, card_idx=4),
+            Action(type=ActionType.PLAY, card_idx=6),
+            Action(type=ActionType.PLAY, card_idx=8),
+            ])
+        self.assertEqual(result["applied"], 1)
+        self.assertEqual(result["errors"], [{"index": 1, "status_code": 400, "detail": "Not your turn"}])
+        self.assertEqual(result["state"]["players"][0]["score"], 2)
+        self.assertEqual(result["state"]["visible_piles"]["player1"], [6, 8, 10])
+
+        # P2 still holds playable cards
+        result = self.batch("player2", [Action(type=ActionType.GO)])
+        self.assertEqual(result["errors"][0]["detail"], "You have a playable card")
+        # and only the player on turn can say Go
+        result = self.batch("player1", [Action(type=ActionType.GO)])
+        self.assertEqual(result["applied"], 0)
+        self.assertEqual(result["errors"][0]["detail"], "Not your turn")
+        response = self.client.post("/games/test_game/go", json=GoRequest(player_id="player1").model_dump())
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["detail"], "Not your turn")
+
+    def test_go(self):
+        self.batch("player1", [Action(type=ActionType.DISCARD, card_indices=[0, 2])])
+        self.batch("player2", [Action(type=ActionType.DISCARD, card_indices=[11, 1])])
+        for player_id, card_idx in (("player2", 9), ("player1", 4), ("player2", 7), ("player1", 6),
+                                    ("player2", 3), ("player1", 10), ("player2", 5)):
+            self.batch(player_id, [Action(type=ActionType.PLAY, card_idx=card_idx)])
+        # P2 is out of cards and P1 plays on: Go is accepted and changes nothing
+        game = self.engine.games["test_game"]
+        version = game.version
+        response = self.client.post("/games/test_game/go", json=GoRequest(player_id="player2").model_dump())
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertFalse(response.json()["my_turn"])
+        result = self.batch("player2", [Action(type=ActionType.GO), Action(type=ActionType.GO)])
+        self.assertEqual((result["applied"], result["errors"]), (2, []))
+        self.assertEqual((game.version, game.current_turn), (version, "player1"))
+
+    def test_legal_cards(self):
+        self.batch("player1", [Action(type=ActionType.DISCARD, card_indices=[0, 2])])
+        self.batch("player2", [Action(type=ActionType.DISCARD, card_indices=[11, 1]), Action(type=ActionType.PLAY, card_idx=9)])
+        state = self.batch("player1", [Action(type=ActionType.PLAY, card_idx=4)])["state"]
+        self.assertEqual(state["legal_cards"], [])
+        state = self.batch("player2", [Action(type=ActionType.PLAY, card_idx=7)])["state"]
+        self.assertEqual(state["legal_cards"], [])
+
+        # count is 23: only 7C fits for P1
+        state = self.client.get("/games/test_game/player1/state").json()
+        self.assertTrue(state["my_turn"])
+        self.assertEqual(state["legal_cards"], [6])
+        response = self.client.post("/games/test_game/go", json=GoRequest(player_id="player1").model_dump())
+        self.assertEqual(response.status_code, 400)
+        result = self.batch("player1", [Action(type=ActionType.PLAY, card_idx=8)])
+        self.assertEqual(result["errors"][0]["detail"], "Card exceeds 31")
+
+        # 7C makes 30, nobody can play: Go point and the count restarts
+        state = self.batch("player1", [Action(type=ActionType.PLAY, card_idx=6)])["state"]
+        self.assertEqual(state["players"][0]["score"], 3)
+        state = self.client.get("/games/test_game/player2/state").json()
+        self.assertEqual(state["legal_cards"], [3, 5])
+
+    def test_batch_size_limit(self):
+        actions = [{"type": "go"}] * (MAX_BATCH_ACTIONS + 1)
+        response = self.client.post("/games/test_game/actions", json={"player_id": "player1", "actions": actions})
+        self.assertEqual(response.status_code, 422)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import json
+import os
+import tempfile
+import unittest
+from fastapi.testclient import TestClient
+from cribserver.server import create_app, ServerConfig
+from cribserver.api_model import JoinRequest
+
+
+class TestAppFactory(unittest.TestCase):
+    def join(self, client, game_id, player_id):
+        request = JoinRequest(player_id=player_id, name=player_id.upper())
+        response = client.post(f"/games/{game_id}/join", json=request.model_dump())
+        self.assertEqual(response.status_code, 200, response.text)
+
+    def test_apps_are_isolated(self):
+        app1 = create_app(ServerConfig(stats_file=None, setup_logging=False))
+        app2 = create_app(ServerConfig(stats_file=None, setup_logging=False))
+        self.join(TestClient(app1), "g1", "p1")
+        self.assertIn("g1", app1.state.engine.games)
+        self.assertEqual(app2.state.engine.games, {})
+        self.assertEqual(TestClient(app2).get("/games/").json()["games"], [])
+
+    def test_stats_loaded_at_startup(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            stats_file = os.path.join(tmp, "stats.json")
+            with open(stats_file, "w") as f:
+                json.dump({"p1": {"name": "P1", "games_played": 3, "wins": 1}}, f)
+            app = create_app(ServerConfig(stats_file=stats_file, setup_logging=False))
+            # nothing is read until the app starts
+            self.assertEqual(app.state.engine.player_stats, {})
+            with TestClient(app) as client:
+                self.assertEqual(client.get("/players/p1/stats").json()["games_played"], 3)
+
+    def test_admin_token_from_config(self):
+        app = create_app(ServerConfig(stats_file=None, setup_logging=False, admin_token="secret"))
+        client = TestClient(app)
+        self.assertEqual(client.get("/admin/profile/requests").status_code, 403)
+        response = client.get("/admin/profile/requests", headers={"X-Admin-Token": "secret"})
+        self.assertEqual(response.status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
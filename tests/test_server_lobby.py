@@ -0,0 +1,57 @@
+import unittest
+from fastapi.testclient import TestClient
+from cribserver.server import create_app, ServerConfig
+from cribserver.api_model import JoinRequest, CribbagePhase
+
+
+class TestLobby(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(create_app(ServerConfig(stats_file=None, setup_logging=False)))
+
+    def join(self, game_id, player_id):
+        request = JoinRequest(player_id=player_id, name=player_id.upper())
+        response = self.client.post(f"/games/{game_id}/join", json=request.model_dump())
+        self.assertEqual(response.status_code, 200, response.text)
+
+    def test_filters(self):
+        self.join("full", "p1")
+        self.join("full", "p2")
+        self.join("open1", "p3")
+        self.join("open2", "p4")
+
+        response = self.client.get("/games/")
+        self.assertEqual(response.status_code, 200)
+        page = response.json()
+        self.assertEqual([g["game_id"] for g in page["games"]], ["full", "open1", "open2"])
+        self.assertIsNone(page["next_cursor"])
+
+        page = self.client.get("/games/", params={"open": "true"}).json()
+        self.assertEqual([g["game_id"] for g in page["games"]], ["open1", "open2"])
+        self.assertEqual(page["games"][0]["player_count"], 1)
+
+        page = self.client.get("/games/", params={"phase": "DISCARD"}).json()
+        self.assertEqual([g["game_id"] for g in page["games"]], ["full"])
+        self.assertEqual(page["games"][0]["phase"], CribbagePhase.DISCARD.value)
+
+        response = self.client.get("/games/", params={"phase": "BOGUS"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_pagination(self):
+        for i in range(5):
+            self.join(f"game{i}", f"p{i}")
+        seen = []
+        cursor = 0
+        while cursor is not None:
+            page = self.client.get("/games/", params={"phase": "JOIN", "limit": 2, "cursor": cursor}).json()
+            seen.extend(g["game_id"] for g in page["games"])
+            cursor = page["next_cursor"]
+        self.assertEqual(seen, [f"game{i}" for i in range(5)])
+
+        # filling a game moves it out of the open bucket
+        self.join("game0", "other")
+        page = self.client.get("/games/", params={"open": "true"}).json()
+        self.assertEqual([g["game_id"] for g in page["games"]], [f"game{i}" for i in range(1, 5)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from fastapi.testclient import TestClient
+from cribserver.server import create_app, ServerConfig, DeckCreator
+from cribserver.cards import Deck
+from cribserver.api_model import JoinRequest, DiscardRequest, PlayRequest, CribbagePhase
+
+# GAME1 from test_server_game_log: P1 30 points, P2 5 points
+DISCARDS = [("player1", [0, 2]), ("player2", [11, 1])]
+PLAYS = [("player2", 9), ("player1", 4), ("player2", 7), ("player1", 6),
+         ("player2", 3), ("player1", 10), ("player2", 5), ("player1", 8)]
+
+
+class TestMatchPlay(unittest.TestCase):
+    def setUp(self):
+        # Ace to King of Clubs, dealt in order
+        self.deck = Deck()
+        self.deck.piles[Deck.REMAINING] = list(range(13))
+        self.deck.shuffle = lambda: None
+        deck_creator = DeckCreator()
+        deck_creator.create_deck = lambda: self.deck
+        app = create_app(ServerConfig(stats_file=None, setup_logging=False), deck_creator)
+        self.engine = app.state.engine
+        self.client = TestClient(app)
+        for player_id, name in (("player1", "P1"), ("player2", "P2")):
+            request = JoinRequest(player_id=player_id, name=name, match=True)
+            response = self.client.post("/games/test_game/join", json=request.model_dump())
+            self.assertEqual(response.status_code, 200, response.text)
+        for player_id, cards in DISCARDS:
+            request = DiscardRequest(player_id=player_id, card_indices=cards)
+            self.client.post("/games/test_game/discard", json=request.model_dump())
+
+    def play(self, plays):
+        for player_id, card_idx in plays:
+            request = PlayRequest(player_id=player_id, card_idx=card_idx)
+            response = self.client.post("/games/test_game/play", json=request.model_dump())
+            self.assertEqual(response.status_code, 200, response.text)
+        return response.json()
+
+    def test_next_hand(self):
+        # real shuffle for the second deal
+        del self.deck.shuffle
+        self.play(PLAYS)
+        state = self.client.get("/games/test_game/player2/state").json()
+        self.assertEqual(state["target_score"], 121)
+        self.assertEqual(state["phase"], CribbagePhase.DISCARD.value)
+        self.assertEqual(state["hand_number"], 2)
+        self.assertTrue(state["is_dealer"])
+        self.assertEqual(len(state["visible_piles"]["player2"]), 6)
+        self.assertEqual(state["game_log"], ["game.phase -> DEAL", "game.phase -> DISCARD"])
+        self.assertEqual(state["hand_summaries"], [{
+            "hand": 1,
+            "dealer": "player1",
+            "points": {"player1": 30, "player2": 5},
+            "scores": {"player1": 30, "player2": 5},
+            }])
+        log = state["previous_hand_log"]
+        # the show and crib counts of hand 1 are still visible
+        self.assertIn("game.phase -> SHOW", log)
+        crib = log.index("game.phase -> CRIB")
+        self.assertTrue(any(line.startswith("P2 ") for line in log[log.index("game.phase -> SHOW"):crib]))
+        self.assertEqual(log[crib + 1:][-1], "P1 5 points for crib flush of AC, 3C, QC, 2C, KC")
+        state = self.client.get("/games/test_game/player1/state").json()
+        self.assertTrue(state["my_turn"])
+        self.assertFalse(state["is_dealer"])
+
+    def test_only_previous_hand_log(self):
+        del self.deck.shuffle
+        self.play(PLAYS)
+        game = self.engine.games["test_game"]
+        # play two more hands with the first legal moves
+        while game.hand_number < 4:
+            if game.phase == CribbagePhase.DISCARD:
+                for player in game.players:
+                    if len(game.deck.piles[player.player_id]) == 6:
+                        self.engine.discard(game, player.player_id, game.deck.piles[player.player_id][:2])
+            else:
+                self.engine.play(game, game.current_turn, game.legal_cards[game.current_turn][0])
+        state = self.client.get("/games/test_game/player1/state").json()
+        self.assertEqual(len(state["hand_summaries"]), 3)
+        log = state["previous_hand_log"]
+        self.assertEqual(log.count("game.phase -> DEAL"), 1)
+        self.assertNotIn("P1 5 points for crib flush of AC, 3C, QC, 2C, KC", log)
+
+    def test_win_during_pegging(self):
+        self.engine.games["test_game"].target_score = 3
+        # the Go point after 7C takes P1 to 3
+        state = self.play(PLAYS[:4])
+        self.assertEqual(state["phase"], CribbagePhase.DONE.value)
+        self.assertEqual(state["game_log"][-4:], [
+            "Player P1 score: 3",
+            "Player P2 score: 0",
+            "Player P1 wins",
+            "game.phase -> DONE",
+            ])
+        self.assertEqual(self.engine.player_stats["player1"]["wins"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
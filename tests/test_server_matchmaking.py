@@ -0,0 +1,79 @@
+import unittest
+from fastapi.testclient import TestClient
+from cribserver.server import create_app, ServerConfig
+from cribserver.api_model import MatchRequest, CribbagePhase
+from cribserver.matchmaking import Matchmaker
+
+
+class TestMatchmaking(unittest.TestCase):
+    def setUp(self):
+        app = create_app(ServerConfig(stats_file=None, setup_logging=False))
+        self.engine = app.state.engine
+        self.client = TestClient(app)
+
+    def enqueue(self, player_id, skill_bucketing=False):
+        request = MatchRequest(player_id=player_id, name=player_id.upper(), skill_bucketing=skill_bucketing)
+        response = self.client.post("/matchmaking/enqueue", json=request.model_dump())
+        self.assertEqual(response.status_code, 200, response.text)
+        return response.json()
+
+    def test_pairing(self):
+        status = self.enqueue("p1")
+        self.assertIsNone(status["game_id"])
+        # nobody else waiting yet
+        status = self.client.get("/matchmaking/p1", params={"timeout": 0}).json()
+        self.assertIsNone(status["game_id"])
+
+        status = self.enqueue("p2")
+        game_id = status["game_id"]
+        self.assertIsNotNone(game_id)
+        status = self.client.get("/matchmaking/p1", params={"timeout": 0}).json()
+        self.assertEqual(status["game_id"], game_id)
+        # assignment is handed out once
+        self.assertEqual(self.client.get("/matchmaking/p1").status_code, 404)
+
+        game = self.engine.games[game_id]
+        self.assertEqual([p.player_id for p in game.players], ["p1", "p2"])
+        self.assertEqual(game.dealer, "p1")
+        self.assertEqual(game.phase, CribbagePhase.DISCARD)
+        self.assertEqual(len(game.deck.get_cards("p2")), 6)
+
+    def test_skill_buckets_and_cancel(self):
+        self.engine.player_stats["pro"] = {"name": "PRO", "wins": 9, "games_played": 10}
+        self.enqueue("pro", skill_bucketing=True)
+        status = self.enqueue("newbie", skill_bucketing=True)
+        self.assertIsNone(status["game_id"])
+
+        self.assertEqual(self.client.delete("/matchmaking/pro").status_code, 200)
+        self.assertEqual(self.client.delete("/matchmaking/pro").status_code, 404)
+        status = self.enqueue("p3")
+        self.assertIsNone(status["game_id"])
+
+
+class TestTicketExpiry(unittest.TestCase):
+    def test_ghost_dropped(self):
+        now = [0.0]
+        matchmaker = Matchmaker(ticket_timeout=30, clock=lambda: now[0])
+        matchmaker.enqueue("ghost", "GHOST")
+        # ghost hasn't polled for 40s: skipped and forgotten, p1 waits instead
+        now[0] = 40
+        self.assertIsNone(matchmaker.enqueue("p1", "P1")[1])
+        self.assertNotIn("ghost", matchmaker.tickets)
+        # re-enqueueing counts as a poll
+        now[0] = 60
+        matchmaker.enqueue("p1", "P1")
+        now[0] = 80
+        self.assertEqual(matchmaker.enqueue("p2", "P2")[1].player_id, "p1")
+
+    def test_long_poll_keeps_ticket(self):
+        now = [0.0]
+        matchmaker = Matchmaker(ticket_timeout=30, clock=lambda: now[0])
+        matchmaker.enqueue("p1", "P1")
+        ticket = matchmaker.tickets["p1"]
+        ticket.waiting = 1  # as during wait()
+        now[0] = 100
+        self.assertEqual(matchmaker.enqueue("p2", "P2")[1], ticket)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+from fastapi.testclient import TestClient
+from cribserver.server import create_app, ServerConfig
+
+
+class TestStaticAssets(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.tmp.name, "index.html"), "w") as f:
+            f.write('<link rel="stylesheet" href="static/styles.css"><script src="/static/script.js"></script>')
+        with open(os.path.join(self.tmp.name, "script.js"), "w") as f:
+            f.write("console.log('cribbage');\n" * 50)
+        with open(os.path.join(self.tmp.name, "styles.css"), "w") as f:
+            f.write("body { color: black; }\n")
+        app = create_app(ServerConfig(stats_file=None, static_dir=self.tmp.name, setup_logging=False))
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hashed_urls(self):
+        response = self.client.get("/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["cache-control"], "no-cache")
+        html = response.text
+        self.assertNotIn('"static/styles.css"', html)
+        script_url = html.split('src="')[1].split('"')[0]
+        self.assertRegex(script_url, r"^/static/script\.[0-9a-f]{12}\.js$")
+
+        response = self.client.get(script_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("immutable", response.headers["cache-control"])
+        self.assertTrue(response.text.startswith("console.log"))
+        self.assertEqual(self.client.get("/static/script.js").headers["cache-control"], "no-cache")
+        self.assertEqual(self.client.get("/static/missing.js").status_code, 404)
+
+    def test_compression_and_etag(self):
+        response = self.client.get("/static/script.js", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertEqual(response.headers["vary"], "Accept-Encoding")
+        self.assertTrue(response.text.startswith("console.log"))
+        gzip_etag = response.headers["etag"]
+
+        response = self.client.get("/static/script.js", headers={"Accept-Encoding": "identity"})
+        self.assertNotIn("content-encoding", response.headers)
+        self.assertNotEqual(response.headers["etag"], gzip_etag)
+
+        response = self.client.get("/static/script.js", headers={"Accept-Encoding": "gzip", "If-None-Match": gzip_etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import statistics
+import unittest
+from fastapi.testclient import TestClient
+from cribserver import stats
+from cribserver.cards import Deck
+from cribserver.engine import CribbageEngine, DeckCreator, ServerConfig
+from cribserver.server import create_app
+
+# GAME1 from test_server_game_log
+PLAYS = [("player2", 9), ("player1", 4), ("player2", 7), ("player1", 6),
+         ("player2", 3), ("player1", 10), ("player2", 5), ("player1", 8)]
+
+
+class FixedDeck(DeckCreator):
+    def create_deck(self):
+        deck = Deck()
+        deck.piles[Deck.REMAINING] = list(range(13))
+        deck.shuffle = lambda: None
+        return deck
+
+
+class TestRunningStats(unittest.TestCase):
+    def test_welford(self):
+        values = [3, 8, 0, 12, 29, 4, 4]
+        entry = stats.new_stats("P1")
+        for value in values:
+            stats.add(entry, stats.HAND_POINTS, value)
+        described = stats.describe(entry[stats.HAND_POINTS])
+        self.assertEqual(described["count"], len(values))
+        self.assertAlmostEqual(described["mean"], statistics.mean(values))
+        self.assertAlmostEqual(described["variance"], statistics.variance(values))
+
+    def test_twenty_nines(self):
+        entry = stats.new_stats("P1")
+        stats.add_hand(entry, 29)
+        stats.add_hand(entry, 29, is_crib=True)
+        stats.add_hand(entry, 28)
+        self.assertEqual(entry["twenty_nines"], 2)
+        self.assertEqual(entry[stats.CRIB_POINTS]["n"], 1)
+
+    def test_old_entry(self):
+        summary = stats.summary({"name": "P1", "wins": 1, "games_played": 4})
+        self.assertEqual(summary["win_rate"], 0.25)
+        self.assertEqual(summary[stats.PEGGING_POINTS], {"count": 0, "mean": 0.0, "variance": 0.0, "stddev": 0.0})
+
+
+class TestEngineStats(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(ServerConfig(stats_file=None, setup_logging=False), FixedDeck())
+        self.engine: CribbageEngine = self.app.state.engine
+        self.now = 0.0
+        self.engine.clock = lambda: self.now
+
+    def play_game(self):
+        engine = self.engine
+        game = engine.add_player("g1", "player1", "P1")
+        engine.add_player("g1", "player2", "P2")
+        for player_id, cards in (("player1", [0, 2]), ("player2", [11, 1])):
+            self.now += 2
+            engine.discard(game, player_id, cards)
+        for player_id, card_idx in PLAYS:
+            self.now += 1
+            engine.play(game, player_id, card_idx)
+        return game
+
+    def test_counted_on_completion(self):
+        self.engine.add_player("g1", "player1", "P1")
+        self.assertEqual(self.engine.player_stats["player1"]["games_played"], 0)
+        self.engine.games.clear()
+        game = self.play_game()
+        player_stats = self.engine.player_stats
+        self.assertEqual([player_stats[p]["games_played"] for p in ("player1", "player2")], [1, 1])
+        self.assertEqual(player_stats["player1"]["wins"], 1)
+        scores = {p.player_id: p.score for p in game.players}
+        margin = scores["player1"] - scores["player2"]
+        self.assertEqual(player_stats["player1"][stats.MARGIN]["mean"], margin)
+        self.assertEqual(player_stats["player2"][stats.MARGIN]["mean"], -margin)
+
+    def test_points_add_up(self):
+        game = self.play_game()
+        for player in game.players:
+            entry = self.engine.player_stats[player.player_id]
+            total = sum(entry[key]["mean"] * entry[key]["n"] for key in
+                        (stats.HAND_POINTS, stats.CRIB_POINTS, stats.PEGGING_POINTS) if key in entry)
+            self.assertEqual(total, player.score)
+        # player1 dealt, so only they counted a crib
+        self.assertEqual(self.engine.player_stats["player1"][stats.CRIB_POINTS]["n"], 1)
+        self.assertNotIn(stats.CRIB_POINTS, self.engine.player_stats["player2"])
+
+    def test_move_seconds(self):
+        self.play_game()
+        moves = self.engine.player_stats["player1"][stats.MOVE_SECONDS]
+        # a discard 2s after the deal, then 4 plays each 1s after the previous one
+        self.assertEqual(moves["n"], 5)
+        self.assertAlmostEqual(moves["mean"], (2 + 4 * 1) / 5)
+        moves = self.engine.player_stats["player2"][stats.MOVE_SECONDS]
+        self.assertAlmostEqual(moves["mean"], (4 + 4 * 1) / 5)
+
+    def test_endpoint(self):
+        self.play_game()
+        client = TestClient(self.app)
+        body = client.get("/players/player1/stats").json()
+        self.assertEqual(body["games_played"], 1)
+        self.assertEqual(body["win_rate"], 1.0)
+        self.assertEqual(body[stats.HAND_POINTS]["count"], 1)
+        self.assertEqual(body[stats.MOVE_SECONDS]["count"], 5)
+        self.assertEqual(client.get("/players/nobody/stats").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from fastapi.testclient import TestClient
+from cribserver.server import create_app, ServerConfig, DeckCreator
+from cribserver.cards import Deck
+from cribserver.api_model import JoinRequest, DiscardRequest, PlayerState, ActionBatchRequest, Action, ActionType, MAX_NAME_LENGTH
+from cribserver import wire
+
+BINARY = {"Accept": wire.MEDIA_TYPE}
+
+
+class TestWireFormat(unittest.TestCase):
+    def setUp(self):
+        # Ace to King of Clubs, dealt in order
+        self.deck = deck = Deck()
+        deck.piles[Deck.REMAINING] = list(range(13))
+        deck.shuffle = lambda: None
+        deck_creator = DeckCreator()
+        deck_creator.create_deck = lambda: deck
+        app = create_app(ServerConfig(stats_file=None, setup_logging=False), deck_creator)
+        self.client = TestClient(app)
+        for player_id, name in (("player1", "P1"), ("player2", "P2")):
+            request = JoinRequest(player_id=player_id, name=name, match=True)
+            response = self.client.post("/games/test_game/join", json=request.model_dump())
+            self.assertEqual(response.status_code, 200, response.text)
+
+    def assert_same_state(self, player_id, path=None):
+        path = path or f"/games/test_game/{player_id}/state"
+        expected = self.client.get(path).json()
+        response = self.client.get(path, headers=BINARY)
+        self.assertEqual(response.headers["content-type"], wire.MEDIA_TYPE)
+        self.assertLess(len(response.content), len(self.client.get(path).content))
+        self.assertEqual(wire.decode_state(response.content).model_dump(mode="json"), expected)
+
+    def test_state(self):
+        self.assert_same_state("player1")
+        request = DiscardRequest(player_id="player1", card_indices=[0, 2])
+        response = self.client.post("/games/test_game/discard", json=request.model_dump(), headers=BINARY)
+        self.assertEqual(wire.decode_state(response.content).visible_piles["player1"], [4, 6, 8, 10])
+        request = DiscardRequest(player_id="player2", card_indices=[11, 1])
+        self.client.post("/games/test_game/discard", json=request.model_dump())
+        self.assert_same_state("player1")
+        self.assert_same_state("player2")
+
+    def test_hand_summaries(self):
+        # real shuffle for the second deal
+        del self.deck.shuffle
+        for player_id, cards in (("player1", [0, 2]), ("player2", [11, 1])):
+            self.client.post("/games/test_game/discard", json=DiscardRequest(player_id=player_id, card_indices=cards).model_dump())
+        for player_id, card_idx in (("player2", 9), ("player1", 4), ("player2", 7), ("player1", 6),
+                                    ("player2", 3), ("player1", 10), ("player2", 5), ("player1", 8)):
+            self.client.post("/games/test_game/play", json={"player_id": player_id, "card_idx": card_idx})
+        state = wire.decode_state(self.client.get("/games/test_game/player1/state", headers=BINARY).content)
+        self.assertEqual(state.hand_number, 2)
+        self.assertEqual(len(state.hand_summaries), 1)
+        self.assertIn("game.phase -> CRIB", state.previous_hand_log)
+        self.assert_same_state("player1")
+
+    def test_batch_result(self):
+        request = ActionBatchRequest(player_id="player1", actions=[
+            Action(type=ActionType.DISCARD, card_indices=[0, 2]),
+            Action(type=ActionType.PLAY, card_idx=4),
+            ])
+        response = self.client.post("/games/test_game/actions", json=request.model_dump(mode="json"), headers=BINARY)
+        result = wire.decode_batch_result(response.content)
+        self.assertEqual(result.applied, 1)
+        self.assertEqual(len(result.errors), 1)
+        self.assertEqual(result.errors[0].index, 1)
+        self.assertEqual(result.errors[0].status_code, 400)
+        self.assertEqual(result.state.visible_piles["player1"], [4, 6, 8, 10])
+
+    def test_long_strings(self):
+        # 100 characters, 300 bytes of utf-8
+        name = "\u20ac" * MAX_NAME_LENGTH
+        request = JoinRequest(player_id="player3", name=name)
+        response = self.client.post("/games/other_game/join", json=request.model_dump(), headers=BINARY)
+        self.assertEqual(response.status_code, 200)
+        state = wire.decode_state(response.content)
+        self.assertEqual(state.players[0].name, name)
+        self.assertEqual(len(name.encode()), 300)
+        self.assert_same_state("player3", "/games/other_game/player3/state")
+        response = self.client.post("/games/other_game/join", json={"player_id": "player4", "name": name + "x"})
+        self.assertEqual(response.status_code, 422)
+
+    def test_json_is_default(self):
+        response = self.client.get("/games/test_game/player1/state")
+        self.assertEqual(response.headers["content-type"], "application/json")
+
+    def test_bad_message(self):
+        with self.assertRaises(ValueError):
+            wire.decode_state(b"XX\x01\x00\x01\x00\x01\x00\x00")
+
+
+if __name__ == "__main__":
+    unittest.main()